@@ -1,55 +1,404 @@
+import math
 import os
-import re
+import threading
+import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
-import pandas as pd
-from flask import Flask, jsonify, render_template, request
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    abort,
+    g,
+    jsonify,
+    make_response,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_cors import CORS
+from markupsafe import Markup
+
+from cache import LRUCache
+from clashes import (
+    cell_bit,
+    cells_of,
+    course_clashes,
+    describe_cell,
+    find_clashes,
+    grid_size,
+)
+from course_info import clean_course_info  # noqa: F401 (re-exported)
+from datastore import DataStore
+from demand import DemandRecorder
+from exports import (
+    FORMATS,
+    clean_cell,
+    csv_chunks,
+    default_semester,
+    ics_chunks,
+    timetable_rows,
+    xlsx_chunks,
+)
+from metrics import STAGE_BUCKETS, Registry
+from model import cell_text
+from permalinks import DAYS, decode_selection, encode_selection, timetable_table
+from planner import plan_schedules
+from profiler import SamplingProfiler
+from search import words
+from slots import resolve_slot, split_slots
+from terms import TermRegistry
 
 app = Flask(__name__, template_folder="templates")
 app.secret_key = os.urandom(24)
 
 # Enable CORS for all routes and origins
-CORS(app, origins="*", methods=["GET", "POST"])
+CORS(app, origins="*", methods=["GET", "POST"], expose_headers=["X-Data-Version"])
+
+# Timetable data, hot-reloaded when the CSVs change on disk
+store = DataStore(
+    check_interval=float(os.environ.get("TIMETABLE_RELOAD_INTERVAL", "30"))
+)
+
+# Other terms served under /api/<term>/, loaded on first use. Cache keys
+# include the data version, so the caches below are shared by all terms.
+terms = TermRegistry(
+    os.environ.get("TIMETABLE_TERMS_DIR", "terms"),
+    max_loaded=int(os.environ.get("TIMETABLE_TERMS_LOADED", "4")),
+    idle_seconds=float(os.environ.get("TIMETABLE_TERM_IDLE", "3600")),
+    check_interval=store.check_interval,
+)
+
+
+# Encoded /api/timetable responses keyed on (data version, course selection)
+timetable_cache = LRUCache(
+    max_entries=int(os.environ.get("TIMETABLE_CACHE_ENTRIES", "2048")),
+    max_bytes=int(os.environ.get("TIMETABLE_CACHE_BYTES", str(16 * 1024 * 1024))),
+)
+store.add_listener(lambda snapshot: timetable_cache.clear())
+
+# Schedule planner: encoded results per request, and hard limits on the search
+planner_cache = LRUCache(max_entries=256, max_bytes=4 * 1024 * 1024)
+store.add_listener(lambda snapshot: planner_cache.clear())
+PLANNER_MAX_RESULTS = 200
+PLANNER_MAX_SECONDS = 2.0
+PLANNER_MIN_SECONDS = 0.01
+
+
+# Downloadable timetables per (data version, format, selection, semester)
+export_cache = LRUCache(
+    max_entries=int(os.environ.get("TIMETABLE_EXPORT_ENTRIES", "512")),
+    max_bytes=8 * 1024 * 1024,
+)
+store.add_listener(lambda snapshot: export_cache.clear())
+SEMESTER_START = os.environ.get("TIMETABLE_SEMESTER_START")
+SEMESTER_END = os.environ.get("TIMETABLE_SEMESTER_END")
+
+# Encoded course search pages per (data version, query words, offset, limit)
+search_cache = LRUCache(
+    max_entries=int(os.environ.get("TIMETABLE_SEARCH_ENTRIES", "4096")),
+    max_bytes=8 * 1024 * 1024,
+)
+store.add_listener(lambda snapshot: search_cache.clear())
+SEARCH_MAX_LIMIT = 100
+
+# Rendered timetable HTML of shared links per (data version, selection)
+permalink_cache = LRUCache(
+    max_entries=int(os.environ.get("TIMETABLE_PERMALINK_ENTRIES", "1024")),
+    max_bytes=8 * 1024 * 1024,
+)
+store.add_listener(lambda snapshot: permalink_cache.clear())
+
+
+# Batch requests: size limit and thread pool used for parallel fan-out
+BATCH_LIMIT = int(os.environ.get("TIMETABLE_BATCH_LIMIT", "5000"))
+BATCH_WORKERS = int(os.environ.get("TIMETABLE_BATCH_WORKERS", str(os.cpu_count() or 2)))
+BATCH_PARALLEL_THRESHOLD = 64
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+
+# Instrumentation: Prometheus metrics at /metrics, and a sampling profiler that
+# can be switched on at runtime when TIMETABLE_PROFILER=1
+metrics = Registry(enabled=os.environ.get("TIMETABLE_METRICS", "1") != "0")
+request_seconds = metrics.histogram(
+    "timetable_request_duration_seconds",
+    "Time spent handling a request, by route",
+    ("route", "method", "status"),
+)
+stage_seconds = metrics.histogram(
+    "timetable_stage_duration_seconds",
+    "Time spent in each step of building a timetable response",
+    ("stage",),
+    buckets=STAGE_BUCKETS,
+)
+profiler = SamplingProfiler()
+PROFILER_CONTROL = os.environ.get("TIMETABLE_PROFILER", "0") == "1"
+
+# Slot and course pair demand of the current term's /api/timetable requests,
+# aggregated off the request path. Kept in memory per worker unless
+# TIMETABLE_DEMAND_FILE names a file all workers add to every
+# TIMETABLE_DEMAND_INTERVAL seconds
+demand = DemandRecorder(
+    os.environ.get("TIMETABLE_DEMAND_FILE", ""),
+    flush_interval=float(os.environ.get("TIMETABLE_DEMAND_INTERVAL", "60")),
+)
+DEMAND_MAX_LIMIT = 100
+
+
+def collect_app_metrics():
+    snapshot = store.snapshot
+    caches = {
+        "timetable": timetable_cache,
+        "planner": planner_cache,
+        "export": export_cache,
+        "permalink": permalink_cache,
+        "search": search_cache,
+    }
+    stats = {name: cache.stats() for name, cache in caches.items()}
+
+    def per_cache(field):
+        return [({"cache": name}, values[field]) for name, values in stats.items()]
+
+    return [
+        ("timetable_cache_hits_total", "counter", "Cache hits", per_cache("hits")),
+        (
+            "timetable_cache_misses_total",
+            "counter",
+            "Cache misses",
+            per_cache("misses"),
+        ),
+        (
+            "timetable_cache_evictions_total",
+            "counter",
+            "Cache evictions",
+            per_cache("evictions"),
+        ),
+        ("timetable_cache_hit_ratio", "gauge", "Cache hit rate", per_cache("hit_rate")),
+        ("timetable_cache_entries", "gauge", "Cached responses", per_cache("entries")),
+        (
+            "timetable_cache_bytes",
+            "gauge",
+            "Size of cached responses",
+            per_cache("bytes"),
+        ),
+        (
+            "timetable_data_info",
+            "gauge",
+            "Version of the timetable data being served",
+            [({"version": snapshot.version}, 1)],
+        ),
+        (
+            "timetable_data_last_modified_seconds",
+            "gauge",
+            "Modification time of the timetable data files",
+            [({}, snapshot.last_modified)],
+        ),
+        (
+            "timetable_terms_loaded",
+            "gauge",
+            "Terms with their data loaded",
+            [({}, len(terms.loaded()))],
+        ),
+        (
+            "timetable_term_evictions_total",
+            "counter",
+            "Terms unloaded after being idle or least recently used",
+            [({}, terms.evictions)],
+        ),
+        (
+            "timetable_profiler_running",
+            "gauge",
+            "Whether the sampling profiler is running",
+            [({}, int(profiler.running))],
+        ),
+    ]
+
+
+metrics.add_collector(collect_app_metrics)
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.before_request
+def attach_snapshot():
+    """Pin one data snapshot for the whole request"""
+    data = g.get("store", store)
+    data.maybe_reload()
+    g.snapshot = data.snapshot
+
+
+@app.after_request
+def add_data_version(response):
+    snapshot = g.get("snapshot")
+    if snapshot is not None:
+        response.headers["X-Data-Version"] = snapshot.version
+    return response
+
 
-# Load data
-try:
-    time_slots = pd.read_csv("Time Slots.csv")
-    timetable_data = pd.read_csv("Updated_Processed_Timetable.csv")
-    time_labels = pd.read_csv("Time Slots.csv").iloc[:, 0].tolist()
-except Exception:
-    time_slots = pd.DataFrame()
-    timetable_data = pd.DataFrame()
-    time_labels = []
+@app.after_request
+def record_request_duration(response):
+    """Observe the request duration up to the response being returned.
+
+    Streamed bodies are generated after this point, so batch requests are
+    only timed until the response starts.
+    """
+    start = g.get("request_start")
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        request_seconds.observe(
+            time.perf_counter() - start,
+            route,
+            request.method,
+            str(response.status_code),
+        )
+    return response
 
 
 @app.route("/")
 def index():
-    return render_template("index.html", session_id=str(uuid.uuid4()))
+    return render_template(
+        "index.html",
+        session_id=str(uuid.uuid4()),
+        calendar_export=export_semester() is not None,
+    )
+
+
+@app.route("/t/<token>")
+def permalink(token):
+    """Page with the timetable of a shared link already filled in"""
+    snapshot = g.snapshot
+    try:
+        selection = decode_selection(token, snapshot.courses)
+    except ValueError as e:
+        return render_template("error.html", error=str(e)), 404
+
+    if not selection:
+        return index()
+
+    courses = [snapshot.courses[code] for code in selection]
+    return render_template(
+        "index.html",
+        session_id=str(uuid.uuid4()),
+        calendar_export=export_semester() is not None,
+        permalink={
+            "token": token,
+            "courses": courses,
+            "details": [
+                {"code": course.code, "name": course.name, "credits": course.credits}
+                for course in courses
+            ],
+            "credits": sum(int(course.credits or 0) for course in courses),
+            "timetable": Markup(permalink_fragment(tuple(selection), snapshot)),
+        },
+    )
+
+
+@app.route("/api/permalink", methods=["POST"])
+def create_permalink():
+    """Shareable link of a course selection, ``{"token": ..., "url": ...}``"""
+    json_data = request.get_json(silent=True)
+    if not isinstance(json_data, dict):
+        return jsonify({"error": "No JSON data provided"}), 400
+
+    selected_courses = json_data.get("courses", [])
+    if not isinstance(selected_courses, list):
+        return jsonify({"error": "Courses must be a list"}), 400
+
+    snapshot = g.snapshot
+    selection = normalize_selection(selected_courses, snapshot)
+    if not selection:
+        return jsonify({"error": "No courses selected"}), 400
+
+    token = encode_selection(selection, snapshot.courses)
+    return jsonify({"token": token, "url": url_for("permalink", token=token)})
 
 
 @app.route("/api/courses")
 def get_courses():
     try:
-        courses = [
-            {
-                "code": row["Course Code"],
-                "name": row["Course Name"],
-                "credits": row["Credit"],
-            }
-            for _, row in timetable_data.iterrows()
-            if not pd.isna(row["Credit"])
-        ]
+        courses_payload = g.snapshot.courses_payload
+        encodings = courses_payload["encodings"]
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in encodings and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
 
-        return jsonify(
+        response = Response(encodings[encoding], mimetype="application/json")
+        # Each encoding is a distinct representation and needs its own strong tag
+        etag = courses_payload["etag"]
+        if encoding != "identity":
+            etag = f"{etag}-{encoding}"
+            response.headers["Content-Encoding"] = encoding
+
+        response.vary.add("Accept-Encoding")
+        response.set_etag(etag)
+        response.last_modified = courses_payload["last_modified"]
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({"error": f"Failed to load courses: {str(e)}"}), 500
+
+
+@app.route("/api/courses/search")
+def search_courses():
+    """Ranked, paginated course search.
+
+    ``q`` matches word prefixes of the course code, name and instructors
+    (with typo tolerance for longer words); ``offset`` and ``limit`` (at
+    most 100) select the page. Returns the total number of matches and the
+    page of courses, best match first.
+    """
+    try:
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "Offset and limit must be integers"}), 400
+    if offset < 0 or not 0 < limit <= SEARCH_MAX_LIMIT:
+        return (
+            jsonify({"error": f"Limit must be 1 to {SEARCH_MAX_LIMIT}, offset >= 0"}),
+            400,
+        )
+
+    snapshot = g.snapshot
+    query = " ".join(words(request.args.get("q", "")))
+    key = (snapshot.version, query, offset, limit)
+    body = search_cache.get(key)
+    cached = body is not None
+    if not cached:
+        with stage_seconds.time("search"):
+            total, codes = snapshot.search_index.search(query, offset, limit)
+        courses = [snapshot.courses[code] for code in codes]
+        body = encode_json(
             {
-                "courses": courses,
-                "days": list(time_slots.columns) if not time_slots.empty else [],
-                "timeLabels": time_labels,
+                "query": query,
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+                "courses": [
+                    {
+                        "code": course.code,
+                        "name": course.name,
+                        "credits": course.credits,
+                        "instructors": [i.name for i in course.instructors],
+                    }
+                    for course in courses
+                ],
             }
         )
-    except Exception as e:
-        return jsonify({"error": f"Failed to load courses: {str(e)}"}), 500
+        search_cache.put(key, body)
+
+    response = Response(body, mimetype="application/json")
+    response.headers["X-Cache"] = "HIT" if cached else "MISS"
+    return response
 
 
 @app.route("/api/timetable", methods=["POST"])
@@ -71,115 +420,777 @@ def get_timetable():
         if not selected_courses:
             return jsonify({"error": "No courses selected"}), 400
 
-        # Create timetable structure
-        timetable = create_timetable(selected_courses)
-        clean_timetable = {}
-        days = [col for col in timetable.columns if col != "Time Slot"]
+        body, cached = timetable_body(selected_courses, g.snapshot)
+        if "store" not in g and isinstance(selected_courses, list):
+            demand.record(selected_courses, g.snapshot)
+        response = Response(body, mimetype="application/json")
+        response.headers["X-Cache"] = "HIT" if cached else "MISS"
+        return response
+    except Exception as e:
+        return jsonify({"error": f"Failed to generate timetable: {str(e)}"}), 500
+
+
+@app.route("/api/timetable/delta", methods=["POST"])
+def get_timetable_delta():
+    """Cells and clashes changed by adding or removing one course.
+
+    Accepts the prior selection as ``courses`` (or the ``token`` of a
+    previous delta or shareable link) plus ``add`` or ``remove`` with one
+    course code. Returns the new selection and its ``token``, the changed
+    cells in the format of /api/timetable (``class`` is null for cells
+    that became empty) and the clashing pairs added or resolved. A
+    ``version`` other than the served data version answers 409, as tokens
+    and cells only hold for the data they were made from.
+    """
+    json_data = request.get_json(silent=True)
+    if not isinstance(json_data, dict):
+        return jsonify({"error": "No JSON data provided"}), 400
+
+    snapshot = g.snapshot
+    version = json_data.get("version")
+    if version is not None and version != snapshot.version:
+        return (
+            jsonify({"error": "Timetable data changed", "version": snapshot.version}),
+            409,
+        )
+
+    add, remove = json_data.get("add"), json_data.get("remove")
+    code = add if remove is None else remove
+    if (add is None) == (remove is None) or not isinstance(code, str):
+        return jsonify({"error": "Give one course to add or remove"}), 400
+    if code not in snapshot.courses:
+        return jsonify({"error": f"Unknown course: {code}"}), 400
+
+    if "token" in json_data:
+        try:
+            selection = decode_selection(str(json_data["token"]), snapshot.courses)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    elif isinstance(json_data.get("courses", []), list):
+        selection = catalogue_order(json_data.get("courses", []), snapshot)
+    else:
+        return jsonify({"error": "Courses must be a list"}), 400
+
+    with stage_seconds.time("timetable_delta"):
+        result = timetable_delta(selection, code, add is not None, snapshot)
+    return jsonify(result)
+
+
+@app.route("/api/timetable/batch", methods=["POST"])
+def get_timetable_batch():
+    """Generate many timetables in one request, streamed as NDJSON.
 
-        # Initialize days
-        for day in days:
-            clean_timetable[day.lower()] = []
+    Accepts ``{"selections": [...], "parallel": false}`` where each selection
+    is either a list of course codes or ``{"id": ..., "courses": [...]}``.
+    Every selection produces one line, in request order, holding either its
+    ``timetable`` or an ``error``.
+    """
+    try:
+        json_data = request.get_json(silent=True)
+        if not isinstance(json_data, dict):
+            return jsonify({"error": "No JSON data provided"}), 400
 
-        # Process each time slot
-        for idx, row in timetable.iterrows():
-            time_slot = (
-                time_labels[idx] if idx < len(time_labels) else f"Slot {idx + 1}"
+        selections = json_data.get("selections")
+        if not isinstance(selections, list) or not selections:
+            return jsonify({"error": "No selections provided"}), 400
+        if len(selections) > BATCH_LIMIT:
+            return (
+                jsonify({"error": f"At most {BATCH_LIMIT} selections per batch"}),
+                400,
             )
 
-            for day in days:
-                content = str(row[day]) if pd.notna(row[day]) else ""
-                clean_info = clean_course_info(content)
+        snapshot = g.snapshot
+        items = enumerate(selections)
+
+        def render(item):
+            return batch_line(item[0], item[1], snapshot)
+
+        if json_data.get("parallel") and len(selections) >= BATCH_PARALLEL_THRESHOLD:
+            lines = ordered_map(render, items, batch_executor(), BATCH_WORKERS * 4)
+        else:
+            lines = map(render, items)
+
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    except Exception as e:
+        return jsonify({"error": f"Failed to generate timetables: {str(e)}"}), 500
+
+
+def export_semester():
+    """Default dates of ICS exports, None when they are misconfigured.
+
+    ``TIMETABLE_SEMESTER_START`` and ``TIMETABLE_SEMESTER_END`` when both
+    are set, else the approximate dates of the current semester.
+    """
+    if not (SEMESTER_START or SEMESTER_END):
+        return default_semester(date.today())
+    try:
+        start = date.fromisoformat(SEMESTER_START or "")
+        end = date.fromisoformat(SEMESTER_END or "")
+    except ValueError:
+        return None
+    return (start, end) if 0 <= (end - start).days <= 366 else None
+
 
-                if clean_info:
-                    clean_timetable[day.lower()].append(
-                        {"time": time_slot, "class": clean_info}
-                    )
+@app.route("/api/timetable/export", methods=["GET", "POST"])
+def export_timetable():
+    """Download a timetable as CSV, XLSX or an iCalendar feed.
 
-        # Remove empty days
+    Takes ``format`` and the ``courses`` as repeated query parameters, or a
+    JSON body ``{"courses": [...]}`` when POSTed. ICS exports repeat every
+    session weekly between the ``start`` and ``end`` dates (YYYY-MM-DD),
+    defaulting to ``export_semester()``. Files are streamed while they are generated and cached afterwards.
+    """
+    try:
+        json_data = request.get_json(silent=True) if request.method == "POST" else None
+        params = dict(request.args.items())
+        if isinstance(json_data, dict):
+            params.update(json_data)
+            selected_courses = json_data.get("courses", [])
+        else:
+            selected_courses = [
+                code
+                for value in request.args.getlist("courses")
+                for code in value.split(",")
+            ]
+
+        export_format = params.get("format", "csv")
+        if not isinstance(export_format, str) or export_format not in FORMATS:
+            formats = ", ".join(FORMATS)
+            return jsonify({"error": f"Format must be one of {formats}"}), 400
+        if not isinstance(selected_courses, list) or not selected_courses:
+            return jsonify({"error": "No courses selected"}), 400
+
+        semester = None
+        if export_format == "ics":
+            default = export_semester()
+            start, end = params.get("start"), params.get("end")
+            try:
+                semester = (
+                    date.fromisoformat(start) if start else default[0],
+                    date.fromisoformat(end) if end else default[1],
+                )
+            except (TypeError, ValueError):
+                return (
+                    jsonify({"error": "Semester start and end dates are required"}),
+                    400,
+                )
+            if not 0 <= (semester[1] - semester[0]).days <= 366:
+                return jsonify({"error": "Invalid semester dates"}), 400
+
+        snapshot = g.snapshot
+        selection = normalize_selection(selected_courses, snapshot)
+        key = (snapshot.version, export_format, selection, semester)
+
+        body = export_cache.get(key)
+        if body is None:
+            chunks = cache_chunks(
+                export_cache,
+                key,
+                export_chunks(export_format, selection, semester, snapshot),
+            )
+        else:
+            chunks = [body]
+
+        response = Response(chunks, mimetype=FORMATS[export_format])
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="Timetable.{export_format}"'
+        )
+        response.headers["X-Cache"] = "MISS" if body is None else "HIT"
+        return response
+    except Exception as e:
+        return jsonify({"error": f"Failed to export timetable: {str(e)}"}), 500
+
+
+@app.route("/api/clashes", methods=["POST"])
+def get_clashes():
+    """Report which of the selected courses collide and in which slots"""
+    try:
+        json_data = request.get_json(silent=True)
+        if not isinstance(json_data, dict):
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        selected_courses = json_data.get("courses", [])
+        if not isinstance(selected_courses, list):
+            return jsonify({"error": "Courses must be a list"}), 400
+
+        snapshot = g.snapshot
         return jsonify(
-            {day: classes for day, classes in clean_timetable.items() if classes}
+            find_clashes(catalogue_order(selected_courses, snapshot), snapshot)
         )
     except Exception as e:
-        return jsonify({"error": f"Failed to generate timetable: {str(e)}"}), 500
+        return jsonify({"error": f"Failed to check clashes: {str(e)}"}), 500
 
 
-def clean_course_info(content):
-    """Clean and format course information"""
-    if (
-        not content
-        or content.strip() in ["", "nan"]
-        or re.match(r"^[A-Z]\d+$", content.strip())
-    ):
-        return None
+def finite_number(value):
+    """Whether a JSON value is a real number (booleans and NaN are not)"""
+    return (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    )
 
-    if content.strip() in ["T1", "T2", "T3", "O1", "O2"]:
-        return None
 
-    # Remove brackets first, then replace commas with single space, then process newlines
-    content = re.sub(r"\([^)]*\)", "", content)
-    content = re.sub(
-        r",\s*", " ", content
-    )  # Replace comma and any following spaces with single space
-    content = content.replace("\n", ", ")  # Replace newlines with comma-space
-    parts = [part.strip() for part in content.split(",") if part.strip()]
-
-    # Filter out course codes (pattern: letters followed by numbers)
-    clean_parts = []
-    for part in parts:
-        # Skip if it matches course code pattern (e.g., CS101, MATH201)
-        if not re.match(r"^[A-Z]{1,4}\d+$", part.strip()):
-            clean_parts.append(part)
-
-    return ", ".join(clean_parts) if clean_parts else None
-
-
-def create_timetable(selected_courses):
-    """Create timetable data structure"""
-    course_info = {}
-    for _, row in timetable_data.iterrows():
-        if row["Course Code"] in selected_courses:
-            course_info[row["Course Code"]] = {
-                "name": row["Course Name"],
-                "Lecture": str(row.get("Lecture Time", "")),
-                "Tutorial": str(row.get("Tutorial Time", "")),
-                "Lab": str(row.get("Lab Time", "")),
-                "Lecture_Location": str(row.get("Lecture Location", "")),
-                "Tutorial_Location": str(row.get("Tutorial Location", "")),
-                "Lab_Location": str(row.get("Lab Location", "")),
-            }
+@app.route("/api/planner", methods=["POST"])
+def get_schedule_plans():
+    """Rank clash-free elective combinations that reach a credit target.
+
+    Accepts ``{"required": [...], "candidates": [...], "groups": [...],
+    "credits": 20}`` plus optional ``max_credits``, ``limit`` and
+    ``time_budget`` (seconds). ``groups`` adds every course of the named
+    "HSS/BS elective" or "Minor in" categories to the candidates.
+    """
+    try:
+        json_data = request.get_json(silent=True)
+        if not isinstance(json_data, dict):
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        required = json_data.get("required", [])
+        candidates = json_data.get("candidates", [])
+        groups = json_data.get("groups", [])
+        if not all(isinstance(value, list) for value in (required, candidates, groups)):
+            return jsonify({"error": "Courses and groups must be lists"}), 400
 
-    timetable = time_slots.copy().reset_index(drop=True)
-
-    for slot in timetable.index:
-        for day in timetable.columns:
-            entries = []
-            for code, info in course_info.items():
-                for session_type in ["Lecture", "Tutorial", "Lab"]:
-                    times = info.get(session_type, "")
-                    if pd.isna(times) or times == "nan":
-                        continue
-
-                    if timetable.at[slot, day] in [
-                        t.strip() for t in times.split(",") if t.strip()
-                    ]:
-                        location = info.get(f"{session_type}_Location", "")
-                        location_text = (
-                            f"\n{location}" if location and location != "nan" else ""
-                        )
-                        entries.append(
-                            f"{code}\n{info['name']}\n{session_type}{location_text}"
-                        )
-
-            if len(entries) > 1:
-                display = (
-                    "/ ".join([e.split("\n")[0].strip() for e in entries]) + "\n(Clash)"
+        target = json_data.get("credits")
+        max_credits = json_data.get("max_credits")
+        if not finite_number(target) or target <= 0:
+            return jsonify({"error": "A positive credit target is required"}), 400
+        if max_credits is not None and not finite_number(max_credits):
+            return jsonify({"error": "max_credits must be a number"}), 400
+
+        limit = json_data.get("limit", 20)
+        time_budget = json_data.get("time_budget", 0.5)
+        if not all(finite_number(value) for value in (limit, time_budget)):
+            return jsonify({"error": "limit and time_budget must be numbers"}), 400
+        limit = max(1, min(int(limit), PLANNER_MAX_RESULTS))
+        time_budget = max(PLANNER_MIN_SECONDS, min(time_budget, PLANNER_MAX_SECONDS))
+
+        snapshot = g.snapshot
+        required = catalogue_order(required, snapshot)
+        for group in groups:
+            if isinstance(group, str):
+                candidates = candidates + snapshot.elective_groups.get(group, [])
+        candidates = normalize_selection(candidates, snapshot)
+
+        clashes = find_clashes(required, snapshot)
+        if clashes["clashes"]:
+            return jsonify(dict(clashes, error="Required courses clash")), 409
+        required_credits = sum(snapshot.courses[code].credits or 0 for code in required)
+        if max_credits is not None and required_credits > max_credits:
+            error = "Required courses exceed max_credits"
+            return jsonify({"error": error, "credits": required_credits}), 409
+
+        key = (
+            snapshot.version,
+            tuple(required),
+            candidates,
+            target,
+            max_credits,
+            limit,
+            time_budget,
+        )
+        body = planner_cache.get(key)
+        if body is None:
+            result = plan_schedules(
+                required,
+                candidates,
+                target,
+                snapshot,
+                max_credits=max_credits,
+                max_results=limit,
+                time_budget=time_budget,
+            )
+            body = encode_json(result)
+            planner_cache.put(key, body)
+
+        return Response(body, mimetype="application/json")
+    except Exception as e:
+        return jsonify({"error": f"Failed to plan schedules: {str(e)}"}), 500
+
+
+def describe(cell, snapshot):
+    """Slot code, day and time label of a ``(row, column)`` grid cell"""
+    row, col = cell
+    return describe_cell(cell_bit(row, col, len(snapshot.grid.columns)), snapshot)
+
+
+@app.route("/api/rooms")
+def get_rooms():
+    """Every room booked by a course session"""
+    return jsonify({"rooms": g.snapshot.room_index.rooms()})
+
+
+@app.route("/api/rooms/<path:room>/schedule")
+def get_room_schedule(room):
+    """Weekly timetable of one room, in the format of /api/timetable"""
+    snapshot = g.snapshot
+    room_index = snapshot.room_index
+    key = room_index.find(room)
+    if key is None:
+        return jsonify({"error": f"Unknown room: {room}"}), 404
+
+    return jsonify(
+        {
+            "room": room_index.names[key],
+            "timetable": cells_by_day(room_index.cells(key), snapshot.grid),
+        }
+    )
+
+
+@app.route("/api/rooms/free")
+def get_free_rooms():
+    """Rooms no course books in any period of ``slot`` (e.g. ``C2`` or ``I1-K1``)"""
+    snapshot = g.snapshot
+    slot = request.args.get("slot", "")
+    tokens = split_slots(slot)
+    if not tokens:
+        return jsonify({"error": "A slot is required"}), 400
+
+    cells = {}
+    for token in tokens:
+        resolved = resolve_slot(token, snapshot.grid)
+        if not resolved:
+            return jsonify({"error": f"Unknown slot: {token}"}), 404
+        cells.update(dict.fromkeys(resolved))
+
+    return jsonify(
+        {
+            "slot": ",".join(tokens),
+            "periods": [describe(cell, snapshot) for cell in cells],
+            "rooms": snapshot.room_index.free(cells),
+        }
+    )
+
+
+@app.route("/api/rooms/double-bookings")
+def get_double_bookings():
+    """Every room booked by several courses at once, across the catalogue"""
+    snapshot = g.snapshot
+    return jsonify(
+        {
+            "double_bookings": [
+                dict(describe(cell, snapshot), room=room, courses=codes)
+                for room, cell, codes in snapshot.room_index.double_bookings
+            ]
+        }
+    )
+
+
+@app.route("/api/instructors")
+def get_instructors():
+    """Every instructor listed for a course"""
+    return jsonify({"instructors": g.snapshot.instructor_index.instructors()})
+
+
+@app.route("/api/instructors/<path:name>/timetable")
+def get_instructor_timetable(name):
+    """Courses and weekly timetable of one instructor, like /api/timetable"""
+    snapshot = g.snapshot
+    instructor_index = snapshot.instructor_index
+    key = instructor_index.find(name)
+    if key is None:
+        return jsonify({"error": f"Unknown instructor: {name}"}), 404
+
+    return jsonify(
+        {
+            "instructor": instructor_index.names[key],
+            "courses": [
+                {
+                    "code": code,
+                    "name": snapshot.courses[code].name,
+                    "roles": list(roles),
+                }
+                for code, roles in instructor_index.courses[key]
+            ],
+            "timetable": cells_by_day(instructor_index.cells(key), snapshot.grid),
+        }
+    )
+
+
+@app.route("/api/instructors/clashes")
+def get_instructor_clashes():
+    """Every instructor due in two courses at once, across the faculty"""
+    snapshot = g.snapshot
+    return jsonify(
+        {
+            "clashes": [
+                dict(describe(cell, snapshot), instructor=name, courses=codes)
+                for name, cell, codes in snapshot.instructor_index.clashes
+            ]
+        }
+    )
+
+
+@app.route("/metrics")
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/debug/profiler", methods=["GET", "POST"])
+def profiler_control():
+    """Read or toggle the sampling profiler.
+
+    Only available when the app runs with ``TIMETABLE_PROFILER=1``. POST
+    ``{"enabled": true, "interval": 0.005, "reset": true}`` to start it and
+    ``{"enabled": false}`` to stop it. GET returns the most frequent stacks,
+    or every stack in collapsed flame graph format with ``?format=collapsed``.
+    """
+    if not PROFILER_CONTROL:
+        return jsonify({"error": "Profiler is disabled"}), 404
+
+    if request.method == "POST":
+        json_data = request.get_json(silent=True)
+        if not isinstance(json_data, dict):
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        interval = json_data.get("interval")
+        if interval is not None and (
+            not isinstance(interval, (int, float)) or not 0.001 <= interval <= 1
+        ):
+            return jsonify({"error": "interval must be between 0.001 and 1"}), 400
+
+        if json_data.get("reset"):
+            profiler.reset()
+        if json_data.get("enabled") is True:
+            profiler.start(interval)
+        elif json_data.get("enabled") is False:
+            profiler.stop()
+        return jsonify(profiler.stats())
+
+    if request.args.get("format") == "collapsed":
+        return Response(profiler.collapsed(), mimetype="text/plain")
+
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify(
+        dict(
+            profiler.stats(),
+            top=[
+                {"stack": stack, "count": count} for stack, count in profiler.top(limit)
+            ],
+        )
+    )
+
+
+@app.route("/api/terms")
+def get_terms():
+    """Terms that can be served under /api/<term>/ and those currently loaded"""
+    return jsonify({"terms": terms.available(), "loaded": terms.loaded()})
+
+
+@app.route("/api/stats/cache")
+def get_cache_stats():
+    return jsonify(
+        {
+            "timetable": timetable_cache.stats(),
+            "planner": planner_cache.stats(),
+            "export": export_cache.stats(),
+            "permalink": permalink_cache.stats(),
+            "search": search_cache.stats(),
+        }
+    )
+
+
+@app.route("/api/stats/demand")
+def get_demand_stats():
+    """Most requested slots, courses and course pairs, and the most clashing pairs"""
+    limit = request.args.get("limit", "20")
+    if not limit.isdigit():
+        return jsonify({"error": "limit must be a non-negative integer"}), 400
+    pair = request.args.get("pair")
+    if pair is not None:
+        pair = [code.strip() for code in pair.split(",")]
+        if len(pair) != 2 or not all(pair):
+            return jsonify({"error": "pair must be two comma separated codes"}), 400
+    return jsonify(demand.report(min(int(limit), DEMAND_MAX_LIMIT), pair))
+
+
+def encode_json(data):
+    """Encode like jsonify, usable outside of a request context"""
+    return f"{app.json.dumps(data, separators=(',', ':'))}\n".encode("utf-8")
+
+
+def timetable_body(selected_courses, snapshot):
+    """Encoded /api/timetable body for a selection and whether it was cached"""
+    key = (snapshot.version, normalize_selection(selected_courses, snapshot))
+    body = timetable_cache.get(key)
+    if body is not None:
+        return body, True
+
+    timetable = timetable_by_day(key[1], snapshot)
+    with stage_seconds.time("json_encode"):
+        body = encode_json(timetable)
+    timetable_cache.put(key, body)
+    return body, False
+
+
+def permalink_fragment(selection, snapshot):
+    """Rendered timetable table of a selection, cached per data version"""
+    key = (snapshot.version, selection)
+    body = permalink_cache.get(key)
+    if body is None:
+        rows = timetable_table(timetable_by_day(selection, snapshot))
+        body = render_template("timetable.html", days=DAYS, rows=rows).encode("utf-8")
+        permalink_cache.put(key, body)
+    return body.decode("utf-8")
+
+
+def export_chunks(export_format, selection, semester, snapshot):
+    """Encoded chunks of an export, generated lazily from the course sessions"""
+    if export_format == "ics":
+        courses = [
+            snapshot.courses[code] for code in catalogue_order(selection, snapshot)
+        ]
+        return ics_chunks(
+            courses,
+            snapshot.occupancy,
+            snapshot.grid,
+            *semester,
+            snapshot.version,
+            snapshot.last_modified,
+        )
+
+    rows = timetable_rows(snapshot.grid, occupied_cells(selection, snapshot))
+    return csv_chunks(rows) if export_format == "csv" else xlsx_chunks(rows)
+
+
+def cache_chunks(cache, key, chunks):
+    """Pass ``chunks`` through and cache their concatenation once complete"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.put(key, b"".join(parts))
+
+
+def batch_line(index, selection, snapshot):
+    """One NDJSON line of a batch response"""
+    line = {"index": index}
+    if isinstance(selection, dict):
+        if "id" in selection:
+            line["id"] = selection["id"]
+        selection = selection.get("courses")
+
+    if not isinstance(selection, list) or not selection:
+        line["error"] = "No courses selected"
+        return encode_json(line)
+
+    try:
+        body, _ = timetable_body(selection, snapshot)
+    except Exception as e:
+        line["error"] = f"Failed to generate timetable: {str(e)}"
+        return encode_json(line)
+
+    # Splice the cached body in rather than decoding and re-encoding it
+    head = encode_json(line)[:-2]
+    return b'%s,"timetable":%s}\n' % (head, body.rstrip(b"\n"))
+
+
+def batch_executor():
+    """Thread pool shared by all parallel batch requests, created on first use"""
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=BATCH_WORKERS, thread_name_prefix="batch"
                 )
-                timetable.at[slot, day] = display
-            elif entries:
-                timetable.at[slot, day] = entries[0]
+    return _batch_executor
+
+
+def ordered_map(func, items, executor, window):
+    """Like ``executor.map`` but with at most ``window`` results in flight"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def catalogue_order(selected_courses, snapshot):
+    """Known course codes of a selection, de-duplicated, in catalogue order"""
+    courses = snapshot.courses
+    return sorted(
+        normalize_selection(selected_courses, snapshot),
+        key=lambda code: courses[code].position,
+    )
+
+
+def normalize_selection(selected_courses, snapshot):
+    """Sorted, de-duplicated tuple of the known course codes in a selection"""
+    courses = snapshot.courses
+    return tuple(
+        sorted(
+            {
+                code
+                for code in selected_courses
+                if isinstance(code, str) and code in courses
+            }
+        )
+    )
+
+
+def timetable_by_day(selected_courses, snapshot):
+    """Build the per-day class lists returned by /api/timetable.
+
+    Equivalent to cleaning every cell of ``create_timetable`` with
+    ``clean_course_info``, but uses the cleaned text precomputed for each
+    course session and empty slot, so only clash cells are cleaned here.
+    Filling the grid is timed as the ``create_timetable`` stage and building
+    the day lists as ``clean_course_info``.
+    """
+    start = time.perf_counter()
+    cells = occupied_cells(selected_courses, snapshot)
+    filled = time.perf_counter()
+    stage_seconds.observe(filled - start, "create_timetable")
+
+    result = cells_by_day(cells, snapshot.grid)
+    stage_seconds.observe(time.perf_counter() - filled, "clean_course_info")
+    return result
+
+
+def timetable_delta(selection, code, adding, snapshot):
+    """Changes to the timetable of ``selection`` when ``code`` is toggled.
+
+    Only the cells booked by ``code`` can change. Their new content comes
+    from the courses of the new selection whose masks cover them, and the
+    clashes that appear or go away are those of ``code`` with the rest of
+    the selection.
+    """
+    grid = snapshot.grid
+    occupancy = snapshot.occupancy
+    course_masks = snapshot.course_masks
+    size = grid_size(grid)
+    columns = len(grid.columns)
+
+    others = [other for other in selection if other != code]
+    changed = adding != (code in selection)
+    new_selection = catalogue_order(others + [code], snapshot) if adding else others
+
+    cells = []
+    pairs = []
+    if changed:
+        cell_mask = cells_of(course_masks[code], size)
+        sharing = [
+            other
+            for other in new_selection
+            if cells_of(course_masks[other], size) & cell_mask
+        ]
+        booked = {}
+        for other in sharing:
+            for (row, col), session in occupancy.entries(other):
+                if cell_mask >> cell_bit(row, col, columns) & 1:
+                    booked.setdefault((row, col), []).append(session)
+
+        for row, col in sorted({cell for cell, _ in occupancy.entries(code)}):
+            cells.append(
+                {
+                    "day": grid.columns[col].lower(),
+                    "time": grid.label(row),
+                    "class": clean_cell(
+                        booked.get((row, col)), grid.clean_rows[row][col]
+                    ),
+                }
+            )
+        pairs = course_clashes(code, others, snapshot)
+
+    return {
+        "version": snapshot.version,
+        "courses": new_selection,
+        "token": encode_selection(new_selection, snapshot.courses),
+        "cells": cells,
+        "clashes": {
+            "added": pairs if adding else [],
+            "resolved": [] if adding else pairs,
+        },
+    }
+
+
+def cells_by_day(cells, grid):
+    """Per-day class lists of /api/timetable for the sessions of each grid cell"""
+    days = [(col, day.lower()) for col, day in grid.days]
+    clean_timetable = {day: [] for _, day in days}
+
+    # Process each time slot
+    for idx, row in enumerate(grid.clean_rows):
+        time_slot = grid.label(idx)
+
+        for col, day in days:
+            clean_info = clean_cell(cells.get((idx, col)), row[col])
+            if clean_info:
+                clean_timetable[day].append({"time": time_slot, "class": clean_info})
+
+    # Remove empty days
+    return {day: classes for day, classes in clean_timetable.items() if classes}
+
+
+def occupied_cells(selected_courses, snapshot):
+    """Map each slot grid cell used by the selection to its sessions.
+
+    Every cell maps to a list of ``Session`` records in catalogue order. Only
+    the precomputed cells of the selected courses are visited.
+    """
+    occupancy = snapshot.occupancy
+
+    cells = {}
+    for code in catalogue_order(selected_courses, snapshot):
+        for cell, session in occupancy.entries(code):
+            cells.setdefault(cell, []).append(session)
+    return cells
+
+
+def create_timetable(selected_courses, snapshot=None):
+    """Create timetable data structure.
+
+    Returns a copy of the slot grid (one list per time slot row, aligned with
+    ``grid.columns``) where every cell used by a selected course holds its
+    session text.
+    """
+    if snapshot is None:
+        snapshot = store.snapshot
+
+    with stage_seconds.time("create_timetable"):
+        timetable = [list(row) for row in snapshot.grid.rows]
+        for (row, col), sessions in occupied_cells(selected_courses, snapshot).items():
+            timetable[row][col] = cell_text(sessions)
 
     return timetable
 
 
+# The timetable API of every other term, e.g. /api/2025-II/courses
+term_api = Blueprint("term", __name__, url_prefix="/api/<term>")
+
+
+@term_api.url_value_preprocessor
+def select_term(endpoint, values):
+    """Serve the request from the term's data store"""
+    term = values.pop("term")
+    term_store = terms.get(term)
+    if term_store is None:
+        abort(make_response(jsonify({"error": f"Unknown term: {term}"}), 404))
+    g.store = term_store
+
+
+for rule, view, methods in (
+    ("/courses", get_courses, ["GET"]),
+    ("/courses/search", search_courses, ["GET"]),
+    ("/timetable", get_timetable, ["POST"]),
+    ("/timetable/delta", get_timetable_delta, ["POST"]),
+    ("/timetable/batch", get_timetable_batch, ["POST"]),
+    ("/timetable/export", export_timetable, ["GET", "POST"]),
+    ("/clashes", get_clashes, ["POST"]),
+    ("/planner", get_schedule_plans, ["POST"]),
+    ("/rooms", get_rooms, ["GET"]),
+    ("/rooms/<path:room>/schedule", get_room_schedule, ["GET"]),
+    ("/rooms/free", get_free_rooms, ["GET"]),
+    ("/rooms/double-bookings", get_double_bookings, ["GET"]),
+    ("/instructors", get_instructors, ["GET"]),
+    ("/instructors/<path:name>/timetable", get_instructor_timetable, ["GET"]),
+    ("/instructors/clashes", get_instructor_clashes, ["GET"]),
+):
+    term_api.add_url_rule(rule, view_func=view, methods=methods)
+app.register_blueprint(term_api)
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=False)
@@ -0,0 +1,169 @@
+"""ASGI entry point serving the Flask app from an event loop.
+
+    uvicorn asgi:app
+    gunicorn --config gunicorn.conf.py asgi:app
+
+Connections, slow clients and keep-alive are handled by the event loop;
+each request is handed to the WSGI app on a bounded thread pool of
+``TIMETABLE_ASGI_THREADS`` threads, and streamed bodies (batch timetables,
+exports) are pulled from it one chunk at a time. Routes, caches and headers
+are exactly those of ``app.py``.
+"""
+
+import asyncio
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as wsgi_app
+
+ASGI_THREADS = int(os.environ.get("TIMETABLE_ASGI_THREADS", "16"))
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+_executor = None
+
+
+def executor():
+    # Created on first use, so it is never inherited across a fork
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=ASGI_THREADS, thread_name_prefix="asgi"
+        )
+    return _executor
+
+
+def build_environ(scope, body):
+    """WSGI environ of an ASGI HTTP scope"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def read_body(receive):
+    """Request body, or None when the client went away"""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise BodyTooLarge()
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+def start_wsgi(environ):
+    """Call the WSGI app and pull the first body chunk.
+
+    Returns the status, headers, first chunk (None for an empty body), the
+    remaining chunks and the body iterable itself, to be closed when done.
+    """
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ]
+
+    body = wsgi_app(environ, start_response)
+    chunks = iter(body)
+    first = next_chunk(chunks)
+    return started["status"], started["headers"], first, chunks, body
+
+
+def next_chunk(chunks):
+    for chunk in chunks:
+        if chunk:
+            return chunk
+    return None
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    try:
+        body = await read_body(receive)
+    except BodyTooLarge:
+        await send({"type": "http.response.start", "status": 413, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    if body is None:
+        return
+
+    loop = asyncio.get_running_loop()
+    pool = executor()
+    # Flask keeps the request context of streamed responses in context
+    # variables, so every step of a request runs in the same context even
+    # when it lands on another pool thread
+    context = contextvars.Context()
+
+    def run(func, *args):
+        return loop.run_in_executor(pool, context.run, func, *args)
+
+    status, headers, chunk, chunks, response = await run(
+        start_wsgi, build_environ(scope, body)
+    )
+    try:
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        # Bodies with a known length usually arrive whole in the first chunk
+        length = dict(headers).get(b"content-length")
+        sent = 0
+        while chunk is not None:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            sent += len(chunk)
+            if length is not None and sent >= int(length):
+                break
+            chunk = await run(next_chunk, chunks)
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            await run(close)
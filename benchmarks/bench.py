@@ -0,0 +1,283 @@
+"""Benchmarks for the request hot paths and the data pipeline.
+
+Runs every benchmark against the real CSVs and against synthetic catalogues
+scaled to 10x and 100x the course count, prints a table and writes the
+results as JSON. Given ``--baseline``, exits non-zero when any benchmark is
+slower than the baseline by more than ``--threshold``.
+
+    python benchmarks/bench.py --output bench_results.json
+    python benchmarks/bench.py --baseline bench_results.json --threshold 0.25
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pandas as pd  # noqa: E402
+
+import app as app_module  # noqa: E402
+from course_info import clean_course_info  # noqa: E402
+from datastore import (  # noqa: E402
+    TIME_SLOTS_FILE,
+    TIMETABLE_FILE,
+    build_snapshot,
+    load_snapshot,
+    table_from_frame,
+)
+from demand import DemandRecorder, DemandStats  # noqa: E402
+
+SELECTION_SIZE = 6
+SELECTIONS = 50
+
+
+def load_csv_filter():
+    spec = importlib.util.spec_from_file_location(
+        "csv_filter", os.path.join(ROOT, "csv-filter.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def scale_rows(df, scale):
+    """Repeat every course ``scale`` times under distinct course codes"""
+    if scale == 1:
+        return df
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        copy["Course Code"] = copy["Course Code"].map(
+            lambda code: f"{code}#{i}" if isinstance(code, str) else code
+        )
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def measure(func, min_time=0.05, repeat=7):
+    """Per-call time in microseconds: (best, median) over ``repeat`` runs"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed * 10 > min_time else 10
+
+    runs = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        runs.append((time.perf_counter() - start) / loops)
+    return min(runs) * 1e6, statistics.median(runs) * 1e6, loops
+
+
+def cycle(items):
+    """Callable returning the next item of ``items`` on every call"""
+    state = {"i": 0}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+
+    return next_item
+
+
+def request_benchmarks(scale, time_slots, timetable_data):
+    snapshot = build_snapshot(
+        table_from_frame(time_slots),
+        table_from_frame(scale_rows(timetable_data, scale)),
+        f"bench-{scale}",
+        0,
+    )
+    codes = list(snapshot.courses)
+    rng = random.Random(scale)
+    selection = cycle([rng.sample(codes, SELECTION_SIZE) for _ in range(SELECTIONS)])
+    texts = cycle(
+        [
+            session.text
+            for course in snapshot.courses.values()
+            for session in course.sessions
+        ]
+    )
+    queries = cycle(
+        [course.name[:4] for course in snapshot.courses.values() if course.name]
+        + ["calculas", "lab"]
+    )
+    client = app_module.app.test_client()
+    demand = DemandStats()
+    uncached_clean = clean_course_info.__wrapped__
+
+    def api_timetable(clear_cache):
+        def run():
+            if clear_cache:
+                app_module.timetable_cache.clear()
+            response = client.post("/api/timetable", json={"courses": selection()})
+            assert response.status_code == 200
+
+        return run
+
+    def api_courses():
+        assert client.get("/api/courses").status_code == 200
+
+    benchmarks = {
+        "create_timetable": lambda: app_module.create_timetable(selection(), snapshot),
+        "timetable_by_day": lambda: app_module.timetable_by_day(selection(), snapshot),
+        "timetable_delta": lambda: app_module.timetable_delta(
+            selection()[1:], codes[0], True, snapshot
+        ),
+        "clean_course_info": lambda: clean_course_info(texts()),
+        "clean_course_info_uncached": lambda: uncached_clean(texts()),
+        "api_courses": api_courses,
+        "search_index": lambda: snapshot.search_index.search(queries()),
+        "demand_aggregate": lambda: demand.add(sorted(selection()), snapshot),
+        "api_timetable_uncached": api_timetable(True),
+        "api_timetable_cached": api_timetable(False),
+    }
+
+    original = app_module.store.snapshot, app_module.demand
+    app_module.store.snapshot = snapshot
+    app_module.demand = DemandRecorder("", background=False)
+    try:
+        for name, func in benchmarks.items():
+            yield name, func
+    finally:
+        app_module.store.snapshot, app_module.demand = original
+        app_module.timetable_cache.clear()
+
+
+def pipeline_benchmarks(scale, workdir):
+    csv_filter = load_csv_filter()
+    sheet = os.path.join(workdir, f"Timetable-{scale}.csv")
+    output = os.path.join(workdir, f"Processed-{scale}.csv")
+    scale_rows(pd.read_csv("Timetable.csv"), scale).to_csv(sheet, index=False)
+
+    def process(incremental):
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                csv_filter.process_timetable(sheet, output, incremental)
+
+        return run
+
+    process(False)()
+    yield "csv_filter_full", process(False)
+    yield "csv_filter_incremental_unchanged", process(True)
+
+    # Worker startup, from the snapshot csv-filter just compiled and from CSV
+    missing = os.path.join(workdir, "missing.snapshot")
+    yield "load_snapshot_compiled", lambda: load_snapshot(TIME_SLOTS_FILE, output)
+    yield "load_snapshot_csv", lambda: load_snapshot(TIME_SLOTS_FILE, output, missing)
+
+
+def run_benchmarks(scales, pattern=None):
+    time_slots = pd.read_csv(TIME_SLOTS_FILE)
+    timetable_data = pd.read_csv(TIMETABLE_FILE)
+    app_module.app.config["TESTING"] = True
+    results = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            suites = [
+                request_benchmarks(scale, time_slots, timetable_data),
+                pipeline_benchmarks(scale, workdir),
+            ]
+            for suite in suites:
+                for name, func in suite:
+                    key = f"{name}[x{scale}]"
+                    if pattern and pattern not in key:
+                        continue
+                    # Slow pipeline runs get fewer repeats
+                    repeat = 3 if name.startswith("csv_filter") and scale > 10 else 7
+                    best, median, loops = measure(func, repeat=repeat)
+                    results[key] = {
+                        "best_us": best,
+                        "median_us": median,
+                        "loops": loops,
+                    }
+                    print(
+                        f"{key:<45} {median:>14.1f} us  (best {best:.1f}, {loops} loops)"
+                    )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Names of benchmarks whose best time regressed beyond ``threshold``
+
+    The best of several runs is compared rather than the median, as it is
+    the least affected by other load on the machine.
+    """
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        ratio = result["best_us"] / previous["best_us"]
+        marker = ""
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            marker = "  REGRESSION"
+        print(f"{key:<45} {ratio:>6.2f}x baseline{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the timetable hot paths")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the baseline (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--scales", default="1,10,100", help="Comma separated catalogue scale factors"
+    )
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    results = run_benchmarks(scales, args.filter)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(
+                f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Load test for the HTTP serving setup.
+
+Drives a running server, or starts each ``--server`` command in turn on a
+free port, with a mix of course list, timetable and clash requests from
+many keep-alive connections spread over several processes, then reports
+throughput and latency percentiles per configuration.
+
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000
+    python benchmarks/loadtest.py \\
+        --server "gunicorn --workers 1 --threads 1 --bind 127.0.0.1:{port} app:app" \\
+        --server "gunicorn --bind 127.0.0.1:{port} app:app"
+
+``{port}`` in a server command is replaced by the port to listen on. The
+second example compares a single sync worker with ``gunicorn.conf.py``.
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, weight) of every request type in the mix
+MIX = (("courses", 3), ("timetable", 5), ("clashes", 2))
+SELECTION_SIZES = (4, 7)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(host, port, timeout, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=2)
+            connection.request("GET", "/api/courses")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on {host}:{port} not ready after {timeout}s")
+
+
+def fetch_codes(host, port):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    connection.request("GET", "/api/courses")
+    courses = json.loads(connection.getresponse().read())["courses"]
+    return [course["code"] for course in courses]
+
+
+def make_request(kind, codes, rng):
+    """Method, path and JSON body of one request of the mix"""
+    if kind == "courses":
+        return "GET", "/api/courses", None
+    body = {
+        "courses": rng.sample(codes, min(len(codes), rng.randint(*SELECTION_SIZES)))
+    }
+    path = "/api/timetable" if kind == "timetable" else "/api/clashes"
+    return "POST", path, json.dumps(body).encode("utf-8")
+
+
+def run_client(host, port, codes, connections, duration, seed, results):
+    """One load generator process: ``connections`` keep-alive clients on threads"""
+    kinds = [kind for kind, weight in MIX for _ in range(weight)]
+    latencies = {kind: array("d") for kind, _ in MIX}
+    errors = {kind: 0 for kind, _ in MIX}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        local = {kind: [] for kind, _ in MIX}
+        failed = {kind: 0 for kind, _ in MIX}
+        while time.monotonic() < deadline:
+            kind = rng.choice(kinds)
+            method, path, body = make_request(kind, codes, rng)
+            headers = {"Content-Type": "application/json"} if body else {}
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+            if ok:
+                local[kind].append(time.perf_counter() - start)
+            else:
+                failed[kind] += 1
+        connection.close()
+        with lock:
+            for kind in local:
+                latencies[kind].extend(local[kind])
+                errors[kind] += failed[kind]
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put({kind: (latencies[kind].tobytes(), errors[kind]) for kind, _ in MIX})
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(latencies, errors, duration):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def run_load(host, port, processes, connections, duration, warmup):
+    """Warm the server up, then load it and summarize per request type"""
+    codes = fetch_codes(host, port)
+    context = multiprocessing.get_context("spawn")
+
+    summary = {}
+    for phase, seconds in (("warmup", warmup), ("run", duration)):
+        if seconds <= 0:
+            continue
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=run_client,
+                args=(host, port, codes, connections, seconds, seed, results),
+            )
+            for seed in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        if phase == "warmup":
+            continue
+
+        everything = array("d")
+        total_errors = 0
+        for kind, _ in MIX:
+            values = array("d")
+            errors = 0
+            for result in collected:
+                values.frombytes(result[kind][0])
+                errors += result[kind][1]
+            everything.extend(values)
+            total_errors += errors
+            summary[kind] = summarize(values, errors, seconds)
+        summary["total"] = summarize(everything, total_errors, seconds)
+    return summary
+
+
+def run_server(command, processes, connections, duration, warmup, timeout):
+    port = free_port()
+    process = subprocess.Popen(
+        shlex.split(command.format(port=port)),
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready("127.0.0.1", port, timeout, process)
+        return run_load("127.0.0.1", port, processes, connections, duration, warmup)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_summary(name, summary):
+    print(f"\n{name}")
+    print(
+        f"  {'request':<10} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+    )
+    for kind, row in summary.items():
+        print(
+            f"  {kind:<10} {row['rps']:>9.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p90_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f} "
+            f"{row['errors']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the timetable server")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Load an already running server")
+    target.add_argument(
+        "--server",
+        action="append",
+        help="Server command to start and load ({port} is filled in), repeatable",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help="Load generator processes",
+    )
+    parser.add_argument(
+        "--connections", type=int, default=16, help="Connections per process"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of warmup")
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="Seconds to wait for a server"
+    )
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    if args.url:
+        url = urlsplit(args.url)
+        results[args.url] = run_load(
+            url.hostname,
+            url.port or 80,
+            args.processes,
+            args.connections,
+            args.duration,
+            args.warmup,
+        )
+    else:
+        for command in args.server:
+            results[command] = run_server(
+                command,
+                args.processes,
+                args.connections,
+                args.duration,
+                args.warmup,
+                args.timeout,
+            )
+
+    for name, summary in results.items():
+        print_summary(name, summary)
+
+    if len(results) > 1:
+        names = list(results)
+        base = results[names[0]]["total"]["rps"]
+        print()
+        for name in names[1:]:
+            rps = results[name]["total"]["rps"]
+            print(
+                f"{name}: {rps / base if base else 0:.2f}x the throughput of the first"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results saved to {args.output}")
+
+    if any(summary["total"]["errors"] for summary in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+from itertools import combinations
+
+from slots import FIRST_HALF, SECOND_HALF
+
+
+def cell_bit(row, col, columns):
+    """Bit position of a slot grid cell"""
+    return row * columns + col
+
+
+def grid_size(grid):
+    """Number of cells of the grid, the bit offset of the second half"""
+    return len(grid.rows) * len(grid.columns)
+
+
+def cells_of(mask, size):
+    """Cells of a two-half mask, whichever half they are booked in"""
+    return (mask | mask >> size) & ((1 << size) - 1)
+
+
+def build_course_masks(occupancy, grid):
+    """Precompute every course's occupied slot grid cells as one integer bitmask.
+
+    The low ``grid_size`` bits hold the cells booked in the first half of
+    the semester and the bits above them those booked in the second half,
+    so half-semester courses sharing a slot in different halves do not
+    overlap. Returns ``(course_masks, self_clashes)``: the mask per course
+    code and the mask of cells a course books twice (e.g. lecture and lab in
+    one slot).
+    """
+    columns = len(grid.columns)
+    size = grid_size(grid)
+    course_masks = {}
+    self_clashes = {}
+    for code, entries in occupancy.cells.items():
+        mask = 0
+        repeated = 0
+        session_mask = 0
+        current = None
+        for (row, col), session in entries:
+            if session is not current:
+                repeated |= mask & session_mask
+                mask |= session_mask
+                session_mask = 0
+                current = session
+            bit = cell_bit(row, col, columns)
+            if session.half & FIRST_HALF:
+                session_mask |= 1 << bit
+            if session.half & SECOND_HALF:
+                session_mask |= 1 << (bit + size)
+        repeated |= mask & session_mask
+        mask |= session_mask
+        course_masks[code] = mask
+        if repeated:
+            self_clashes[code] = repeated
+    return course_masks, self_clashes
+
+
+def iter_bits(mask):
+    """Yield the positions of the set bits of ``mask``, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def describe_cell(bit, snapshot):
+    """Slot code, day and time label of a grid cell bit"""
+    grid = snapshot.grid
+    row, col = divmod(bit, len(grid.columns))
+    return {
+        "slot": grid.rows[row][col],
+        "day": grid.columns[col],
+        "time": grid.label(row),
+    }
+
+
+def find_clashes(codes, snapshot):
+    """Find which of the given courses collide, and where.
+
+    ``codes`` must be known course codes in catalogue order. Conflicts are
+    found with one AND per course; only the cells that actually clash are
+    decoded. Returns the clashing cells with every course in them (n-way) and
+    the clashing course pairs with their shared slots.
+    """
+    course_masks = snapshot.course_masks
+    size = grid_size(snapshot.grid)
+    seen = 0
+    clashing = 0
+    for code in codes:
+        mask = course_masks[code]
+        clashing |= seen & mask
+        seen |= mask
+
+    for code in codes:
+        clashing |= snapshot.self_clashes.get(code, 0)
+
+    slots = []
+    for bit in iter_bits(cells_of(clashing, size)):
+        cell = (1 << bit | 1 << (bit + size)) & clashing
+        cell_courses = [code for code in codes if course_masks[code] & cell]
+        slots.append(dict(describe_cell(bit, snapshot), courses=cell_courses))
+
+    pairs = []
+    clashing_codes = [code for code in codes if course_masks[code] & clashing]
+    for first, second in combinations(clashing_codes, 2):
+        shared = course_masks[first] & course_masks[second]
+        if shared:
+            pairs.append(
+                {
+                    "courses": [first, second],
+                    "slots": [
+                        describe_cell(bit, snapshot)["slot"]
+                        for bit in iter_bits(cells_of(shared, size))
+                    ],
+                }
+            )
+
+    return {"clashes": slots, "pairs": pairs}
+
+
+def course_clashes(code, others, snapshot):
+    """Clashing pairs of ``code`` with each of ``others``, in their order.
+
+    Only the masks of the given courses are compared, so the effect of
+    adding or removing one course is known without checking the rest of
+    the selection.
+    """
+    course_masks = snapshot.course_masks
+    size = grid_size(snapshot.grid)
+    pairs = []
+    for other in others:
+        shared = course_masks[code] & course_masks[other]
+        if shared and other != code:
+            first, second = sorted(
+                (code, other), key=lambda c: snapshot.courses[c].position
+            )
+            pairs.append(
+                {
+                    "courses": [first, second],
+                    "slots": [
+                        describe_cell(bit, snapshot)["slot"]
+                        for bit in iter_bits(cells_of(shared, size))
+                    ],
+                }
+            )
+    return pairs
@@ -0,0 +1,52 @@
+import re
+from functools import lru_cache
+
+SLOT_CODE = re.compile(r"^[A-Z]\d+$")
+BRACKETS = re.compile(r"\([^)]*\)")
+COMMAS = re.compile(r",\s*")
+COURSE_CODE = re.compile(r"^[A-Z]{1,4}\d+$")
+FREE_SLOTS = frozenset(["T1", "T2", "T3", "O1", "O2"])
+
+
+@lru_cache(maxsize=8192)
+def clean_course_info(content):
+    """Clean and format course information.
+
+    Cell contents come from a small set of session and clash strings, so
+    results are memoized; the set is further primed per course session when
+    the data is loaded.
+    """
+    if not content:
+        return None
+
+    stripped = content.strip()
+    if stripped in ("", "nan") or stripped in FREE_SLOTS or SLOT_CODE.match(stripped):
+        return None
+
+    # Remove brackets first, then replace commas with single space, then process newlines
+    content = BRACKETS.sub("", content)
+    content = COMMAS.sub(" ", content)
+    content = content.replace("\n", ", ")
+
+    # Filter out course codes (pattern: letters followed by numbers)
+    clean_parts = [
+        part
+        for part in (part.strip() for part in content.split(","))
+        if part and not COURSE_CODE.match(part)
+    ]
+
+    return ", ".join(clean_parts) if clean_parts else None
+
+
+def clash_text(entries):
+    """Cell text shown when several sessions share a slot"""
+    return "/ ".join([e.split("\n")[0].strip() for e in entries]) + "\n(Clash)"
+
+
+def halves_text(entries):
+    """Cell text shown when half-semester sessions share a slot without clashing.
+
+    The marker is not bracketed, so it survives ``clean_course_info`` and
+    /api/timetable can tell these cells from clashes.
+    """
+    return "/ ".join([e.split("\n")[0].strip() for e in entries]) + "\nHalf semester"
@@ -1,47 +1,175 @@
 import pandas as pd
-import re
+import json
+import os
 import argparse
 
-def process_timetable(input_file='Timetable.csv', output_file='Updated_Processed_Timetable.csv'):
-    # Load the uploaded file
+from datastore import compile_snapshot, snapshot_path_for
+
+TIME_COLUMNS = [('Lecture Time', 'Lecture Location'),
+                ('Tutorial Time', 'Tutorial Location'),
+                ('Lab Time', 'Lab Location')]
+
+# Elective categories are passed through for the schedule planner
+ELECTIVE_COLUMNS = ['HSS/BS elective', 'Minor in']
+
+# Sheet column of the teaching staff, kept as "Instructors" for course search
+INSTRUCTOR_COLUMN = 'Name of the Instructors and Tutors'
+
+OUTPUT_COLUMNS = ['Course Name', 'Course Code', 'Lecture Time', 'Tutorial Time', 'Lab Time', 'Credit',
+                  'Lecture Location', 'Tutorial Location', 'Lab Location'] + ELECTIVE_COLUMNS + ['Instructors']
+
+
+def manifest_path(output_file):
+    """Row hashes of the last run are kept next to the processed CSV"""
+    root, _ = os.path.splitext(output_file)
+    return f'{root}.hashes.json'
+
+
+def load_courses(input_file):
+    """Read the raw sheet export and keep one row per real course"""
     df = pd.read_csv(input_file)
 
     df = df[df['Course Code'].str.len() <= 15]
-    column_names = list(df.columns)
-
     df = df.drop_duplicates(subset=['Course Code'], keep='first')
 
-    df = df[['Course Name', 'Course Code', 'Lecture', 'Tutorial', 'Lab', 'C']]
-    df.columns = ['Course Name', 'Course Code', 'Lecture Time', 'Tutorial Time', 'Lab Time', 'Credit']
+    for col in ELECTIVE_COLUMNS + [INSTRUCTOR_COLUMN]:
+        if col not in df.columns:
+            df[col] = pd.NA
+
+    df = df[['Course Name', 'Course Code', 'Lecture', 'Tutorial', 'Lab', 'C'] + ELECTIVE_COLUMNS + [INSTRUCTOR_COLUMN]]
+    df.columns = (['Course Name', 'Course Code', 'Lecture Time', 'Tutorial Time', 'Lab Time', 'Credit']
+                  + ELECTIVE_COLUMNS + ['Instructors'])
+    return df.reset_index(drop=True)
+
+
+def row_hashes(df):
+    """Stable per-course hash of the raw input row"""
+    # Hash values rather than dtypes, so a column that happens to be empty
+    # everywhere (and is read as float) does not mark every row as changed
+    values = df.astype(object).where(df.notna(), None)
+    hashes = pd.util.hash_pandas_object(values, index=False)
+    return dict(zip(df['Course Code'], (f'{h:016x}' for h in hashes)))
+
+
+def split_location(column):
+    """Split "<slots> (<venue>)" cells into slots and venues in one vectorized pass"""
+    if column.dtype.kind in 'biuf':
+        # No text in this column at all (e.g. it is entirely empty)
+        return column, pd.Series('', index=column.index, dtype=object)
+
+    clean = column.str.replace(r'\(.*?\)', '', regex=True).str.strip().fillna(column)
+
+    venues = column.str.extractall(r'\((.*?)\)')[0]
+    venues = venues[venues.str.len() < 30]
+    location = venues.groupby(level=0).agg(', '.join).reindex(column.index, fill_value='')
+    location[column.isna()] = ''
+
+    return clean, location
 
-    def extract_location(text):
-        if not isinstance(text, str):
-            return text, ""
-        
-        locations = re.findall(r'\((.*?)\)', text)
-        location = ", ".join([loc for loc in locations if len(loc) < 30])
-        clean_text = re.sub(r'\(.*?\)', '', text).strip()
-        
-        return clean_text, location
 
-    df['Lecture Location'] = ""
-    df['Tutorial Location'] = ""
-    df['Lab Location'] = ""
+def split_locations(df):
+    df = df.copy()
+    for col, loc_col in TIME_COLUMNS:
+        df[col], df[loc_col] = split_location(df[col])
+    return df[OUTPUT_COLUMNS]
 
-    for col, loc_col in [('Lecture Time', 'Lecture Location'), 
-                         ('Tutorial Time', 'Tutorial Location'), 
-                         ('Lab Time', 'Lab Location')]:
-        df[[col, loc_col]] = pd.DataFrame(df[col].apply(extract_location).tolist(), index=df.index)
+
+def diff_hashes(old_hashes, new_hashes):
+    return {
+        'added': [code for code in new_hashes if code not in old_hashes],
+        'removed': [code for code in old_hashes if code not in new_hashes],
+        'changed': [code for code in new_hashes
+                    if code in old_hashes and old_hashes[code] != new_hashes[code]],
+    }
+
+
+def load_previous(output_file):
+    """Previous processed output and its row hashes, or None if unusable"""
+    try:
+        with open(manifest_path(output_file)) as f:
+            old_hashes = json.load(f)
+        previous = pd.read_csv(output_file)
+    except (OSError, ValueError):
+        return None
+
+    if list(previous.columns) != OUTPUT_COLUMNS:
+        return None
+    return previous, old_hashes
+
+
+def write_snapshot(output_file, time_slots_file):
+    """Compile the served data so app workers can load it without pandas"""
+    if not os.path.exists(time_slots_file):
+        print(f'{time_slots_file} not found, no compiled snapshot written')
+        return
+    path = snapshot_path_for(output_file)
+    version = compile_snapshot(time_slots_file, output_file, path)
+    print(f'Compiled snapshot {version} saved to {path}')
+
+
+def process_timetable(input_file='Timetable.csv', output_file='Updated_Processed_Timetable.csv',
+                      incremental=False, time_slots_file='Time Slots.csv'):
+    """Process the sheet export and report which courses were added, removed or changed.
+
+    In incremental mode only rows whose raw hash differs from the previous run
+    are re-split; unchanged courses are copied from the previous output. The
+    compiled snapshot next to the output is rewritten on every run.
+    """
+    df = load_courses(input_file)
+    hashes = row_hashes(df)
+    previous = load_previous(output_file)
+    report = diff_hashes(previous[1] if previous else {}, hashes)
+
+    if incremental and previous is not None:
+        if not any(report.values()):
+            print(f'No changes, {output_file} is up to date')
+            write_snapshot(output_file, time_slots_file)
+            return report
+
+        previous_df, old_hashes = previous
+        unchanged = df['Course Code'].map(old_hashes).eq(pd.Series(hashes.values(), index=df.index))
+        unchanged &= df['Course Code'].isin(previous_df['Course Code'])
+
+        kept = previous_df[previous_df['Course Code'].isin(df.loc[unchanged, 'Course Code'])]
+        fresh = split_locations(df[~unchanged])
+        print(f'Reprocessed {len(fresh)} of {len(df)} courses')
+
+        df = (pd.concat([kept, fresh]).set_index('Course Code')
+              .loc[df['Course Code']].reset_index()[OUTPUT_COLUMNS])
+    else:
+        df = split_locations(df)
 
     df.reset_index(drop=True, inplace=True)
     df.to_csv(output_file, index=False)
+    with open(manifest_path(output_file), 'w') as f:
+        json.dump(hashes, f, indent=0, sort_keys=True)
+
+    if previous is None:
+        print(f'No previous row hashes for {output_file}, processed all {len(df)} courses')
+    else:
+        for kind, codes in report.items():
+            if codes:
+                print(f'{kind.capitalize()}: {", ".join(codes)}')
     print(f"Processed timetable saved to {output_file}")
+    write_snapshot(output_file, time_slots_file)
+    return report
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Process timetable data')
     parser.add_argument('--input', default='Timetable.csv', help='Input CSV file path')
     parser.add_argument('--output', default='Updated_Processed_Timetable.csv', help='Output CSV file path')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only reprocess courses that changed since the last run')
+    parser.add_argument('--time-slots', default='Time Slots.csv',
+                        help='Time slot grid compiled into the snapshot')
+    parser.add_argument('--term', help='Process the files of terms/<term>/ served under /api/<term>/')
     args = parser.parse_args()
-    
-    process_timetable(args.input, args.output)
 
+    if args.term:
+        # Same file names, inside the term's directory
+        term_dir = os.path.join(os.environ.get('TIMETABLE_TERMS_DIR', 'terms'), args.term)
+        args.input, args.output, args.time_slots = (
+            os.path.join(term_dir, os.path.basename(path)) for path in (args.input, args.output, args.time_slots))
+
+    process_timetable(args.input, args.output, args.incremental, args.time_slots)
@@ -0,0 +1,314 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from clashes import build_course_masks
+from instructors import InstructorIndex
+from model import build_courses, build_elective_groups, build_slot_grid
+from rooms import RoomIndex
+from search import SearchIndex
+from slots import build_occupancy
+from snapshot_file import Table, read_snapshot_file, read_version, write_snapshot_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+TIME_SLOTS_FILE = "Time Slots.csv"
+TIMETABLE_FILE = "Updated_Processed_Timetable.csv"
+
+logger = logging.getLogger(__name__)
+
+# The missing slots last warned about; workers inherit it from the process
+# that preloaded the data, so reloads listing the same rows stay quiet
+_reported_unknown = None
+
+# Everything a request needs, built once per data version and never mutated
+Snapshot = namedtuple(
+    "Snapshot",
+    [
+        "version",
+        "last_modified",
+        "grid",
+        "courses",
+        "occupancy",
+        "course_masks",
+        "self_clashes",
+        "elective_groups",
+        "courses_payload",
+        "search_index",
+        "room_index",
+        "instructor_index",
+    ],
+)
+
+
+def build_courses_payload(courses, grid, last_modified):
+    """Serialize the course catalogue once into pre-encoded response bodies.
+
+    Returns a dict holding the JSON body, its gzip (and brotli, when
+    installed) compressed variants, a strong ETag derived from the body and
+    the ``last_modified`` timestamp of the source data.
+    """
+    # Same settings as Flask's jsonify so clients see identical bytes
+    body = json.dumps(
+        {
+            "courses": [
+                {"code": course.code, "name": course.name, "credits": course.credits}
+                for course in courses.values()
+                if course.credits is not None
+            ],
+            "days": grid.columns if grid.rows else [],
+            "timeLabels": grid.time_labels,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    body = f"{body}\n".encode("utf-8")
+
+    encodings = {"identity": body, "gzip": gzip.compress(body, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body)
+
+    return {
+        "encodings": encodings,
+        "etag": hashlib.sha256(body).hexdigest()[:32],
+        "last_modified": last_modified,
+    }
+
+
+def report_unknown_slots(unknown):
+    """Warn about slots missing from the grid, once per distinct set of them"""
+    global _reported_unknown
+    if not unknown:
+        return
+    summary = "; ".join(
+        f"{code} {', '.join(tokens)}" for code, tokens in unknown.items()
+    )
+    if summary == _reported_unknown:
+        logger.debug("%d courses have slots missing from the slot grid", len(unknown))
+        return
+    _reported_unknown = summary
+    logger.warning("Slots missing from the slot grid: %s", summary)
+
+
+def build_snapshot(time_slots, timetable_data, version, last_modified):
+    """Build the course model and every request-time index from two tables"""
+    grid = build_slot_grid(time_slots)
+    courses = build_courses(timetable_data) if not timetable_data.empty else {}
+    occupancy = build_occupancy(courses, grid)
+    report_unknown_slots(occupancy.unknown)
+    course_masks, self_clashes = build_course_masks(occupancy, grid)
+
+    return Snapshot(
+        version=version,
+        last_modified=last_modified,
+        grid=grid,
+        courses=courses,
+        occupancy=occupancy,
+        course_masks=course_masks,
+        self_clashes=self_clashes,
+        elective_groups=build_elective_groups(courses),
+        courses_payload=build_courses_payload(courses, grid, last_modified),
+        search_index=SearchIndex(courses),
+        room_index=RoomIndex(occupancy, grid),
+        instructor_index=InstructorIndex(courses, occupancy),
+    )
+
+
+def file_stamp(paths):
+    """Cheap change marker for the data files: (mtime, size) per path"""
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def snapshot_path_for(timetable_path):
+    """Compiled snapshot written next to the processed timetable CSV"""
+    return f"{os.path.splitext(timetable_path)[0]}.snapshot"
+
+
+def table_from_frame(frame):
+    """Convert a DataFrame to a Table of plain Python values"""
+    import pandas as pd
+
+    values = frame.astype(object).where(pd.notna(frame), None)
+    return Table(
+        [str(column) for column in frame.columns],
+        values.itertuples(index=False, name=None),
+    )
+
+
+def read_csv_table(data):
+    """Parse CSV bytes into a Table, with the same typing as ``pd.read_csv``"""
+    import pandas as pd
+
+    return table_from_frame(pd.read_csv(io.BytesIO(data)))
+
+
+def read_sources(time_slots_path, timetable_path):
+    """Contents of both CSVs and the data version derived from them"""
+    digest = hashlib.sha256()
+    contents = []
+    for path in (time_slots_path, timetable_path):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest.update(data)
+        contents.append(data)
+    return contents, digest.hexdigest()[:12]
+
+
+def compile_snapshot(
+    time_slots_path=TIME_SLOTS_FILE, timetable_path=TIMETABLE_FILE, snapshot_path=None
+):
+    """Write the compiled snapshot of both CSVs and return its data version"""
+    snapshot_path = snapshot_path or snapshot_path_for(timetable_path)
+    contents, version = read_sources(time_slots_path, timetable_path)
+    tables = {
+        "time_slots": read_csv_table(contents[0]),
+        "timetable": read_csv_table(contents[1]),
+    }
+    write_snapshot_file(snapshot_path, tables, version)
+    return version
+
+
+def load_snapshot(
+    time_slots_path=TIME_SLOTS_FILE, timetable_path=TIMETABLE_FILE, snapshot_path=None
+):
+    """Build a snapshot versioned by the content hash of both CSVs.
+
+    The tables come from the compiled snapshot written by ``csv-filter.py``
+    when it was compiled from the current CSVs, so serving never needs
+    pandas; otherwise the CSVs themselves are parsed.
+    """
+    snapshot_path = snapshot_path or snapshot_path_for(timetable_path)
+    contents, version = read_sources(time_slots_path, timetable_path)
+    paths = [time_slots_path, timetable_path]
+
+    tables = None
+    if os.path.exists(snapshot_path):
+        try:
+            if read_version(snapshot_path) == version:
+                _, tables = read_snapshot_file(snapshot_path)
+                paths.append(snapshot_path)
+            else:
+                logger.info("%s is out of date, reading the CSVs", snapshot_path)
+        except (OSError, ValueError):
+            logger.exception("Failed to read %s, reading the CSVs", snapshot_path)
+            tables = None
+
+    if tables is None:
+        tables = {
+            "time_slots": read_csv_table(contents[0]),
+            "timetable": read_csv_table(contents[1]),
+        }
+
+    last_modified = max(os.path.getmtime(path) for path in paths)
+    return build_snapshot(
+        tables["time_slots"], tables["timetable"], version, last_modified
+    )
+
+
+def empty_snapshot():
+    """Snapshot served when the data files cannot be loaded"""
+    return build_snapshot(Table(), Table(), "empty", time.time())
+
+
+class DataStore:
+    """Serve the current timetable snapshot and hot-swap rebuilt ones.
+
+    ``maybe_reload`` is meant to be called on every request: it stats the
+    data files at most once per ``check_interval`` seconds and, when they
+    changed, rebuilds the snapshot on a background thread. Readers keep using
+    the old snapshot until the new one is complete and assigned in a single
+    step, so nobody observes a half-loaded state. Polling from requests
+    rather than a watcher thread keeps this safe across gunicorn's fork.
+    """
+
+    def __init__(
+        self,
+        time_slots_path=TIME_SLOTS_FILE,
+        timetable_path=TIMETABLE_FILE,
+        check_interval=30.0,
+        snapshot_path=None,
+    ):
+        self.paths = (
+            time_slots_path,
+            timetable_path,
+            snapshot_path or snapshot_path_for(timetable_path),
+        )
+        self.check_interval = check_interval
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._next_check = time.monotonic() + check_interval
+        self._stamp = file_stamp(self.paths)
+
+        try:
+            self.snapshot = load_snapshot(*self.paths)
+        except Exception:
+            logger.exception("Failed to load timetable data")
+            self.snapshot = empty_snapshot()
+
+    def add_listener(self, callback):
+        """Call ``callback(snapshot)`` every time a new snapshot is swapped in"""
+        self.listeners.append(callback)
+
+    def swap(self, snapshot):
+        """Atomically publish ``snapshot`` to all subsequent readers"""
+        self.snapshot = snapshot
+        for callback in self.listeners:
+            callback(snapshot)
+
+    def maybe_reload(self):
+        """Start a background rebuild if the data files changed since last load"""
+        if self.check_interval <= 0 or time.monotonic() < self._next_check:
+            return False
+
+        with self._lock:
+            if self._reloading or time.monotonic() < self._next_check:
+                return False
+            self._next_check = time.monotonic() + self.check_interval
+
+            stamp = file_stamp(self.paths)
+            if stamp == self._stamp:
+                return False
+            self._reloading = True
+
+        threading.Thread(target=self._reload, args=(stamp,), daemon=True).start()
+        return True
+
+    def reload(self):
+        """Rebuild the snapshot synchronously; keeps the old one on failure"""
+        with self._lock:
+            self._reloading = True
+        return self._reload(file_stamp(self.paths))
+
+    def _reload(self, stamp):
+        try:
+            snapshot = load_snapshot(*self.paths)
+        except Exception:
+            logger.exception(
+                "Failed to reload timetable data, keeping %s", self.snapshot.version
+            )
+            return False
+        else:
+            self._stamp = stamp
+            if snapshot.version != self.snapshot.version:
+                self.swap(snapshot)
+            return True
+        finally:
+            self._reloading = False
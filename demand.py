@@ -0,0 +1,376 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import Counter, deque
+from itertools import combinations
+
+from clashes import cells_of, grid_size, iter_bits
+
+try:
+    import fcntl
+except ImportError:  # no file locking on Windows; run a single worker there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Course pairs counted per selection; larger selections only count their
+# first courses, which bounds the work per request
+MAX_PAIR_COURSES = 16
+
+
+class CountMinSketch:
+    """Approximate counts of any number of keys in ``width * depth`` counters.
+
+    Estimates never undercount and overcount by at most ``2 / width`` of
+    the total with probability ``1 - 2 ** -depth``. Sketches of the same
+    shape merge by adding their counters.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = [[0] * width for _ in range(depth)]
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8 * self.depth)
+        hashes = struct.unpack(f"<{self.depth}Q", digest.digest())
+        return [h % self.width for h in hashes]
+
+    def add(self, key, count=1):
+        for row, column in zip(self.table, self._columns(key)):
+            row[column] += count
+
+    def estimate(self, key):
+        return min(row[column] for row, column in zip(self.table, self._columns(key)))
+
+    def merge(self, other):
+        for row, other_row in zip(self.table, other.table):
+            for column, count in enumerate(other_row):
+                if count:
+                    row[column] += count
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "table": self.table}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["width"], data["depth"])
+        sketch.table = [list(row) for row in data["table"]]
+        return sketch
+
+
+class SpaceSaving:
+    """The most frequent keys of a stream, tracked in ``capacity`` counters.
+
+    A new key replaces the least counted one and inherits its count as its
+    ``error``, so ``count - error`` is a guaranteed lower bound. Every key
+    seen more than ``total / capacity`` times is kept. Keys are also
+    grouped by count, so finding the least counted one only looks at the
+    few distinct counts rather than every key.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self._buckets = {}
+
+    def _move(self, key, old, new):
+        if old is not None:
+            bucket = self._buckets[old]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[old]
+        if new is not None:
+            self._buckets.setdefault(new, set()).add(key)
+
+    def add(self, key, count=1):
+        counts = self.counts
+        if key in counts:
+            old = counts[key]
+            counts[key] = old + count
+        elif len(counts) < self.capacity:
+            old = None
+            counts[key] = count
+            self.errors[key] = 0
+        else:
+            old = None
+            floor = min(self._buckets)
+            smallest = next(iter(self._buckets[floor]))
+            self._move(smallest, floor, None)
+            del counts[smallest], self.errors[smallest]
+            counts[key] = floor + count
+            self.errors[key] = floor
+        self._move(key, old, counts[key])
+
+    def merge(self, other):
+        """Add another summary's counts, keeping the ``capacity`` largest"""
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+            self.errors[key] = self.errors.get(key, 0) + other.errors[key]
+        excess = len(self.counts) - self.capacity
+        if excess > 0:
+            for key in sorted(self.counts, key=self.counts.get)[:excess]:
+                del self.counts[key], self.errors[key]
+        self._rebuild()
+
+    def _rebuild(self):
+        self._buckets = {}
+        for key, count in self.counts.items():
+            self._buckets.setdefault(count, set()).add(key)
+
+    def top(self, limit):
+        """``(key, count, error)`` of the most counted keys, largest first"""
+        keys = sorted(self.counts, key=lambda key: (-self.counts[key], key))
+        return [(key, self.counts[key], self.errors[key]) for key in keys[:limit]]
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "counts": self.counts, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data["capacity"])
+        summary.counts = dict(data["counts"])
+        summary.errors = dict(data["errors"])
+        summary._rebuild()
+        return summary
+
+
+class DemandStats:
+    """Counters of the selections timetables were generated for.
+
+    Exact counts per slot and per course (both bounded by the catalogue),
+    a space-saving summary of the most requested and most clashing course
+    pairs and a count-min sketch estimating any pair. Everything is
+    additive, so per-process stats merge into one total.
+    """
+
+    def __init__(self, pair_capacity=256, sketch_width=2048, sketch_depth=4):
+        self.requests = 0
+        self.clash_requests = 0
+        self.slots = Counter()
+        self.courses = Counter()
+        self.pairs = SpaceSaving(pair_capacity)
+        self.clash_pairs = SpaceSaving(pair_capacity)
+        self.pair_sketch = CountMinSketch(sketch_width, sketch_depth)
+
+    def add(self, codes, snapshot):
+        """Count one selection of known course codes, sorted"""
+        grid = snapshot.grid
+        masks = snapshot.course_masks
+        columns = len(grid.columns)
+        self.requests += 1
+        self.courses.update(codes)
+
+        seen = 0
+        clashing = 0
+        for code in codes:
+            clashing |= seen & masks[code]
+            seen |= masks[code]
+        for bit in iter_bits(cells_of(seen, grid_size(grid))):
+            self.slots[grid.rows[bit // columns][bit % columns]] += 1
+
+        if clashing:
+            self.clash_requests += 1
+        for first, second in combinations(codes[:MAX_PAIR_COURSES], 2):
+            pair = f"{first} + {second}"
+            self.pairs.add(pair)
+            self.pair_sketch.add(pair)
+            if clashing and masks[first] & masks[second]:
+                self.clash_pairs.add(pair)
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.clash_requests += other.clash_requests
+        self.slots.update(other.slots)
+        self.courses.update(other.courses)
+        self.pairs.merge(other.pairs)
+        self.clash_pairs.merge(other.clash_pairs)
+        self.pair_sketch.merge(other.pair_sketch)
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "clash_requests": self.clash_requests,
+            "slots": dict(self.slots),
+            "courses": dict(self.courses),
+            "pairs": self.pairs.to_dict(),
+            "clash_pairs": self.clash_pairs.to_dict(),
+            "pair_sketch": self.pair_sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.requests = data["requests"]
+        stats.clash_requests = data["clash_requests"]
+        stats.slots = Counter(data["slots"])
+        stats.courses = Counter(data["courses"])
+        stats.pairs = SpaceSaving.from_dict(data["pairs"])
+        stats.clash_pairs = SpaceSaving.from_dict(data["clash_pairs"])
+        stats.pair_sketch = CountMinSketch.from_dict(data["pair_sketch"])
+        return stats
+
+
+def pair_entries(summary, limit):
+    return [
+        {"courses": key.split(" + "), "count": count, "error": error}
+        for key, count, error in summary.top(limit)
+    ]
+
+
+class DemandRecorder:
+    """Aggregates timetable requests in the background and flushes them to ``path``.
+
+    ``record`` only appends to a bounded queue (the oldest entries are
+    dropped when requests outpace the aggregator), so requests pay next to
+    nothing. A daemon thread, started on the first record in each process,
+    folds the queue into ``DemandStats`` every ``drain_interval`` seconds
+    and adds them to the totals in ``path`` every ``flush_interval``
+    seconds. The file is locked while it is read or updated, so every worker
+    process adds to the same totals. An empty ``path`` keeps the stats in
+    memory only.
+    """
+
+    def __init__(
+        self,
+        path,
+        flush_interval=60.0,
+        drain_interval=1.0,
+        max_pending=10000,
+        background=True,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.drain_interval = drain_interval
+        self.background = background
+        self.dropped = 0
+        self._queue = deque(maxlen=max_pending)
+        self._pending = DemandStats()
+        self._totals = DemandStats()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def record(self, selection, snapshot):
+        """Queue a requested selection for counting"""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append((selection, snapshot))
+        if self.background and self._pid != os.getpid():
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Forked workers inherit the parent's queue but not its thread
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run, name="demand-recorder", daemon=True
+            ).start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(self.drain_interval)
+            try:
+                self.drain()
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    last_flush = time.monotonic()
+                    self.flush()
+            except Exception:
+                logger.exception("Failed to aggregate timetable demand")
+
+    def drain(self):
+        """Fold the queued selections into the pending stats"""
+        with self._lock:
+            while self._queue:
+                selection, snapshot = self._queue.popleft()
+                codes = sorted(
+                    {code for code in selection if isinstance(code, str)}
+                    & snapshot.courses.keys()
+                )
+                if codes:
+                    self._pending.add(codes, snapshot)
+
+    def flush(self):
+        """Add the pending stats to the totals in the file"""
+        self.drain()
+        with self._lock:
+            pending, self._pending = self._pending, DemandStats()
+            if not self.path:
+                self._totals.merge(pending)
+                return
+            try:
+                self._update_file(pending)
+            except (OSError, ValueError, KeyError):
+                logger.exception("Failed to write demand stats to %s", self.path)
+                self._pending.merge(pending)
+
+    def _update_file(self, pending):
+        with open(self.path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            content = f.read()
+            totals = DemandStats.from_dict(json.loads(content)) if content else None
+            if totals is None:
+                totals = DemandStats()
+            totals.merge(pending)
+            f.seek(0)
+            f.truncate()
+            json.dump(totals.to_dict(), f, separators=(",", ":"))
+            f.flush()
+
+    def totals(self):
+        """Everything counted so far, in every process that shares the file"""
+        self.drain()
+        totals = DemandStats()
+        if self.path:
+            try:
+                with open(self.path) as f:
+                    # Writers truncate the file before rewriting it under LOCK_EX
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_SH)
+                    totals = DemandStats.from_dict(json.load(f))
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError):
+                logger.exception("Failed to read demand stats from %s", self.path)
+        with self._lock:
+            totals.merge(self._totals)
+            totals.merge(self._pending)
+        return totals
+
+    def report(self, limit=20, pair=None):
+        """JSON-ready summary of the totals, top ``limit`` entries of each"""
+        totals = self.totals()
+        report = {
+            "requests": totals.requests,
+            "clash_requests": totals.clash_requests,
+            "clash_rate": (
+                totals.clash_requests / totals.requests if totals.requests else 0.0
+            ),
+            "slots": [
+                {"slot": slot, "count": count}
+                for slot, count in totals.slots.most_common(limit)
+            ],
+            "courses": [
+                {"code": code, "count": count}
+                for code, count in totals.courses.most_common(limit)
+            ],
+            "pairs": pair_entries(totals.pairs, limit),
+            "clash_pairs": pair_entries(totals.clash_pairs, limit),
+            "dropped": self.dropped,
+        }
+        if pair is not None:
+            pair = sorted(pair)
+            report["pair"] = {
+                "courses": list(pair),
+                "estimate": totals.pair_sketch.estimate(" + ".join(pair)),
+            }
+        return report
@@ -0,0 +1,250 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+from course_info import clean_course_info
+from model import cell_text
+from slots import FIRST_HALF, FULL_SEMESTER
+
+FORMATS = {
+    "csv": "text/csv",
+    "ics": "text/calendar",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+
+def clean_cell(sessions, empty_text):
+    """Text /api/timetable shows for a cell holding ``sessions``"""
+    if not sessions:
+        return empty_text
+    if len(sessions) == 1:
+        return sessions[0].clean_text
+    return clean_course_info(cell_text(sessions))
+
+
+def timetable_rows(grid, cells):
+    """Yield the rows of a downloaded timetable.
+
+    A header of the day names, then one row per time slot with the same
+    cleaned cell text as /api/timetable. Like the page, time slots without
+    any class are left out.
+    """
+    days = grid.days
+    yield ["Time"] + [day for _, day in days]
+    for idx, clean_row in enumerate(grid.clean_rows):
+        row = [
+            clean_cell(cells.get((idx, col)), clean_row[col]) or "" for col, _ in days
+        ]
+        if any(row):
+            yield [grid.label(idx)] + row
+
+
+def csv_chunks(rows):
+    """Encode rows as CSV, one chunk per row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def column_name(index):
+    """Spreadsheet column letters of a zero based column index"""
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Timetable" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def xlsx_chunks(rows):
+    """Encode rows as a single sheet XLSX workbook of inline strings.
+
+    The workbook is zipped in memory, so it is produced as one chunk; the
+    zip entries carry a fixed date so equal timetables give equal files.
+    """
+    sheet = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        "<sheetData>"
+    ]
+    for number, row in enumerate(rows, 1):
+        sheet.append(f'<row r="{number}">')
+        for col, value in enumerate(row):
+            if value:
+                sheet.append(
+                    f'<c r="{column_name(col)}{number}" t="inlineStr">'
+                    f"<is><t>{escape(value)}</t></is></c>"
+                )
+        sheet.append("</row>")
+    sheet.append("</sheetData></worksheet>")
+
+    parts = dict(XLSX_PARTS, **{"xl/worksheets/sheet1.xml": "".join(sheet)})
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in parts.items():
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, content)
+    yield buffer.getvalue()
+
+
+def ics_escape(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def ics_line(line):
+    """Fold a content line into CRLF terminated lines of at most 75 octets"""
+    data = line.encode("utf-8")
+    folded = []
+    while len(data) > 75:
+        cut = 75 if not folded else 74
+        # Never split a multi-byte character
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        folded.append(data[:cut])
+        data = data[cut:]
+    folded.append(data)
+    return b"\r\n ".join(folded) + b"\r\n"
+
+
+def session_times(grid, row, col, start, end):
+    """First start and end datetime of a weekly cell within the semester"""
+    period = grid.periods[row] if row < len(grid.periods) else None
+    day = grid.columns[col].strip().lower()
+    if period is None or day not in WEEKDAYS:
+        return None
+
+    first = start + timedelta(days=(WEEKDAYS.index(day) - start.weekday()) % 7)
+    if first > end:
+        return None
+
+    midnight = datetime(first.year, first.month, first.day)
+    return (
+        midnight + timedelta(minutes=period[0]),
+        midnight + timedelta(minutes=period[1]),
+    )
+
+
+def default_semester(today):
+    """Approximate dates of the semester around ``today``.
+
+    The winter semester is taken to run from January to April and the
+    monsoon semester from August to November.
+    """
+    if today.month <= 6:
+        return date(today.year, 1, 1), date(today.year, 4, 30)
+    return date(today.year, 8, 1), date(today.year, 11, 30)
+
+
+def semester_window(half, start, end):
+    """Dates between which a session running in ``half`` of the semester meets"""
+    if half == FULL_SEMESTER:
+        return start, end
+    middle = start + timedelta(days=(end - start).days // 2)
+    if half == FIRST_HALF:
+        return start, middle
+    return middle + timedelta(days=1), end
+
+
+def ics_chunks(courses, occupancy, grid, start, end, version, stamp):
+    """Encode the weekly sessions of ``courses`` as an iCalendar feed.
+
+    Every grid cell of a session becomes one event repeating weekly from
+    its first occurrence on or after ``start`` until ``end``; sessions of
+    half-semester courses only repeat during their half. Times are
+    floating, i.e. in the local time of whoever imports the file.
+    """
+    dtstamp = datetime.fromtimestamp(stamp, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield b"".join(
+        ics_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//Timetable//Course timetable export//EN",
+            "CALSCALE:GREGORIAN",
+            "X-WR-CALNAME:Timetable",
+        )
+    )
+
+    for course in courses:
+        for (row, col), session in occupancy.entries(course.code):
+            first, last = semester_window(session.half, start, end)
+            times = session_times(grid, row, col, first, last)
+            if times is None:
+                continue
+            lines = [
+                "BEGIN:VEVENT",
+                f"UID:{version}-{course.position}-{session.kind}-{row}-{col}"
+                "@timetable",
+                f"DTSTAMP:{dtstamp}",
+                f"DTSTART:{times[0]:%Y%m%dT%H%M%S}",
+                f"DTEND:{times[1]:%Y%m%dT%H%M%S}",
+                f"RRULE:FREQ=WEEKLY;UNTIL={last:%Y%m%dT235959}",
+                f"SUMMARY:{ics_escape(f'{course.code} {session.kind}')}",
+            ]
+            if course.name:
+                lines.append(f"DESCRIPTION:{ics_escape(course.name)}")
+            if session.location:
+                lines.append(f"LOCATION:{ics_escape(session.location)}")
+            lines.append("END:VEVENT")
+            yield b"".join(ics_line(line) for line in lines)
+
+    yield ics_line("END:VCALENDAR")
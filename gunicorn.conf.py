@@ -0,0 +1,64 @@
+"""Gunicorn settings for serving the timetable app.
+
+Loaded automatically by ``gunicorn app:app`` from the working directory.
+Every setting can be overridden on the command line or through the
+environment:
+
+- ``WEB_CONCURRENCY``: worker processes, default ``2 * CPUs + 1`` capped at 12
+- ``GUNICORN_THREADS``: threads per worker, default 4 (``gthread`` workers)
+- ``GUNICORN_TIMEOUT``: seconds before a silent worker is restarted
+- ``GUNICORN_MAX_REQUESTS``: recycle workers after this many requests (0 = never)
+
+The app is imported once in the master (``preload_app``) so the timetable
+snapshot and its indexes, loaded before the fork, are shared copy-on-write
+by all workers instead of being built once per worker. Data reloaded later
+is built by each worker itself. Caches, metrics and slot demand counts
+stay per worker, unless ``TIMETABLE_DEMAND_FILE`` is set.
+
+``gunicorn asgi:app`` serves the ASGI entry point from uvicorn workers
+instead (``pip install -r requirements-asgi.txt``).
+"""
+
+import gc
+import multiprocessing
+import os
+
+from gunicorn.config import Config
+
+cpus = multiprocessing.cpu_count()
+
+workers = int(os.environ.get("WEB_CONCURRENCY", str(min(2 * cpus + 1, 12))))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# The app URI given on the command line; this file is read before gunicorn
+# has parsed it, so parse it the same way
+app_uri = next(iter(Config().parser().parse_known_args()[0].args), None)
+
+if app_uri == "asgi:app":
+    # Each uvicorn worker runs an event loop; Flask runs in its thread pool
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+if "GUNICORN_BIND" in os.environ:
+    bind = os.environ["GUNICORN_BIND"]
+
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 20
+keepalive = 5
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+
+
+def pre_fork(server, worker):
+    # Move the preloaded snapshot out of the collector's view, so collections
+    # in the workers do not touch (and un-share) its pages
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    # Add the demand counted since the last periodic flush to the shared file
+    from app import demand
+
+    demand.flush()
@@ -0,0 +1,52 @@
+from slots import Booking, name_key, overlaps
+
+
+class InstructorIndex:
+    """Inverted index from instructors to the courses and sessions they teach.
+
+    Built once per snapshot from the parsed instructor column. ``names``
+    maps every instructor key to the name it was first listed under,
+    ``courses`` each key to its ``(code, roles)`` postings in catalogue
+    order and ``schedules`` each key to the bookings of the sessions they
+    take per ``(row, column)`` cell; sessions of roles they do not have
+    (e.g. the lectures of a course they only tutor) are left out.
+    ``clashes`` lists, for the whole faculty, every cell where an
+    instructor is due in two courses in the same half of the semester.
+    """
+
+    __slots__ = ("names", "courses", "schedules", "clashes")
+
+    def __init__(self, courses, occupancy):
+        self.names = {}
+        self.courses = {}
+        self.schedules = {}
+        for code, course in courses.items():
+            for instructor in course.instructors:
+                key = name_key(instructor.name)
+                self.names.setdefault(key, instructor.name)
+                self.courses.setdefault(key, []).append((code, instructor.roles))
+                schedule = self.schedules.setdefault(key, {})
+                for cell, session in occupancy.entries(code):
+                    if instructor.teaches(session):
+                        schedule.setdefault(cell, []).append(Booking(code, session))
+
+        self.clashes = overlaps(self.names, self.schedules)
+
+    def __len__(self):
+        return len(self.names)
+
+    def instructors(self):
+        """Every instructor name, sorted"""
+        return sorted(self.names.values(), key=name_key)
+
+    def find(self, name):
+        """Key of an instructor given by name, None when nobody is listed so"""
+        key = name_key(name)
+        return key if key in self.names else None
+
+    def cells(self, key):
+        """Sessions the instructor takes, per grid cell"""
+        return {
+            cell: [booking.session for booking in bookings]
+            for cell, bookings in self.schedules.get(key, {}).items()
+        }
@@ -0,0 +1,166 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Whole requests, in seconds
+REQUEST_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+# Individual steps of a request, which usually take microseconds
+STAGE_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_sample(name, labels, value):
+    """One line of the Prometheus text exposition format"""
+    if labels:
+        pairs = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+        name = f"{name}{{{pairs}}}"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{name} {value}"
+
+
+class Histogram:
+    """Thread-safe histogram with one series per combination of label values"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = True
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not self.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then the sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def collect(self):
+        """Exposition lines for every series, buckets cumulative"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+
+        for label_values, values in series:
+            labels = dict(zip(self.labelnames, label_values))
+            count = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), values[:-1]):
+                count += bucket
+                lines.append(
+                    format_sample(f"{self.name}_bucket", dict(labels, le=bound), count)
+                )
+            lines.append(format_sample(f"{self.name}_sum", labels, values[-1]))
+            lines.append(format_sample(f"{self.name}_count", labels, count))
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """Histograms plus callbacks that report gauges and counters on scrape.
+
+    A collector is called on every scrape and returns
+    ``(name, type, documentation, [(labels, value), ...])`` tuples, so values
+    that already live elsewhere (cache counters, the data version) are read
+    when needed instead of being mirrored on every change.
+    """
+
+    def __init__(self, enabled=True):
+        self._histograms = []
+        self._collectors = []
+        self._enabled = enabled
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = bool(value)
+        for histogram in self._histograms:
+            histogram.enabled = self._enabled
+
+    def histogram(self, name, documentation, labelnames=(), buckets=REQUEST_BUCKETS):
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        histogram.enabled = self._enabled
+        self._histograms.append(histogram)
+        return histogram
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.collect())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(
+                    format_sample(name, labels, value) for labels, value in samples
+                )
+        return "\n".join(lines) + "\n"
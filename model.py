@@ -0,0 +1,216 @@
+import re
+from collections import namedtuple
+
+from course_info import clash_text, clean_course_info, halves_text
+from slots import name_key, period_minutes, semester_half, split_slots
+
+SESSION_TYPES = ("Lecture", "Tutorial", "Lab")
+ELECTIVE_COLUMNS = ("HSS/BS elective", "Minor in")
+# "Name (I+T), Other Name(L)": names separated by commas or new lines, each
+# followed by its roles (Instructor, Tutor, Lab)
+INSTRUCTOR = re.compile(r"\s*([^,\n(]*[^,\n(\s])\s*(?:\(([^)]*)\))?")
+ROLE_SESSIONS = {"I": "Lecture", "T": "Tutorial", "L": "Lab"}
+# "A, B and C" leaves "and C" as the last name; placeholders are nobody
+LEADING_AND = re.compile(r"^and\s+", re.IGNORECASE)
+NOT_INSTRUCTORS = frozenset(["tba", "tbd", "to be announced", "na", "n/a", "staff"])
+
+
+class Session(
+    namedtuple("Session", ["kind", "slots", "location", "text", "clean_text", "half"])
+):
+    """One weekly session type of a course.
+
+    ``slots`` are the de-duplicated slot tokens (see ``slots.py``), ``text``
+    the cell text shown in a timetable, ``clean_text`` its cleaned form from
+    /api/timetable and ``half`` the halves of the semester it runs in.
+    """
+
+    __slots__ = ()
+
+
+class Course(
+    namedtuple(
+        "Course",
+        ["code", "name", "credits", "position", "sessions", "groups", "instructors"],
+    )
+):
+    """A catalogue course.
+
+    ``credits`` is None when unknown, ``position`` is the catalogue order used
+    to order clashing entries, ``groups`` are the elective categories the
+    course counts towards and ``instructors`` its teaching staff.
+    """
+
+    __slots__ = ()
+
+
+class Instructor(namedtuple("Instructor", ["name", "roles"])):
+    """A member of a course's teaching staff.
+
+    ``roles`` are the session kinds they take ("Lecture" for instructors,
+    "Tutorial" for tutors, "Lab"); empty when the sheet gives none.
+    """
+
+    __slots__ = ()
+
+    def teaches(self, session):
+        return not self.roles or session.kind in self.roles
+
+
+class SlotGrid(
+    namedtuple(
+        "SlotGrid",
+        ["columns", "time_labels", "rows", "clean_rows", "index", "periods"],
+    )
+):
+    """The weekly grid of slot codes.
+
+    ``rows`` holds the slot code of every cell (one tuple per time slot,
+    aligned with ``columns``), ``clean_rows`` what /api/timetable shows for
+    an empty cell and ``index`` the ``(row, column)`` cells of each slot code;
+    a cell listing several codes is indexed under each. ``periods`` holds the
+    ``(start, end)`` minutes of every time slot, None when its label is not a
+    time range.
+    """
+
+    __slots__ = ()
+
+    @property
+    def days(self):
+        """``(column, day)`` of every day column"""
+        return [
+            (col, day) for col, day in enumerate(self.columns) if day != "Time Slot"
+        ]
+
+    def label(self, row):
+        labels = self.time_labels
+        return labels[row] if row < len(labels) else f"Slot {row + 1}"
+
+    def cells(self, slot):
+        return self.index.get(slot, ())
+
+
+def cell_text(sessions):
+    """Timetable text of a cell booked by one or more sessions.
+
+    Sessions sharing a cell only clash when they run in the same half of
+    the semester.
+    """
+    if len(sessions) == 1:
+        return sessions[0].text
+    booked = 0
+    for session in sessions:
+        if booked & session.half:
+            return clash_text([s.text for s in sessions])
+        booked |= session.half
+    return halves_text([s.text for s in sessions])
+
+
+def text(value):
+    """Cell value as a string, empty when missing"""
+    return "" if value is None else str(value)
+
+
+def build_slot_grid(time_slots):
+    """Build the slot grid from the time slot table"""
+    rows = tuple(tuple(text(value) for value in row) for row in time_slots.rows)
+    index = {}
+    for row, values in enumerate(rows):
+        for col, value in enumerate(values):
+            if col == 0:
+                continue
+            for code in split_slots(value):
+                index.setdefault(code, []).append((row, col))
+
+    time_labels = tuple(values[0] for values in rows) if time_slots.columns else ()
+    return SlotGrid(
+        columns=tuple(time_slots.columns),
+        time_labels=time_labels,
+        rows=rows,
+        clean_rows=tuple(
+            tuple(clean_course_info(value) for value in values) for values in rows
+        ),
+        index={slot: tuple(cells) for slot, cells in index.items()},
+        periods=tuple(period_minutes(label) for label in time_labels),
+    )
+
+
+def parse_instructors(value):
+    """Staff listed in an instructor cell, roles of a repeated name merged"""
+    if not isinstance(value, str):
+        return ()
+    staff = {}
+    for match in INSTRUCTOR.finditer(value):
+        name = LEADING_AND.sub("", match[1])
+        if name_key(name) in NOT_INSTRUCTORS:
+            continue
+        roles = staff.setdefault(name, {})
+        for role in (match[2] or "").upper().split("+"):
+            if role.strip() in ROLE_SESSIONS:
+                roles[ROLE_SESSIONS[role.strip()]] = None
+    return tuple(
+        Instructor(name, tuple(kind for kind in SESSION_TYPES if kind in roles))
+        for name, roles in staff.items()
+    )
+
+
+def build_sessions(code, name, record):
+    sessions = []
+    half = semester_half(name)
+    for kind in SESSION_TYPES:
+        slots = split_slots(record.get(f"{kind} Time"))
+        if not slots:
+            continue
+
+        location = text(record.get(f"{kind} Location"))
+        cell_text = f"{code}\n{name}\n{kind}" + (f"\n{location}" if location else "")
+        sessions.append(
+            Session(
+                kind, slots, location, cell_text, clean_course_info(cell_text), half
+            )
+        )
+    return tuple(sessions)
+
+
+def build_courses(timetable_data):
+    """Build every course of the processed timetable table, keyed by code.
+
+    Categories come from the "HSS/BS elective" and "Minor in" columns, whose
+    cells may list several comma separated categories. A code listed twice
+    keeps its first position and the sessions and credits of its last row.
+    """
+    courses = {}
+    for record in timetable_data.records():
+        code = record["Course Code"]
+        name = text(record["Course Name"])
+        credits = record.get("Credit")
+
+        groups = {}
+        for column in ELECTIVE_COLUMNS:
+            value = record.get(column)
+            if isinstance(value, str):
+                groups.update(dict.fromkeys(g.strip() for g in value.split(",")))
+        groups.pop("", None)
+
+        previous = courses.get(code)
+        if previous is not None:
+            groups = {**dict.fromkeys(previous.groups), **groups}
+        courses[code] = Course(
+            code=code,
+            name=name,
+            credits=None if credits is None else float(credits),
+            position=previous.position if previous else len(courses),
+            sessions=build_sessions(code, name, record),
+            groups=tuple(groups),
+            instructors=parse_instructors(record.get("Instructors")),
+        )
+    return courses
+
+
+def build_elective_groups(courses):
+    """Course codes per elective category, in catalogue order"""
+    groups = {}
+    for course in courses.values():
+        for group in course.groups:
+            groups.setdefault(group, []).append(course.code)
+    return groups
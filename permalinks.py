@@ -0,0 +1,122 @@
+import base64
+import binascii
+import hashlib
+import re
+
+# Longest token accepted, enough for a catalogue of 6000 courses
+MAX_TOKEN_LENGTH = 1000
+TOKEN = re.compile(r"^[A-Za-z0-9_-]*$")
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+CELL_CLASSES = ("course-code", "course-name", "course-type", "course-location")
+# Tokens start with this many bytes of a hash of the catalogue they index
+FINGERPRINT_BYTES = 3
+
+_fingerprint = (None, b"")
+
+
+class StaleLinkError(ValueError):
+    """A link token made for a different catalogue than the one served"""
+
+
+def catalogue_fingerprint(courses):
+    """Short hash of the course codes in catalogue order.
+
+    Remembered for the last catalogue seen, which is the one served.
+    """
+    global _fingerprint
+    cached, fingerprint = _fingerprint
+    if cached is not courses:
+        digest = hashlib.blake2b(
+            "\n".join(courses).encode("utf-8"), digest_size=FINGERPRINT_BYTES
+        )
+        fingerprint = digest.digest()
+        _fingerprint = (courses, fingerprint)
+    return fingerprint
+
+
+def encode_selection(selection, courses):
+    """Encode course codes as a base64url bitmap over the catalogue.
+
+    The catalogue fingerprint comes first, then bit ``n`` (least significant
+    first within each byte) is set when the course at catalogue position
+    ``n`` is selected. Trailing zero bytes and the base64 padding are
+    dropped, so a handful of courses takes a few characters after the four
+    of the fingerprint. Unknown codes are ignored, and an empty selection
+    is the empty token.
+    """
+    positions = [courses[code].position for code in selection if code in courses]
+    if not positions:
+        return ""
+    bitmap = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        bitmap[position // 8] |= 1 << (position % 8)
+    token = base64.urlsafe_b64encode(catalogue_fingerprint(courses) + bitmap)
+    return token.rstrip(b"=").decode("ascii")
+
+
+def decode_selection(token, courses):
+    """Course codes of a permalink token, in catalogue order.
+
+    Raises ValueError for anything that is not a base64url token, and
+    StaleLinkError when the token was made for a different catalogue (e.g.
+    before the course list was updated), whose positions would decode to
+    other courses.
+    """
+    if len(token) > MAX_TOKEN_LENGTH or not TOKEN.match(token):
+        raise ValueError("Invalid timetable link")
+    if not token:
+        return []
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid timetable link") from None
+    if len(data) <= FINGERPRINT_BYTES:
+        raise ValueError("Invalid timetable link")
+    if data[:FINGERPRINT_BYTES] != catalogue_fingerprint(courses):
+        raise StaleLinkError("This timetable link was made for a different course list")
+    bitmap = data[FINGERPRINT_BYTES:]
+
+    codes = list(courses)
+    return [
+        codes[index * 8 + bit]
+        for index, byte in enumerate(bitmap)
+        for bit in range(8)
+        if byte >> bit & 1 and index * 8 + bit < len(codes)
+    ]
+
+
+def slot_hour(label):
+    try:
+        return int(label.split(":")[0])
+    except ValueError:
+        return 0
+
+
+def timetable_table(timetable):
+    """Rows of the rendered timetable from the /api/timetable day lists.
+
+    Mirrors ``renderTimetable`` in timetable.js: one row per time slot in
+    use, ordered by starting hour, with the cell text of each weekday split
+    into its parts.
+    """
+    # The page sees the days in the sorted key order of the JSON body
+    times = {}
+    for day in sorted(timetable):
+        for entry in timetable[day]:
+            times.setdefault(entry["time"], {}).setdefault(day, entry["class"])
+
+    rows = []
+    for label in sorted(times, key=slot_hour):
+        cells = []
+        for day in DAYS:
+            text = times[label].get(day.lower())
+            parts = [part.strip() for part in text.split(",")] if text else []
+            cells.append(
+                [
+                    (CELL_CLASSES[i] if i < len(CELL_CLASSES) else "", part)
+                    for i, part in enumerate(parts)
+                    if part
+                ]
+            )
+        rows.append((label, cells))
+    return rows
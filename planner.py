@@ -0,0 +1,125 @@
+import time
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+def plan_schedules(
+    required,
+    candidates,
+    target_credits,
+    snapshot,
+    max_credits=None,
+    max_results=20,
+    time_budget=0.5,
+):
+    """Search clash-free sets of candidate electives around required courses.
+
+    ``required`` must be known, mutually clash-free course codes. Electives
+    are added until the total reaches ``target_credits``; a branch stops as
+    soon as the target is met, so no schedule is a superset of another.
+    Branches are pruned when their slots clash, when the remaining
+    candidates cannot reach the target or when ``max_credits`` would be
+    exceeded, and states ``(next candidate, occupied slots, credits)`` known
+    to lead nowhere are memoized. The search stops after ``max_results``
+    schedules or ``time_budget`` seconds, whichever comes first.
+
+    Returns the schedules ranked by closeness to the target, then by fewer
+    electives, along with whether the search space was fully explored.
+    """
+    masks = snapshot.course_masks
+    courses = snapshot.courses
+    credits = {code: courses[code].credits for code in (*required, *candidates)}
+    deadline = time.monotonic() + time_budget
+
+    base_mask = 0
+    for code in required:
+        base_mask |= masks[code]
+    base_credits = sum(credits[code] or 0 for code in required)
+
+    # Electives that cannot fit around the required courses never enter the search
+    required_set = set(required)
+    pool = sorted(
+        {
+            code
+            for code in candidates
+            if code not in required_set
+            and credits.get(code)
+            and not masks[code] & base_mask
+            and code not in snapshot.self_clashes
+        },
+        key=lambda code: (-credits[code], courses[code].position),
+    )
+    pool_masks = [masks[code] for code in pool]
+    pool_credits = [credits[code] for code in pool]
+
+    remaining = [0.0] * (len(pool) + 1)
+    for i in range(len(pool) - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + pool_credits[i]
+
+    found = []
+    dead_ends = set()
+    chosen = []
+    explored = 0
+
+    def search(start, mask, total):
+        nonlocal explored
+        explored += 1
+        if explored % 256 == 0 and time.monotonic() > deadline:
+            raise _BudgetExhausted
+
+        if total >= target_credits:
+            found.append((list(chosen), total))
+            if len(found) >= max_results:
+                raise _BudgetExhausted
+            return True
+
+        state = (start, mask, total)
+        if state in dead_ends or total + remaining[start] < target_credits:
+            return False
+
+        any_found = False
+        for i in range(start, len(pool)):
+            new_total = total + pool_credits[i]
+            if pool_masks[i] & mask or (
+                max_credits is not None and new_total > max_credits
+            ):
+                continue
+            chosen.append(pool[i])
+            any_found |= search(i + 1, mask | pool_masks[i], new_total)
+            chosen.pop()
+
+        if not any_found:
+            dead_ends.add(state)
+        return any_found
+
+    complete = True
+    try:
+        if max_credits is None or base_credits <= max_credits:
+            search(0, base_mask, base_credits)
+    except _BudgetExhausted:
+        complete = False
+
+    order = {code: i for i, code in enumerate(pool)}
+    found.sort(
+        key=lambda item: (
+            item[1] - target_credits,
+            len(item[0]),
+            [order[code] for code in item[0]],
+        )
+    )
+
+    return {
+        "schedules": [
+            {
+                "courses": list(required) + electives,
+                "electives": electives,
+                "credits": total,
+            }
+            for electives, total in found
+        ],
+        "complete": complete,
+        "explored": explored,
+        "candidates": len(pool),
+    }
@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of every other thread.
+
+    While running, a daemon thread wakes up every ``interval`` seconds and
+    counts the current stack of each thread, so the cost is independent of
+    how much code runs and nothing at all is paid while it is stopped.
+    Stacks are kept in the collapsed ``outer;inner`` form read by flame
+    graph tools.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        with self._lock:
+            if interval is not None:
+                self.interval = interval
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = [
+                self._collapse(frame)
+                for thread_id, frame in sys._current_frames().items()
+                if thread_id != own_id
+            ]
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def top(self, limit=50):
+        """Most frequent stacks as ``(stack, count)``, most frequent first"""
+        with self._lock:
+            return self._stacks.most_common(limit)
+
+    def collapsed(self):
+        """All stacks in collapsed format, one ``stack count`` line each"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.top(None))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval": self.interval,
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+            }
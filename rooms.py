@@ -0,0 +1,76 @@
+import re
+
+from slots import Booking, name_key, overlaps
+
+# Venues are comma or line separated; these are not rooms anyone can book
+ROOM_SEPARATORS = re.compile(r"\s*[,;\n]\s*")
+NOT_ROOMS = frozenset(["online", "tba", "tbd", "to be announced"])
+
+
+def split_rooms(location):
+    """Room names listed in a session location, in order and de-duplicated"""
+    rooms = {}
+    for name in ROOM_SEPARATORS.split(location or ""):
+        name = " ".join(name.split())
+        key = name_key(name)
+        if key and key not in NOT_ROOMS:
+            rooms.setdefault(key, name)
+    return tuple(rooms.values())
+
+
+class RoomIndex:
+    """Room by grid cell bookings of the whole catalogue, built once per snapshot.
+
+    ``names`` maps every room key to the name it was first listed under,
+    ``schedules`` each room key to its bookings per ``(row, column)`` cell
+    and ``booked`` each cell to the keys of the rooms booked in it, so the
+    rooms free in a slot are a set difference. ``double_bookings`` lists
+    every cell where two or more courses book the same room in the same
+    half of the semester, found while building the index.
+    """
+
+    __slots__ = ("names", "schedules", "booked", "double_bookings")
+
+    def __init__(self, occupancy, grid):
+        self.names = {}
+        self.schedules = {}
+        self.booked = {}
+        for code, entries in occupancy.cells.items():
+            for cell, session in entries:
+                for name in split_rooms(session.location):
+                    key = name_key(name)
+                    self.names.setdefault(key, name)
+                    bookings = self.schedules.setdefault(key, {}).setdefault(cell, [])
+                    bookings.append(Booking(code, session))
+                    self.booked.setdefault(cell, set()).add(key)
+
+        self.double_bookings = overlaps(self.names, self.schedules)
+
+    def __len__(self):
+        return len(self.names)
+
+    def rooms(self):
+        """Every room name, sorted"""
+        return sorted(self.names.values(), key=name_key)
+
+    def find(self, name):
+        """Key of a room given by name, None when no session books it"""
+        key = name_key(name)
+        return key if key in self.names else None
+
+    def cells(self, key):
+        """Sessions booking the room, per grid cell"""
+        return {
+            cell: [booking.session for booking in bookings]
+            for cell, bookings in self.schedules.get(key, {}).items()
+        }
+
+    def free(self, cells):
+        """Names of the rooms not booked in any of ``cells``, sorted"""
+        taken = set()
+        for cell in cells:
+            taken |= self.booked.get(cell, set())
+        return sorted(
+            (name for key, name in self.names.items() if key not in taken),
+            key=name_key,
+        )
@@ -0,0 +1,192 @@
+"""Local stand-in for the Sheets and Drive APIs used by the sheet sync.
+
+Serves one spreadsheet from memory, so ``update_timetable.py`` can be run
+and tested offline:
+
+    python scripts/fake_sheets.py Timetable.csv --port 8089
+    SHEETS_API_URL=http://127.0.0.1:8089/v4 DRIVE_API_URL=http://127.0.0.1:8089/drive/v3 \\
+        SPREADSHEET_ID=fake SHEET_NAME=Sheet1 python scripts/update_timetable.py
+
+Like the real API, trailing empty rows and cells are left out of value
+ranges and the Drive version increases on every edit. ``fail_next`` makes
+the next requests fail with a given status to exercise retries.
+"""
+
+import argparse
+import csv
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE = re.compile(r"^'?(?P<sheet>.*?)'?!(?P<start>\d+):(?P<end>\d+)$")
+
+
+class FakeSpreadsheet:
+    """Rows of one sheet plus the bookkeeping the fake API exposes"""
+
+    def __init__(self, spreadsheet_id, sheet, rows, extra_rows=100):
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet = sheet
+        self.rows = [list(row) for row in rows]
+        self.extra_rows = extra_rows
+        self.version = 1
+        self.drive_enabled = True
+        self.requests = []
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def update(self, rows):
+        with self.lock:
+            self.rows = [list(row) for row in rows]
+            self.version += 1
+
+    def set_cell(self, row, col, value):
+        with self.lock:
+            while len(self.rows) <= row:
+                self.rows.append([])
+            while len(self.rows[row]) <= col:
+                self.rows[row].append("")
+            self.rows[row][col] = value
+            self.version += 1
+
+    def fail_next(self, status, count=1, retry_after=None):
+        with self.lock:
+            self.failures.extend([(status, retry_after)] * count)
+
+    def row_count(self):
+        return len(self.rows) + self.extra_rows
+
+    def values(self, start, end):
+        """Rows ``start`` to ``end`` (1-based, inclusive) as the API returns them"""
+        rows = []
+        first = start - 1
+        for row in self.rows[first:end]:
+            row = list(row)
+            while row and row[-1] == "":
+                row.pop()
+            rows.append(row)
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+
+class Handler(BaseHTTPRequestHandler):
+    spreadsheet = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        spreadsheet = self.spreadsheet
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        path = urllib.parse.unquote(url.path)
+
+        with spreadsheet.lock:
+            spreadsheet.requests.append(path)
+            failure = spreadsheet.failures.pop(0) if spreadsheet.failures else None
+        if failure is not None:
+            status, retry_after = failure
+            headers = (
+                [("Retry-After", str(retry_after))] if retry_after is not None else []
+            )
+            return self.send_json(status, {"error": {"code": status}}, headers)
+
+        sheet_path = f"/v4/spreadsheets/{spreadsheet.spreadsheet_id}"
+        if path == f"/drive/v3/files/{spreadsheet.spreadsheet_id}":
+            if not spreadsheet.drive_enabled:
+                return self.send_json(
+                    403, {"error": {"code": 403, "message": "Insufficient scopes"}}
+                )
+            return self.send_json(200, {"version": str(spreadsheet.version)})
+
+        if path == sheet_path:
+            return self.send_json(
+                200,
+                {
+                    "sheets": [
+                        {
+                            "properties": {
+                                "title": spreadsheet.sheet,
+                                "gridProperties": {"rowCount": spreadsheet.row_count()},
+                            }
+                        }
+                    ]
+                },
+            )
+
+        if path == f"{sheet_path}/values:batchGet":
+            value_ranges = []
+            with spreadsheet.lock:
+                for value_range in params.get("ranges", []):
+                    match = RANGE.match(value_range)
+                    if (
+                        not match
+                        or match["sheet"].replace("''", "'") != spreadsheet.sheet
+                    ):
+                        return self.send_json(
+                            400, {"error": {"code": 400, "message": value_range}}
+                        )
+                    values = spreadsheet.values(int(match["start"]), int(match["end"]))
+                    value_ranges.append(
+                        {
+                            "range": value_range,
+                            "majorDimension": "ROWS",
+                            "values": values,
+                        }
+                    )
+            return self.send_json(
+                200,
+                {
+                    "spreadsheetId": spreadsheet.spreadsheet_id,
+                    "valueRanges": value_ranges,
+                },
+            )
+
+        self.send_json(404, {"error": {"code": 404}})
+
+
+def serve(spreadsheet, host="127.0.0.1", port=0):
+    """Start serving ``spreadsheet`` on a background thread; returns the server"""
+    handler = type("SpreadsheetHandler", (Handler,), {"spreadsheet": spreadsheet})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    ).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a CSV file as a fake Google Sheet"
+    )
+    parser.add_argument("csv", help="CSV file holding the sheet contents")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--spreadsheet-id", default="fake")
+    parser.add_argument("--sheet", default="Sheet1")
+    args = parser.parse_args()
+
+    with open(args.csv, newline="") as f:
+        rows = list(csv.reader(f))
+    server = serve(
+        FakeSpreadsheet(args.spreadsheet_id, args.sheet, rows), port=args.port
+    )
+    print(
+        f"Serving {args.csv} as {args.spreadsheet_id}/{args.sheet} on port {server.server_port}"
+    )
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
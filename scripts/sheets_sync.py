@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+
+SHEETS_URL = "https://sheets.googleapis.com/v4"
+DRIVE_URL = "https://www.googleapis.com/drive/v3"
+
+# Responses worth another try: rate limits and transient server errors
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+SyncResult = namedtuple(
+    "SyncResult", ["changed", "revision", "rows", "changed_rows", "requests", "state"]
+)
+
+
+class SyncError(Exception):
+    pass
+
+
+class SheetsClient:
+    """Minimal Sheets/Drive REST client with retries and exponential backoff.
+
+    ``authorize(headers)`` adds credentials to the headers of every request
+    (e.g. ``google.auth`` credentials' ``apply``); it is left out against
+    the fake server. Failed requests are retried up to ``retries`` times,
+    waiting ``backoff * 2 ** attempt`` seconds with jitter, capped at
+    ``max_backoff`` and never less than a server's Retry-After.
+    """
+
+    def __init__(
+        self,
+        spreadsheet_id,
+        authorize=None,
+        sheets_url=SHEETS_URL,
+        drive_url=DRIVE_URL,
+        retries=5,
+        backoff=0.5,
+        max_backoff=30.0,
+        timeout=30.0,
+        sleep=time.sleep,
+    ):
+        self.spreadsheet_id = spreadsheet_id
+        self.authorize = authorize
+        self.sheets_url = sheets_url.rstrip("/")
+        self.drive_url = drive_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.sleep = sleep
+        self.requests = 0
+
+    def get(self, url, params=()):
+        """GET ``url`` and decode its JSON body, retrying transient failures"""
+        query = urllib.parse.urlencode(
+            list(params.items()) if isinstance(params, dict) else params
+        )
+        if query:
+            url = f"{url}?{query}"
+
+        for attempt in range(self.retries + 1):
+            headers = {"Accept": "application/json"}
+            if self.authorize is not None:
+                self.authorize(headers)
+            self.requests += 1
+            retry_after = None
+            try:
+                with urllib.request.urlopen(
+                    urllib.request.Request(url, headers=headers), timeout=self.timeout
+                ) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES:
+                    raise SyncError(f"{e.code} {e.reason} for {url}") from e
+                error = e
+                retry_after = e.headers.get("Retry-After")
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                error = e
+
+            if attempt == self.retries:
+                break
+            delay = min(self.max_backoff, self.backoff * 2**attempt) * random.uniform(
+                0.5, 1.0
+            )
+            if retry_after is not None and retry_after.isdigit():
+                delay = max(delay, min(self.max_backoff, float(retry_after)))
+            print(f"Request failed ({error}), retrying in {delay:.1f}s")
+            self.sleep(delay)
+
+        raise SyncError(
+            f"Giving up on {url} after {self.retries + 1} attempts: {error}"
+        )
+
+    def revision(self):
+        """Drive version of the spreadsheet, or None when Drive is not accessible.
+
+        The version changes on every edit, so an unchanged version means
+        nothing needs fetching. Reading it needs a Drive metadata scope;
+        without one the sync falls back to comparing content hashes.
+        """
+        url = f"{self.drive_url}/files/{urllib.parse.quote(self.spreadsheet_id)}"
+        try:
+            return str(
+                self.get(url, {"fields": "version", "supportsAllDrives": "true"})[
+                    "version"
+                ]
+            )
+        except (SyncError, KeyError) as e:
+            print(f"Sheet revision unavailable ({e}), comparing contents instead")
+            return None
+
+    def row_count(self, sheet):
+        url = (
+            f"{self.sheets_url}/spreadsheets/{urllib.parse.quote(self.spreadsheet_id)}"
+        )
+        data = self.get(
+            url, {"fields": "sheets.properties(title,gridProperties.rowCount)"}
+        )
+        for entry in data.get("sheets", []):
+            properties = entry.get("properties", {})
+            if properties.get("title") == sheet:
+                return properties.get("gridProperties", {}).get("rowCount", 0)
+        raise SyncError(f"Sheet {sheet!r} not found")
+
+    def batch_get(self, ranges):
+        """Rows of every A1 range, fetched in one ``values:batchGet`` call"""
+        url = f"{self.sheets_url}/spreadsheets/{urllib.parse.quote(self.spreadsheet_id)}/values:batchGet"
+        params = [("ranges", r) for r in ranges] + [("majorDimension", "ROWS")]
+        value_ranges = self.get(url, params).get("valueRanges", [])
+        if len(value_ranges) != len(ranges):
+            raise SyncError(f"Asked for {len(ranges)} ranges, got {len(value_ranges)}")
+        return [value_range.get("values", []) for value_range in value_ranges]
+
+
+def block_ranges(sheet, row_count, block_rows):
+    """A1 ranges of whole rows covering the sheet, ``block_rows`` at a time"""
+    name = "'" + sheet.replace("'", "''") + "'"
+    return [
+        f"{name}!{start}:{min(start + block_rows - 1, row_count)}"
+        for start in range(1, row_count + 1, block_rows)
+    ]
+
+
+def block_hash(rows):
+    return hashlib.sha256(
+        json.dumps(rows, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def write_csv(path, rows):
+    """Write the sheet rows as CSV, header first, like a full ``values().get``"""
+    import pandas as pd
+
+    df = pd.DataFrame(rows[1:], columns=rows[0])
+    df.to_csv(path, index=False)
+
+
+def sync_sheet(
+    client, sheet, csv_path, state_path, block_rows=200, batch_size=10, full=False
+):
+    """Bring ``csv_path`` up to date with the sheet and report what changed.
+
+    When the spreadsheet's Drive revision matches the last sync, nothing
+    else is fetched. Otherwise the sheet is read in blocks of ``block_rows``
+    rows, ``batch_size`` blocks per request; each block is hashed, and the
+    CSV is only rewritten when a block hash differs from the last sync.
+    ``full`` ignores the saved state.
+
+    The state to save for the next run is returned rather than saved, so
+    callers that process the CSV further only save it once that succeeded;
+    otherwise the next run would find the sheet unchanged and skip them.
+    """
+    state = {} if full else load_state(state_path)
+    if state.get("spreadsheet") != client.spreadsheet_id or state.get("sheet") != sheet:
+        state = {}
+
+    revision = client.revision()
+    if (
+        revision is not None
+        and revision == state.get("revision")
+        and os.path.exists(csv_path)
+    ):
+        print(f"Sheet revision {revision} already synced")
+        return SyncResult(
+            False, revision, state.get("rows", 0), 0, client.requests, state
+        )
+
+    ranges = block_ranges(sheet, client.row_count(sheet), block_rows)
+    blocks = []
+    for start in range(0, len(ranges), batch_size):
+        end = start + batch_size
+        blocks.extend(client.batch_get(ranges[start:end]))
+
+    # Trailing empty rows are left out of each block; pad them back so rows
+    # keep their position, then drop the ones at the end of the sheet
+    rows = []
+    for index, block in enumerate(blocks):
+        rows.extend(block)
+        if index < len(blocks) - 1:
+            rows.extend([] for _ in range(block_rows - len(block)))
+    while rows and not any(rows[-1]):
+        rows.pop()
+    if not rows:
+        raise SyncError(f"Sheet {sheet!r} is empty")
+
+    row_blocks = []
+    for start in range(0, len(rows), block_rows):
+        end = start + block_rows
+        row_blocks.append(rows[start:end])
+    hashes = [block_hash(block) for block in row_blocks]
+    old_hashes = (
+        state.get("blocks", []) if state.get("block_rows") == block_rows else []
+    )
+    changed_rows = sum(
+        len(block)
+        for index, (block, value) in enumerate(zip(row_blocks, hashes))
+        if index >= len(old_hashes) or old_hashes[index] != value
+    )
+    changed = hashes != old_hashes or not os.path.exists(csv_path)
+
+    if changed:
+        write_csv(csv_path, rows)
+        print(
+            f"Updated {csv_path}: {changed_rows} of {len(rows)} rows in changed blocks"
+        )
+    else:
+        print(f"Sheet contents unchanged, {csv_path} is up to date")
+
+    state = {
+        "spreadsheet": client.spreadsheet_id,
+        "sheet": sheet,
+        "revision": revision,
+        "rows": len(rows),
+        "block_rows": block_rows,
+        "blocks": hashes,
+    }
+    return SyncResult(
+        changed, revision, len(rows), changed_rows, client.requests, state
+    )
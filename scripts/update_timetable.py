@@ -1,18 +1,24 @@
 import os
+import sys
+import json
 import base64
-from dotenv import load_dotenv
-import pandas as pd
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import pickle
+import argparse
+import importlib.util
+from dotenv import load_dotenv
+
+from sheets_sync import DRIVE_URL, SHEETS_URL, SheetsClient, SyncError, save_state, sync_sheet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Load environment variables from .env file
 load_dotenv()
 
-# If modifying these scopes, delete the file token.pickle.
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+# If modifying these scopes, delete token.json. The Drive metadata scope lets
+# the sync skip unchanged sheets with one request; it works without it.
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly',
+          'https://www.googleapis.com/auth/drive.metadata.readonly']
+
 
 def restore_token_from_env():
     b64_token = os.environ.get('GOOGLE_TOKEN_B64')
@@ -24,59 +30,104 @@ def restore_token_from_env():
         with open('token.pickle', 'wb') as f:
             f.write(base64.b64decode(b64_token))
 
-def get_google_sheets_data():
-    restore_token_from_env()
+
+def load_credentials():
+    """OAuth credentials from GOOGLE_TOKEN_JSON or token.json.
+
+    Tokens pickled by older versions of this script (GOOGLE_TOKEN_B64 or
+    token.pickle) are still read once and converted to token.json.
+    """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     creds = None
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
+    token_json = os.environ.get('GOOGLE_TOKEN_JSON')
+    if token_json:
+        creds = Credentials.from_authorized_user_info(json.loads(token_json))
+    elif os.path.exists('token.json'):
+        creds = Credentials.from_authorized_user_file('token.json')
+    else:
+        restore_token_from_env()
+        if os.path.exists('token.pickle'):
+            with open('token.pickle', 'rb') as token:
+                creds = pickle.load(token)
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
         else:
-            print("Token invalid or missing. Manual auth required.")
             return None
 
-    try:
-        service = build('sheets', 'v4', credentials=creds)
-        spreadsheet_id = os.environ.get('SPREADSHEET_ID')
-        sheet_name = os.environ.get('SHEET_NAME')
-        if not spreadsheet_id or not sheet_name:
-            print('Missing env variables.')
-            return None
+    if not token_json:
+        with open('token.json', 'w') as f:
+            f.write(creds.to_json())
+    return creds
 
-        sheet = service.spreadsheets()
-        result = sheet.values().get(
-            spreadsheetId=spreadsheet_id,
-            range=sheet_name
-        ).execute()
 
-        values = result.get('values', [])
-        if not values:
-            print('No data found.')
-            return None
+def make_authorize(creds):
+    """Request hook adding a bearer token, refreshed when it expires"""
+    from google.auth.transport.requests import Request
+
+    def authorize(headers):
+        if not creds.valid:
+            creds.refresh(Request())
+        creds.apply(headers)
 
-        df = pd.DataFrame(values[1:], columns=values[0])
-        return df
+    return authorize
 
-    except HttpError as error:
-        print(f'An error occurred: {error}')
-        return None
+
+def run_csv_filter(input_file):
+    spec = importlib.util.spec_from_file_location('csv_filter', os.path.join(ROOT, 'csv-filter.py'))
+    csv_filter = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, ROOT)
+    spec.loader.exec_module(csv_filter)
+    return csv_filter.process_timetable(input_file, incremental=True)
 
 
 def main():
-    """Main function to update timetable data."""
-    print('Fetching data from Google Sheets...')
-    df = get_google_sheets_data()
-    
-    if df is not None:
-        print('Updating CSV files...')
-        df.to_csv('Timetable.csv', index=False)
-        print('Successfully updated timetable data.')
+    """Sync Timetable.csv with the sheet and reprocess the courses that changed."""
+    parser = argparse.ArgumentParser(description='Update the timetable from Google Sheets')
+    parser.add_argument('--output', default='Timetable.csv', help='Sheet export CSV file path')
+    parser.add_argument('--state', default='Timetable.sync.json', help='Revision and block hashes of the last sync')
+    parser.add_argument('--block-rows', type=int, default=200, help='Rows per fetched range')
+    parser.add_argument('--batch-size', type=int, default=10, help='Ranges per batchGet request')
+    parser.add_argument('--full', action='store_true', help='Ignore the last sync and compare everything')
+    parser.add_argument('--no-filter', action='store_true', help='Do not run csv-filter.py afterwards')
+    args = parser.parse_args()
+
+    spreadsheet_id = os.environ.get('SPREADSHEET_ID')
+    sheet_name = os.environ.get('SHEET_NAME')
+    if not spreadsheet_id or not sheet_name:
+        print('Missing env variables.')
+        return 1
+
+    sheets_url = os.environ.get('SHEETS_API_URL', SHEETS_URL)
+    authorize = None
+    if sheets_url == SHEETS_URL:
+        creds = load_credentials()
+        if creds is None:
+            print('Token invalid or missing. Manual auth required.')
+            return 1
+        authorize = make_authorize(creds)
+
+    client = SheetsClient(spreadsheet_id, authorize, sheets_url=sheets_url,
+                          drive_url=os.environ.get('DRIVE_API_URL', DRIVE_URL))
+
+    print('Syncing data from Google Sheets...')
+    try:
+        result = sync_sheet(client, sheet_name, args.output, args.state, args.block_rows,
+                            args.batch_size, args.full)
+    except SyncError as error:
+        print(f'Failed to sync from Google Sheets: {error}')
+        return 1
+    print(f'Sync finished after {result.requests} API requests')
+
+    if result.changed and not args.no_filter:
+        run_csv_filter(args.output)
+    # Only now, so a failed csv-filter run is retried by the next sync
+    save_state(args.state, result.state)
+    return 0
 
-    else:
-        print('Failed to fetch data from Google Sheets.')
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import heapq
+import re
+from bisect import bisect_left
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Score of a query word equal to a word of each field; a word it is only a
+# prefix of scores PREFIX_FACTOR of that, and a fuzzy (trigram) match scores
+# FUZZY_FACTOR times the similarity
+FIELD_SCORES = (("code", 100.0), ("name", 40.0), ("instructors", 25.0))
+PREFIX_FACTOR = 0.6
+FUZZY_FACTOR = 0.3
+FUZZY_THRESHOLD = 0.4
+FUZZY_MIN_LENGTH = 3
+
+
+def words(text):
+    return WORD.findall(text.lower())
+
+
+def trigrams(word):
+    padded = f" {word} "
+    return {a + b + c for a, b, c in zip(padded, padded[1:], padded[2:])}
+
+
+class SearchIndex:
+    """Ranked prefix and fuzzy search over course code, name and instructors.
+
+    Built once per snapshot over the listed courses (those with credits).
+    Every distinct word is stored once in a sorted vocabulary with the
+    courses it occurs in, so all words starting with a query word form one
+    contiguous range found by bisection. Query words matching nothing fall
+    back to words sharing enough trigrams, which absorbs typos. Codes are
+    also indexed without their space, so "cs10" finds "CS 101".
+    """
+
+    __slots__ = ("codes", "vocabulary", "postings", "trigram_index")
+
+    def __init__(self, courses):
+        self.codes = [
+            code for code, course in courses.items() if course.credits is not None
+        ]
+
+        postings = {}
+        for doc, code in enumerate(self.codes):
+            course = courses[code]
+            fields = {
+                "code": words(code) + ["".join(words(code))],
+                "name": words(course.name),
+                "instructors": [w for i in course.instructors for w in words(i.name)],
+            }
+            for field, score in FIELD_SCORES:
+                for word in fields[field]:
+                    entry = postings.setdefault(word, {})
+                    if entry.get(doc, 0.0) < score:
+                        entry[doc] = score
+
+        self.vocabulary = sorted(postings)
+        self.postings = [postings[word] for word in self.vocabulary]
+        self.trigram_index = {}
+        for index, word in enumerate(self.vocabulary):
+            if len(word) >= FUZZY_MIN_LENGTH:
+                for trigram in trigrams(word):
+                    self.trigram_index.setdefault(trigram, []).append(index)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def match_word(self, word):
+        """Best score per course for one query word"""
+        scores = {}
+        vocabulary = self.vocabulary
+        index = bisect_left(vocabulary, word)
+        while index < len(vocabulary) and vocabulary[index].startswith(word):
+            factor = 1.0 if len(vocabulary[index]) == len(word) else PREFIX_FACTOR
+            for doc, score in self.postings[index].items():
+                score *= factor
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+            index += 1
+
+        if not scores and len(word) >= FUZZY_MIN_LENGTH:
+            query = trigrams(word)
+            shared = {}
+            for trigram in query:
+                for candidate in self.trigram_index.get(trigram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            for candidate, count in shared.items():
+                similarity = count / len(query | trigrams(vocabulary[candidate]))
+                if similarity < FUZZY_THRESHOLD:
+                    continue
+                for doc, score in self.postings[candidate].items():
+                    score *= FUZZY_FACTOR * similarity
+                    if score > scores.get(doc, 0.0):
+                        scores[doc] = score
+        return scores
+
+    def search(self, query, offset=0, limit=20):
+        """Total number of matches and one page of course codes, best first.
+
+        Every word of the query has to match; courses score the sum of their
+        best match per word and ties keep catalogue order. An empty query
+        pages through the whole catalogue.
+        """
+        query_words = list(dict.fromkeys(words(query)))
+        if not query_words:
+            end = offset + limit
+            return len(self.codes), self.codes[offset:end]
+
+        totals = None
+        for word in query_words:
+            scores = self.match_word(word)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {
+                    doc: totals[doc] + score
+                    for doc, score in scores.items()
+                    if doc in totals
+                }
+            if not totals:
+                return 0, []
+
+        best = heapq.nsmallest(
+            offset + limit, totals, key=lambda doc: (-totals[doc], doc)
+        )
+        return len(totals), [self.codes[doc] for doc in best[offset:]]
@@ -0,0 +1,148 @@
+import re
+from collections import namedtuple
+
+# Halves of the semester a course runs in, as bit flags
+FIRST_HALF = 1
+SECOND_HALF = 2
+FULL_SEMESTER = FIRST_HALF | SECOND_HALF
+
+# Slot tokens are separated by commas, semicolons, "&", "/" or white space
+SEPARATORS = re.compile(r"[,;&/\s]+")
+RANGE_DASH = re.compile(r"\s*-\s*")
+# "A1", "I1-K1" (every period from I1 to K1 on the same day) or "N1x2" (N1
+# and the period after it)
+SLOT = re.compile(
+    r"^(?P<code>[A-Z]{1,2}\d{1,2})"
+    r"(?:-(?P<until>[A-Z]{1,2}\d{1,2})|[X*](?P<periods>[1-9]))?$"
+)
+HALF = re.compile(r"\b(?:(first|1st)|second|2nd)\s+half\b", re.IGNORECASE)
+TIME_RANGE = re.compile(r"^\s*(\d{1,2})[:.](\d{2})\s*-\s*(\d{1,2})[:.](\d{2})\s*$")
+
+
+class Occupancy(namedtuple("Occupancy", ["cells", "unknown"])):
+    """Grid cells booked by every course, resolved once per data version.
+
+    ``cells`` maps each course code to its ``((row, column), session)``
+    entries in session order and ``unknown`` the slot tokens of a course
+    that match no grid cell.
+    """
+
+    __slots__ = ()
+
+    def entries(self, code):
+        return self.cells.get(code, ())
+
+
+class Booking(namedtuple("Booking", ["code", "session"])):
+    """A course session booked in one grid cell, e.g. of a room or instructor"""
+
+    __slots__ = ()
+
+
+def clashing(bookings):
+    """Whether bookings of different courses overlap in a half of the semester"""
+    halves = {}
+    for booking in bookings:
+        for code, half in halves.items():
+            if code != booking.code and half & booking.session.half:
+                return True
+        halves[booking.code] = halves.get(booking.code, 0) | booking.session.half
+    return False
+
+
+def name_key(name):
+    """Case and white space insensitive lookup key of a room or person name"""
+    return " ".join(name.split()).lower()
+
+
+def overlaps(names, schedules):
+    """``(name, cell, codes)`` of every cell where someone's bookings clash.
+
+    ``schedules`` maps name keys to their bookings per cell and ``names``
+    the keys to display names; results are sorted by name, then cell.
+    """
+    found = []
+    for key in sorted(schedules, key=lambda key: names[key]):
+        for cell, bookings in sorted(schedules[key].items()):
+            if clashing(bookings):
+                codes = list(dict.fromkeys(booking.code for booking in bookings))
+                found.append((names[key], cell, codes))
+    return found
+
+
+def split_slots(value):
+    """De-duplicated, upper-cased slot tokens of a slot cell"""
+    if value is None:
+        return ()
+    value = RANGE_DASH.sub("-", str(value).upper())
+    return tuple(dict.fromkeys(t for t in SEPARATORS.split(value) if t))
+
+
+def semester_half(name):
+    """Halves of the semester a course runs in, from markers in its name"""
+    match = HALF.search(name or "")
+    if match is None:
+        return FULL_SEMESTER
+    return FIRST_HALF if match[1] else SECOND_HALF
+
+
+def period_minutes(label):
+    """``(start, end)`` minutes since midnight of a time label like "8:30 - 9:50" """
+    match = TIME_RANGE.match(label or "")
+    if match is None:
+        return None
+    start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+    return start_hour * 60 + start_minute, end_hour * 60 + end_minute
+
+
+def resolve_slot(token, grid):
+    """Grid cells booked by one slot token, in row order per day.
+
+    Tokens outside the grammar are looked up verbatim, so grids with other
+    kinds of codes still work.
+    """
+    match = SLOT.match(token)
+    if match is None:
+        return grid.cells(token)
+
+    starts = grid.cells(match["code"])
+    if match["periods"]:
+        periods = int(match["periods"])
+        last_row = len(grid.rows) - 1
+        return tuple(
+            (r, col)
+            for row, col in starts
+            for r in range(row, min(row + periods - 1, last_row) + 1)
+        )
+
+    if match["until"]:
+        cells = []
+        ends = grid.cells(match["until"])
+        for row, col in starts:
+            end_rows = [r for r, c in ends if c == col and r >= row]
+            if end_rows:
+                cells.extend((r, col) for r in range(row, min(end_rows) + 1))
+        return tuple(cells)
+
+    return starts
+
+
+def build_occupancy(courses, grid):
+    """Resolve the slots of every course session to grid cells"""
+    cells = {}
+    unknown = {}
+    for code, course in courses.items():
+        entries = []
+        missing = []
+        for session in course.sessions:
+            session_cells = {}
+            for token in session.slots:
+                resolved = resolve_slot(token, grid)
+                if not resolved:
+                    missing.append(token)
+                session_cells.update(dict.fromkeys(resolved))
+            entries.extend((cell, session) for cell in session_cells)
+        cells[code] = tuple(entries)
+        if missing:
+            unknown[code] = tuple(dict.fromkeys(missing))
+    return Occupancy(cells, unknown)
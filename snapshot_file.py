@@ -0,0 +1,218 @@
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# File layout, all little-endian and every array aligned to 8 bytes:
+#
+#   header    magic, format, data version, table count, string count
+#   strings   offsets (uint32 * (count + 1)), then the UTF-8 blob
+#   tables    name, column count, row count, then per column its name, kind
+#             and one value per row: a string id (uint32, MISSING when
+#             empty), a float64 (NaN when empty) or an int64
+#
+# Every distinct string is stored once, so repeated slot codes, locations and
+# categories cost four bytes per cell.
+MAGIC = b"TTSNAP\0\0"
+FORMAT = 1
+HEADER = struct.Struct("<8sI12sII")
+TABLE_HEADER = struct.Struct("<III4x")
+COLUMN_HEADER = struct.Struct("<IB3x")
+MISSING = 0xFFFFFFFF
+
+STRING, FLOAT, INT = b"s", b"f", b"i"
+TYPECODES = {STRING: "I", FLOAT: "d", INT: "q"}
+
+
+class Table:
+    """Column names plus rows of plain Python values, None for empty cells"""
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns=(), rows=()):
+        self.columns = list(columns)
+        self.rows = list(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def empty(self):
+        return not self.columns or not self.rows
+
+    def column(self, name):
+        index = self.columns.index(name)
+        return [row[index] for row in self.rows]
+
+    def records(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+
+def column_kind(values):
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, float) for value in present):
+        return FLOAT
+    if present and all(
+        isinstance(value, int) and not isinstance(value, bool) for value in present
+    ):
+        return INT if len(present) == len(values) else FLOAT
+    return STRING
+
+
+def _padded(data):
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot_file(path, tables, version):
+    """Write ``{name: Table}`` and the data ``version`` to ``path``"""
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    body = []
+    for name, table in tables.items():
+        body.append(TABLE_HEADER.pack(intern(name), len(table.columns), len(table)))
+        for index, column in enumerate(table.columns):
+            values = [row[index] for row in table.rows]
+            kind = column_kind(values)
+            if kind == STRING:
+                data = array(
+                    "I",
+                    (
+                        MISSING if value is None else intern(str(value))
+                        for value in values
+                    ),
+                )
+            elif kind == FLOAT:
+                data = array(
+                    "d", (math.nan if value is None else value for value in values)
+                )
+            else:
+                data = array("q", values)
+            body.append(COLUMN_HEADER.pack(intern(str(column)), kind[0]))
+            body.append(_padded(_little_endian(data)))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = array("I", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+
+    header = HEADER.pack(
+        MAGIC, FORMAT, version.encode("ascii"), len(tables), len(encoded)
+    )
+    # Written aside and moved into place, so a crash never leaves a partial
+    # file whose header already carries the current version
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(_padded(header))
+            f.write(_padded(_little_endian(offsets)))
+            f.write(_padded(b"".join(encoded)))
+            for part in body:
+                f.write(part)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_version(path):
+    """Data version recorded in a snapshot file, without loading it"""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or header[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a timetable snapshot")
+    _, file_format, version, _, _ = HEADER.unpack(header)
+    if file_format != FORMAT:
+        raise ValueError(f"{path} has snapshot format {file_format}, not {FORMAT}")
+    return version.decode("ascii")
+
+
+def read_snapshot_file(path):
+    """Load a snapshot file as ``(version, {name: Table})``.
+
+    The file is memory-mapped only while it is parsed: its arrays are
+    decoded straight from the mapping into Python lists, strings and row
+    tuples, which is much faster than parsing the CSVs. Nothing refers to
+    the mapping afterwards.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        view = memoryview(mapped)
+        try:
+            return _parse(view)
+        except (struct.error, IndexError, KeyError) as e:
+            raise ValueError(f"{path} is truncated or corrupt") from e
+        finally:
+            view.release()
+    finally:
+        mapped.close()
+
+
+def _array(view, offset, typecode, count):
+    """``count`` values of ``typecode`` at ``offset``, and the next offset"""
+    size = array(typecode).itemsize * count
+    end = offset + size
+    if end > len(view):
+        raise ValueError("Truncated timetable snapshot")
+    data = view[offset:end]
+    if sys.byteorder == "little":
+        values = data.cast(typecode).tolist()
+    else:
+        swapped = array(typecode, data.tobytes())
+        swapped.byteswap()
+        values = swapped.tolist()
+    data.release()
+    return values, end + (-size % 8)
+
+
+def _parse(view):
+    if len(view) < HEADER.size:
+        raise ValueError("Not a timetable snapshot")
+    magic, file_format, version, table_count, string_count = HEADER.unpack_from(view)
+    if magic != MAGIC or file_format != FORMAT:
+        raise ValueError("Not a timetable snapshot")
+    offset = HEADER.size + (-HEADER.size % 8)
+
+    bounds, offset = _array(view, offset, "I", string_count + 1)
+    end = offset + bounds[-1]
+    blob = bytes(view[offset:end])
+    offset = end + (-bounds[-1] % 8)
+    strings = [
+        sys.intern(blob[start:end].decode("utf-8"))
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+    tables = {}
+    for _ in range(table_count):
+        name, column_count, row_count = TABLE_HEADER.unpack_from(view, offset)
+        offset += TABLE_HEADER.size
+        columns = []
+        values = []
+        for _ in range(column_count):
+            column, kind = COLUMN_HEADER.unpack_from(view, offset)
+            offset += COLUMN_HEADER.size
+            kind = bytes([kind])
+            data, offset = _array(view, offset, TYPECODES[kind], row_count)
+            if kind == STRING:
+                data = [None if i == MISSING else strings[i] for i in data]
+            elif kind == FLOAT:
+                data = [None if math.isnan(v) else v for v in data]
+            columns.append(strings[column])
+            values.append(data)
+        tables[strings[name]] = Table(columns, zip(*values) if values else ())
+
+    return version.decode("ascii"), tables
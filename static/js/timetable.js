@@ -1,8 +1,16 @@
 document.addEventListener('DOMContentLoaded', function() {
     let selectedCourses = [];
-    let courseData = [];
+    // Code, name and credits of every course shown or selected so far
+    const courseInfo = {};
+    const SEARCH_PAGE_SIZE = 50;
+    let searchRequest = 0;
+    let searchTimer = null;
     let totalCredits = 0;
     let timetableData = null;
+    // Day lists of the shown timetable, patched in place by timetable deltas
+    let timetableDays = null;
+    let dataVersion = null;
+    let pendingDelta = Promise.resolve();
     
     // DOM elements
     const $ = id => document.getElementById(id);
@@ -24,23 +32,46 @@ document.addEventListener('DOMContentLoaded', function() {
     };
     
     // Initialize
+    loadPermalink();
     loadCourses();
     setupEventListeners();
     
-    // Load courses from API
-    function loadCourses() {
-        fetch('/api/courses')
+    // Selection of a shared link, whose timetable the server already rendered
+    function loadPermalink() {
+        const data = $('permalink-data');
+        if (!data) return;
+        
+        const permalink = JSON.parse(data.textContent);
+        permalink.details.forEach(course => { courseInfo[course.code] = course; });
+        selectedCourses = permalink.courses;
+        totalCredits = permalink.credits;
+        timetableData = permalink;
+    }
+    
+    // Load one page of matching courses from the search API
+    function loadCourses(query = '', offset = 0) {
+        const request = ++searchRequest;
+        const params = new URLSearchParams({ q: query, offset, limit: SEARCH_PAGE_SIZE });
+        fetch(`/api/courses/search?${params}`)
             .then(response => response.json())
             .then(data => {
-                courseData = data.courses;
-                renderCourseTable();
+                // Answers to superseded queries arrive late; drop them
+                if (request !== searchRequest) return;
+                data.courses.forEach(course => { courseInfo[course.code] = course; });
+                renderCourseTable(data, offset > 0);
             })
             .catch(() => showMessage('Failed to load course data. Please refresh.', 'error'));
     }
     
+    // Search again once typing pauses
+    function scheduleSearch() {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadCourses(elements.searchField.value.trim()), 150);
+    }
+    
     // Setup all event listeners
     function setupEventListeners() {
-        elements.searchField.addEventListener('input', e => renderCourseTable(e.target.value.toLowerCase()));
+        elements.searchField.addEventListener('input', scheduleSearch);
         elements.previewButton.addEventListener('click', () => validateAndGenerate(generateTimetable));
         elements.deselectAllButton.addEventListener('click', deselectAll);
         
@@ -48,27 +79,25 @@ document.addEventListener('DOMContentLoaded', function() {
         $('go-to-top').addEventListener('click', scrollToTop);
         
         // Download handlers
-        ['Image', 'Excel', 'CSV'].forEach(type => {
+        ['Image', 'Excel', 'CSV', 'Calendar', 'Link'].forEach(type => {
             $(`download-${type.toLowerCase()}`).addEventListener('click', () => 
                 validateAndGenerate(() => window[`generateTimetable${type}`]())
             );
         });
     }
     
-    // Render course table with optional search filter
-    function renderCourseTable(searchQuery = '') {
+    // Render a page of search results, appended to the table for "Show more"
+    function renderCourseTable(data, append = false) {
         const tbody = elements.courseTableBody;
-        const filteredCourses = courseData.filter(course => 
-            course.code.toLowerCase().includes(searchQuery) || 
-            course.name.toLowerCase().includes(searchQuery)
-        );
+        const moreRow = tbody.querySelector('.show-more-row');
+        if (moreRow) moreRow.remove();
         
-        if (filteredCourses.length === 0) {
+        if (data.total === 0) {
             tbody.innerHTML = '<tr><td colspan="4">No courses found.</td></tr>';
             return;
         }
         
-        tbody.innerHTML = filteredCourses.map(course => `
+        const rows = data.courses.map(course => `
             <tr>
                 <td>${course.code}</td>
                 <td>${course.name}</td>
@@ -82,10 +111,37 @@ document.addEventListener('DOMContentLoaded', function() {
             </tr>
         `).join('');
         
+        const shown = data.offset + data.courses.length;
+        const more = shown < data.total ? `
+            <tr class="show-more-row">
+                <td colspan="4">
+                    <button class="show-more-button" type="button">Show more (${data.total - shown} left)</button>
+                </td>
+            </tr>
+        ` : '';
+        
+        if (append) {
+            tbody.insertAdjacentHTML('beforeend', rows + more);
+        } else {
+            tbody.innerHTML = rows + more;
+        }
+        
         // Add event listeners to checkboxes
-        tbody.querySelectorAll('input[type="checkbox"]').forEach(checkbox => {
+        tbody.querySelectorAll('input[type="checkbox"]:not([data-bound])').forEach(checkbox => {
+            checkbox.dataset.bound = 'true';
             checkbox.addEventListener('change', handleCourseSelection);
         });
+        const moreButton = tbody.querySelector('.show-more-button');
+        if (moreButton) {
+            moreButton.addEventListener('click', () => loadCourses(data.query, shown));
+        }
+    }
+    
+    // Keep the checkboxes of the shown courses in line with the selection
+    function syncCheckboxes() {
+        elements.courseTableBody.querySelectorAll('input[type="checkbox"]').forEach(checkbox => {
+            checkbox.checked = selectedCourses.includes(checkbox.dataset.courseCode);
+        });
     }
     
     // Handle course selection/deselection
@@ -108,6 +164,76 @@ document.addEventListener('DOMContentLoaded', function() {
         
         updateTotalCredits();
         updateSelectedCourses();
+        updateTimetable(courseCode, e.target.checked);
+    }
+    
+    // Patch the shown timetable with the cells one added or removed course changes
+    function updateTimetable(courseCode, adding) {
+        if (!timetableData) return checkClashes();
+        if (!timetableDays) return selectedCourses.length ? generateTimetable(false) : undefined;
+        
+        const previous = adding
+            ? selectedCourses.filter(code => code !== courseCode)
+            : [...selectedCourses, courseCode];
+        const request = { courses: previous, version: dataVersion || undefined };
+        request[adding ? 'add' : 'remove'] = courseCode;
+        
+        // One delta at a time, so cells shared by quick successive edits are patched in order
+        pendingDelta = pendingDelta.then(() => fetch('/api/timetable/delta', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(request)
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) return generateTimetable(false);
+            
+            dataVersion = data.version;
+            data.cells.forEach(cell => applyCell(cell));
+            const clashes = data.clashes.added.map(pair => `${pair.courses.join(' / ')} (${pair.slots.join(', ')})`);
+            if (clashes.length) showMessage(`Clash: ${clashes.join('; ')}`, 'error');
+        })
+        .catch(() => generateTimetable(false)));
+    }
+    
+    // Update one cell of the day lists and of the rendered table
+    function applyCell({ day, time, class: classInfo }) {
+        const entries = timetableDays[day] || (timetableDays[day] = []);
+        const index = entries.findIndex(entry => entry.time === time);
+        if (classInfo && index > -1) {
+            entries[index].class = classInfo;
+        } else if (classInfo) {
+            entries.push({ time, class: classInfo });
+        } else if (index > -1) {
+            entries.splice(index, 1);
+        }
+        
+        const td = elements.timetableContainer.querySelector(
+            `td[data-day="${day}"][data-time="${CSS.escape(time)}"]`);
+        const rowStillUsed = Object.values(timetableDays).some(list => list.some(entry => entry.time === time));
+        if (td && rowStillUsed) {
+            td.innerHTML = classInfo ? formatCourseCell(classInfo) : '';
+        } else {
+            renderTimetable(timetableDays);
+        }
+    }
+    
+    // Warn about clashing courses as soon as the selection changes
+    function checkClashes() {
+        if (selectedCourses.length < 2) return;
+        
+        fetch('/api/clashes', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ courses: selectedCourses })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.pairs || data.pairs.length === 0) return;
+            const clashes = data.pairs.map(pair => `${pair.courses.join(' / ')} (${pair.slots.join(', ')})`);
+            showMessage(`Clash: ${clashes.join('; ')}`, 'error');
+        })
+        .catch(() => {});
     }
     
     // Update total credits display
@@ -123,7 +249,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         elements.selectedCoursesList.innerHTML = selectedCourses.map(courseCode => {
-            const course = courseData.find(c => c.code === courseCode);
+            const course = courseInfo[courseCode];
             return course ? `
                 <div class="selected-course-item">
                     <span class="selected-course-code">${course.code}</span>
@@ -146,8 +272,9 @@ document.addEventListener('DOMContentLoaded', function() {
             selectedCourses.splice(index, 1);
             totalCredits -= credits;
             updateTotalCredits();
-            renderCourseTable(elements.searchField.value.toLowerCase());
+            syncCheckboxes();
             updateSelectedCourses();
+            updateTimetable(courseCode, false);
             showMessage(`${courseCode} removed from selection.`, 'success');
         }
     };
@@ -157,7 +284,8 @@ document.addEventListener('DOMContentLoaded', function() {
         selectedCourses = [];
         totalCredits = 0;
         updateTotalCredits();
-        renderCourseTable(elements.searchField.value.toLowerCase());
+        syncCheckboxes();
+        timetableData = timetableDays = dataVersion = null;
         elements.timetableContainer.innerHTML = '';
         elements.downloadOptions.style.display = 'none';
         elements.selectedCoursesContainer.style.display = 'none';
@@ -174,9 +302,10 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Generate timetable
-    function generateTimetable() {
+    function generateTimetable(scroll = true) {
         updateSelectedCourses();
-        elements.timetableContainer.innerHTML = '<div class="loader" style="display:block;"></div>';
+        dataVersion = null;
+        if (scroll) elements.timetableContainer.innerHTML = '<div class="loader" style="display:block;"></div>';
         
         fetch('/api/timetable', {
             method: 'POST',
@@ -190,10 +319,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
-            timetableData = data;
+            timetableData = timetableDays = data;
             renderTimetable(data);
             elements.downloadOptions.style.display = 'flex';
-            scrollToTop();
+            if (scroll) scrollToTop();
         })
         .catch(() => {
             showMessage('Failed to generate timetable.', 'error');
@@ -223,7 +352,7 @@ document.addEventListener('DOMContentLoaded', function() {
                             <td class="time-slot">${timeSlot}</td>
                             ${dayKeys.map(dayKey => {
                                 const courseEntry = (data[dayKey] || []).find(entry => entry.time === timeSlot);
-                                return `<td>${courseEntry ? formatCourseCell(courseEntry.class) : ''}</td>`;
+                                return `<td data-day="${dayKey}" data-time="${timeSlot}">${courseEntry ? formatCourseCell(courseEntry.class) : ''}</td>`;
                             }).join('')}
                         </tr>
                     `).join('')}
@@ -255,45 +384,45 @@ document.addEventListener('DOMContentLoaded', function() {
             .catch(() => showMessage('Failed to generate image.', 'error'));
     };
     
-    window.generateTimetableExcel = function() {
-        if (!timetableData) return showMessage('Generate timetable first.', 'error');
-        
-        const data = formatTableData();
-        const wb = XLSX.utils.book_new();
-        const ws = XLSX.utils.aoa_to_sheet(data);
-        XLSX.utils.book_append_sheet(wb, ws, "Timetable");
-        XLSX.writeFile(wb, `Timetable_${getTimestamp()}.xlsx`);
-        showMessage('Excel downloaded!', 'success');
-    };
+    window.generateTimetableExcel = () => downloadExport('xlsx', 'Excel');
+    window.generateTimetableCSV = () => downloadExport('csv', 'CSV');
+    window.generateTimetableCalendar = () => downloadExport('ics', 'Calendar');
     
-    window.generateTimetableCSV = function() {
-        if (!timetableData) return showMessage('Generate timetable first.', 'error');
-        
-        const data = formatTableData();
-        const csv = data.map(row => row.map(cell => 
-            cell.includes(',') ? `"${cell}"` : cell
-        ).join(',')).join('\n');
-        
-        downloadFile(`data:text/csv;charset=utf-8,${encodeURIComponent(csv)}`, 'csv');
-        showMessage('CSV downloaded!', 'success');
+    window.generateTimetableLink = function() {
+        fetch('/api/permalink', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ courses: selectedCourses })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) return showMessage(data.error, 'error');
+            
+            const url = new URL(data.url, window.location.origin).href;
+            history.replaceState(null, '', data.url);
+            const copied = navigator.clipboard ? navigator.clipboard.writeText(url) : Promise.reject();
+            copied
+                .then(() => showMessage('Link copied to clipboard!', 'success'))
+                .catch(() => showMessage(`Share this link: ${url}`, 'success'));
+        })
+        .catch(() => showMessage('Failed to create link.', 'error'));
     };
     
     // Helper functions
-    function formatTableData() {
-        const timeSlots = [...new Set(Object.values(timetableData).flat().map(entry => entry.time))]
-            .sort((a, b) => parseInt(a.split(':')[0]) - parseInt(b.split(':')[0]));
-        
-        const header = ['Time', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'];
-        const rows = timeSlots.map(timeSlot => {
-            const row = [timeSlot];
-            ['monday', 'tuesday', 'wednesday', 'thursday', 'friday'].forEach(day => {
-                const course = (timetableData[day] || []).find(entry => entry.time === timeSlot);
-                row.push(course ? course.class : '');
-            });
-            return row;
-        });
+    function downloadExport(format, label) {
+        if (!timetableData) return showMessage('Generate timetable first.', 'error');
         
-        return [header, ...rows];
+        const params = new URLSearchParams({ format });
+        selectedCourses.forEach(code => params.append('courses', code));
+        fetch(`/api/timetable/export?${params}`)
+            .then(response => response.ok
+                ? response.blob()
+                : response.json().then(data => Promise.reject(new Error(data.error))))
+            .then(blob => {
+                downloadFile(URL.createObjectURL(blob), format);
+                showMessage(`${label} downloaded!`, 'success');
+            })
+            .catch(error => showMessage(error.message || 'Failed to export timetable.', 'error'));
     }
     
     function downloadFile(url, extension) {
@@ -0,0 +1,99 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from datastore import TIME_SLOTS_FILE, TIMETABLE_FILE, DataStore
+
+TERM_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+logger = logging.getLogger(__name__)
+
+
+class TermRegistry:
+    """Lazily loaded data stores of the terms under ``root``.
+
+    Every term is a directory ``<root>/<term>/`` holding its own
+    ``Time Slots.csv`` and processed timetable (plus the compiled snapshot
+    from ``csv-filter.py --term``). A term's ``DataStore`` is only built when
+    the term is first requested. At most ``max_loaded`` terms stay loaded,
+    least recently used first out, and terms idle for more than
+    ``idle_seconds`` are dropped on the next access to any term.
+    """
+
+    def __init__(self, root, max_loaded=4, idle_seconds=3600.0, check_interval=30.0):
+        self.root = root
+        self.max_loaded = max(1, max_loaded)
+        self.idle_seconds = idle_seconds
+        self.check_interval = check_interval
+        self.loads = 0
+        self.evictions = 0
+        self._stores = OrderedDict()
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def paths(self, term):
+        directory = os.path.join(self.root, term)
+        return (
+            os.path.join(directory, TIME_SLOTS_FILE),
+            os.path.join(directory, TIMETABLE_FILE),
+        )
+
+    def exists(self, term):
+        return bool(TERM_NAME.match(term)) and all(
+            os.path.isfile(path) for path in self.paths(term)
+        )
+
+    def available(self):
+        """Names of every term with its data files in place, sorted"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(name for name in names if self.exists(name))
+
+    def loaded(self):
+        with self._lock:
+            return list(self._stores)
+
+    def get(self, term):
+        """The term's ``DataStore``, loading it if needed; None for unknown terms"""
+        now = time.monotonic()
+        with self._lock:
+            store = self._stores.get(term)
+            if store is not None:
+                self._stores.move_to_end(term)
+                self._last_used[term] = now
+                self._evict(now)
+                return store
+
+        if not self.exists(term):
+            return None
+
+        with self._lock:
+            # Another request may have loaded it meanwhile
+            store = self._stores.get(term)
+            if store is None:
+                time_slots_path, timetable_path = self.paths(term)
+                store = DataStore(
+                    time_slots_path, timetable_path, check_interval=self.check_interval
+                )
+                self._stores[term] = store
+                self.loads += 1
+                logger.info("Loaded term %s (%s)", term, store.snapshot.version)
+            self._stores.move_to_end(term)
+            self._last_used[term] = now
+            self._evict(now)
+            return store
+
+    def _evict(self, now):
+        """Drop idle terms and the least recently used ones beyond the limit"""
+        for term in list(self._stores):
+            idle = now - self._last_used[term] > self.idle_seconds
+            if len(self._stores) > self.max_loaded or idle:
+                del self._stores[term]
+                del self._last_used[term]
+                self.evictions += 1
+                logger.info("Unloaded term %s", term)
@@ -1,22 +1,37 @@
+import gzip
 import json
+from datetime import date
 from unittest.mock import patch
 
 import pandas as pd
 import pytest
 
+import app as app_module
 from app import app, clean_course_info, create_timetable
+from datastore import build_snapshot, table_from_frame
+from demand import DemandRecorder
+from terms import TermRegistry
+
+
+def patch_snapshot(time_slots, timetable_data):
+    """Serve a snapshot built from the given DataFrames."""
+    snapshot = build_snapshot(
+        table_from_frame(time_slots), table_from_frame(timetable_data), "test", 0
+    )
+    return patch.object(app_module.store, "snapshot", snapshot)
 
 
 @pytest.fixture
 def client():
     """Create a test client for the Flask application."""
     app.config["TESTING"] = True
-    with app.test_client() as client:
+    app_module.timetable_cache.clear()
+    recorder = DemandRecorder("", background=False)
+    with patch.object(app_module, "demand", recorder), app.test_client() as client:
         yield client
 
 
-@pytest.fixture
-def sample_timetable_data():
+def sample_timetable_frame():
     """Sample timetable data for testing."""
     return pd.DataFrame(
         {
@@ -37,6 +52,12 @@ def sample_timetable_data():
     )
 
 
+@pytest.fixture
+def sample_timetable_data():
+    """Sample timetable data for testing."""
+    return sample_timetable_frame()
+
+
 @pytest.fixture
 def sample_time_slots():
     """Sample time slots data for testing."""
@@ -94,40 +115,73 @@ class TestFlaskRoutes:
         assert response.status_code == 200
         assert b"html" in response.data or b"<!DOCTYPE" in response.data.lower()
 
-    @patch("app.timetable_data")
-    def test_get_courses_success(self, mock_timetable_data, client):
+    def test_get_courses_success(self, client):
         """Test successful retrieval of courses."""
-        mock_timetable_data.iterrows.return_value = [
-            (0, {"Course Code": "CS101", "Course Name": "Programming", "Credit": 3}),
-            (1, {"Course Code": "MATH201", "Course Name": "Calculus", "Credit": 4}),
-        ]
-
-        with patch("app.time_slots") as mock_time_slots:
-            mock_time_slots.empty = False
-            mock_time_slots.columns = ["Monday", "Tuesday", "Wednesday"]
+        courses = pd.DataFrame(
+            {
+                "Course Code": ["CS101", "MATH201", "HS 3XX"],
+                "Course Name": ["Programming", "Calculus", "HSS Elective"],
+                "Credit": [3, 4, float("nan")],
+            }
+        )
+        time_slots = pd.DataFrame(
+            {
+                "Time Slot": ["08:00-09:00", "09:00-10:00"],
+                "Monday": ["T1", "T2"],
+                "Tuesday": ["T3", "T4"],
+            }
+        )
 
-            with patch("app.time_labels", ["08:00-09:00", "09:00-10:00"]):
-                response = client.get("/api/courses")
-                assert response.status_code == 200
+        with patch_snapshot(time_slots, courses):
+            response = client.get("/api/courses")
+            assert response.status_code == 200
 
-                data = json.loads(response.data)
-                assert "courses" in data
-                assert "days" in data
-                assert "timeLabels" in data
-                assert len(data["courses"]) == 2
-                assert data["courses"][0]["code"] == "CS101"
+            data = json.loads(response.data)
+            assert "courses" in data
+            assert "days" in data
+            assert "timeLabels" in data
+            assert len(data["courses"]) == 2
+            assert data["courses"][0]["code"] == "CS101"
 
     def test_get_courses_error_handling(self, client):
         """Test error handling in get_courses route."""
-        with patch("app.timetable_data") as mock_data:
-            mock_data.iterrows.side_effect = Exception("Database error")
-
+        with patch.object(
+            app_module.store,
+            "snapshot",
+            app_module.store.snapshot._replace(courses_payload={}),
+        ):
             response = client.get("/api/courses")
             assert response.status_code == 500
 
             data = json.loads(response.data)
             assert "error" in data
 
+    def test_get_courses_conditional_request(self, client):
+        """Test that a matching If-None-Match is answered with 304."""
+        response = client.get("/api/courses")
+        etag = response.headers["ETag"]
+        assert response.headers["Last-Modified"]
+
+        cached = client.get("/api/courses", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.data == b""
+
+        stale = client.get("/api/courses", headers={"If-None-Match": '"stale"'})
+        assert stale.status_code == 200
+
+    def test_get_courses_gzip(self, client):
+        """Test that the pre-compressed gzip variant is negotiated."""
+        payload = app_module.store.snapshot.courses_payload
+        with patch.dict(payload["encodings"]) as encodings:
+            encodings.pop("br", None)
+            plain = client.get("/api/courses")
+            response = client.get("/api/courses", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert response.headers["ETag"] != plain.headers["ETag"]
+        assert gzip.decompress(response.data) == plain.data
+
     def test_get_timetable_no_courses(self, client):
         """Test timetable generation with no courses selected."""
         response = client.post(
@@ -146,33 +200,77 @@ class TestFlaskRoutes:
         response = client.post("/api/timetable")
         assert response.status_code == 400
 
-    @patch("app.create_timetable")
-    @patch("app.time_labels", ["08:00-09:00", "09:00-10:00"])
-    def test_get_timetable_success(self, mock_create_timetable, client):
+    def test_get_timetable_success(self, client):
         """Test successful timetable generation."""
-        mock_timetable = pd.DataFrame(
+        time_slots = pd.DataFrame(
             {
-                "Monday": ["CS101\nProgramming\nLecture\nRoom 101", ""],
-                "Tuesday": ["", "MATH201\nCalculus\nTutorial\nRoom 202"],
+                "Time Slot": ["08:00-09:00", "09:00-10:00"],
+                "Monday": ["T1", "T2"],
+                "Tuesday": ["T3", "T4"],
             }
         )
-        mock_create_timetable.return_value = mock_timetable
-
-        response = client.post(
-            "/api/timetable",
-            data=json.dumps({"courses": ["CS101", "MATH201"]}),
-            content_type="application/json",
+        courses = pd.DataFrame(
+            {
+                "Course Code": ["CS101", "MATH201"],
+                "Course Name": ["Programming", "Calculus"],
+                "Lecture Time": ["T1", ""],
+                "Tutorial Time": ["", "T4"],
+                "Lecture Location": ["Room 101", ""],
+                "Tutorial Location": ["", "Room 202"],
+            }
         )
 
+        with patch_snapshot(time_slots, courses):
+            response = client.post(
+                "/api/timetable",
+                data=json.dumps({"courses": ["CS101", "MATH201"]}),
+                content_type="application/json",
+            )
+
         assert response.status_code == 200
         data = json.loads(response.data)
-        assert isinstance(data, dict)
-        assert len(data) > 0
+        assert data == {
+            "monday": [
+                {"time": "08:00-09:00", "class": "Programming, Lecture, Room 101"}
+            ],
+            "tuesday": [
+                {"time": "09:00-10:00", "class": "Calculus, Tutorial, Room 202"}
+            ],
+        }
+
+    def test_get_timetable_cached(self, client, sample_time_slots):
+        """Test that equivalent selections are served from the cache."""
+        hits = app_module.timetable_cache.hits
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            first = client.post(
+                "/api/timetable", json={"courses": ["CS101", "MATH201"]}
+            )
+            with patch("app.timetable_by_day") as mock_timetable_by_day:
+                second = client.post(
+                    "/api/timetable",
+                    json={"courses": ["MATH201", "CS101", "CS101", "XX999"]},
+                )
+                mock_timetable_by_day.assert_not_called()
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert first.data == second.data
+        stats = client.get("/api/stats/cache").get_json()["timetable"]
+        assert stats["hits"] == hits + 1
 
-    @patch("app.create_timetable")
-    def test_get_timetable_error_handling(self, mock_create_timetable, client):
+    def test_get_timetable_cache_invalidated_on_reload(self, client, sample_time_slots):
+        """Test that swapping in new data empties the timetable cache."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            client.post("/api/timetable", json={"courses": ["CS101"]})
+            assert len(app_module.timetable_cache) == 1
+
+            app_module.store.swap(app_module.store.snapshot)
+            assert len(app_module.timetable_cache) == 0
+
+    @patch("app.timetable_by_day")
+    def test_get_timetable_error_handling(self, mock_timetable_by_day, client):
         """Test error handling in timetable generation."""
-        mock_create_timetable.side_effect = Exception("Timetable generation error")
+        mock_timetable_by_day.side_effect = Exception("Timetable generation error")
 
         response = client.post(
             "/api/timetable",
@@ -188,80 +286,106 @@ class TestFlaskRoutes:
 class TestCreateTimetable:
     """Test cases for the create_timetable function."""
 
-    @patch("app.timetable_data")
-    @patch("app.time_slots")
-    def test_create_timetable_basic(self, mock_time_slots, mock_timetable_data):
+    def test_create_timetable_basic(self, sample_time_slots, sample_timetable_data):
         """Test basic timetable creation."""
-        mock_timetable_data.iterrows.return_value = [
-            (
-                0,
-                {
-                    "Course Code": "CS101",
-                    "Course Name": "Programming",
-                    "Lecture Time": "T1,T2",
-                    "Tutorial Time": "T3",
-                    "Lab Time": "",
-                    "Lecture Location": "Room 101",
-                    "Tutorial Location": "Room 102",
-                    "Lab Location": "",
-                },
+        with patch_snapshot(sample_time_slots, sample_timetable_data):
+            result = create_timetable(["CS101"])
+
+        assert isinstance(result, list)
+        assert len(result) == 3
+        assert result[0][1] == "CS101\nIntro to Computer Science\nLecture\nRoom 101"
+        assert result[1][1] == "CS101\nIntro to Computer Science\nLecture\nRoom 101"
+        assert result[1][2] == "CS101\nIntro to Computer Science\nTutorial\nRoom 104"
+        assert result[0][2] == "T4"
+
+    def test_create_timetable_clash_detection(self, sample_time_slots):
+        """Test timetable creation with class clashes."""
+        timetable_data = pd.DataFrame(
+            {
+                "Course Code": ["CS101", "MATH201"],
+                "Course Name": ["Programming", "Calculus"],
+                "Lecture Time": ["T1", "T1"],
+                "Tutorial Time": ["", ""],
+                "Lab Time": ["", ""],
+                "Lecture Location": ["Room 101", "Room 202"],
+                "Tutorial Location": ["", ""],
+                "Lab Location": ["", ""],
+            }
+        )
+
+        with patch_snapshot(sample_time_slots, timetable_data):
+            result = create_timetable(["MATH201", "CS101"])
+
+        assert result[0][1] == "CS101/ MATH201\n(Clash)"
+
+    def test_create_timetable_half_semesters(self, sample_time_slots):
+        """Test that courses in different semester halves share a cell."""
+        timetable_data = pd.DataFrame(
+            {
+                "Course Code": ["MA205", "MA206"],
+                "Course Name": ["Calculus (First half)", "Algebra (Second half)"],
+                "Lecture Time": ["T1", "T1"],
+            }
+        )
+
+        with patch_snapshot(sample_time_slots, timetable_data):
+            result = create_timetable(["MA206", "MA205"])
+
+        assert result[0][1] == "MA205/ MA206\nHalf semester"
+
+    def test_timetable_api_marks_half_semesters(self, client, sample_time_slots):
+        """Test that cleaned cells tell semester halves from clashes."""
+        timetable_data = pd.DataFrame(
+            {
+                "Course Code": ["MA205", "MA206", "CS101", "CS102"],
+                "Course Name": [
+                    "Calculus (First half)",
+                    "Algebra (Second half)",
+                    "Programming",
+                    "Data Structures",
+                ],
+                "Lecture Time": ["T1", "T1", "T2", "T2"],
+            }
+        )
+
+        with patch_snapshot(sample_time_slots, timetable_data):
+            response = client.post(
+                "/api/timetable",
+                json={"courses": ["MA205", "MA206", "CS101", "CS102"]},
             )
+
+        assert json.loads(response.data)["monday"] == [
+            {"time": "08:00-09:00", "class": "MA205/ MA206, Half semester"},
+            {"time": "09:00-10:00", "class": "CS101/ CS102"},
         ]
 
-        mock_time_slots_df = pd.DataFrame(
-            {"Monday": ["T1", "T2", "T3"], "Tuesday": ["T4", "T5", "T6"]}
-        )
-        mock_time_slots.copy.return_value = mock_time_slots_df
-        mock_time_slots.columns = ["Monday", "Tuesday"]
-
-        result = create_timetable(["CS101"])
-        assert isinstance(result, pd.DataFrame)
-        assert "Monday" in result.columns
-        assert "Tuesday" in result.columns
-
-    @patch("app.timetable_data")
-    @patch("app.time_slots")
-    def test_create_timetable_clash_detection(
-        self, mock_time_slots, mock_timetable_data
+    def test_create_timetable_ignores_unknown_courses(
+        self, sample_time_slots, sample_timetable_data
     ):
-        """Test timetable creation with class clashes."""
-        mock_timetable_data.iterrows.return_value = [
-            (
-                0,
-                {
-                    "Course Code": "CS101",
-                    "Course Name": "Programming",
-                    "Lecture Time": "T1",
-                    "Tutorial Time": "",
-                    "Lab Time": "",
-                    "Lecture Location": "Room 101",
-                    "Tutorial Location": "",
-                    "Lab Location": "",
-                },
-            ),
-            (
-                1,
-                {
-                    "Course Code": "MATH201",
-                    "Course Name": "Calculus",
-                    "Lecture Time": "T1",
-                    "Tutorial Time": "",
-                    "Lab Time": "",
-                    "Lecture Location": "Room 202",
-                    "Tutorial Location": "",
-                    "Lab Location": "",
-                },
-            ),
-        ]
+        """Test that unknown or malformed course codes leave the grid untouched."""
+        with patch_snapshot(sample_time_slots, sample_timetable_data):
+            result = create_timetable(["XX999", {"code": "CS101"}])
+            assert result == [list(row) for row in app_module.store.snapshot.grid.rows]
 
-        mock_time_slots_df = pd.DataFrame({"Monday": ["T1", "T2", "T3"]})
-        mock_time_slots.copy.return_value = mock_time_slots_df
-        mock_time_slots.columns = ["Monday"]
+    def test_create_timetable_skips_nan_sessions(self, sample_time_slots):
+        """Test that missing session times from the CSV are ignored."""
+        timetable_data = pd.DataFrame(
+            {
+                "Course Code": ["PHY301"],
+                "Course Name": ["Quantum Physics"],
+                "Lecture Time": ["T4"],
+                "Tutorial Time": [float("nan")],
+                "Lab Time": [float("nan")],
+                "Lecture Location": [float("nan")],
+                "Tutorial Location": [float("nan")],
+                "Lab Location": [float("nan")],
+            }
+        )
 
-        result = create_timetable(["CS101", "MATH201"])
-        assert isinstance(result, pd.DataFrame)
-        monday_t1 = str(result.iloc[0]["Monday"])
-        assert "Clash" in monday_t1 or "/" in monday_t1
+        with patch_snapshot(sample_time_slots, timetable_data):
+            result = create_timetable(["PHY301"])
+
+        assert result[0][2] == "PHY301\nQuantum Physics\nLecture"
 
 
 class TestIntegration:
@@ -272,6 +396,11 @@ class TestIntegration:
         response = client.get("/")
         assert response.status_code == 200
 
+    def test_data_version_header(self, client):
+        """Test that responses carry the served data snapshot version."""
+        response = client.get("/api/courses")
+        assert response.headers["X-Data-Version"] == app_module.store.snapshot.version
+
     def test_cors_headers(self, client):
         """Test that CORS headers are properly set."""
         response = client.get("/api/courses")
@@ -279,12 +408,667 @@ class TestIntegration:
 
     def test_json_response_format(self, client):
         """Test that API endpoints return proper JSON."""
-        with patch("app.timetable_data") as mock_data:
-            mock_data.iterrows.return_value = []
-            mock_data.empty = True
-
+        with patch_snapshot(
+            pd.DataFrame(), pd.DataFrame(columns=["Course Code", "Credit"])
+        ):
             response = client.get("/api/courses")
             assert response.content_type == "application/json"
 
             data = json.loads(response.data)
             assert isinstance(data, dict)
+
+
+class TestBatchTimetable:
+    """Test cases for the batch timetable endpoint."""
+
+    def post_batch(self, client, payload):
+        response = client.post("/api/timetable/batch", json=payload)
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        return response, lines
+
+    def test_batch_matches_single_requests(self, client, sample_time_slots):
+        """Test that each line equals the corresponding /api/timetable result."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            response, lines = self.post_batch(
+                client,
+                {
+                    "selections": [
+                        ["CS101"],
+                        {"id": "student-2", "courses": ["MATH201", "PHY301"]},
+                    ]
+                },
+            )
+            single = client.post("/api/timetable", json={"courses": ["CS101"]})
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert lines[0] == {"index": 0, "timetable": json.loads(single.data)}
+        assert lines[1]["id"] == "student-2"
+        assert "tuesday" in lines[1]["timetable"]
+
+    def test_batch_reports_item_errors(self, client, sample_time_slots):
+        """Test that invalid selections produce an error line, not a failure."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            _, lines = self.post_batch(
+                client, {"selections": [[], {"id": 7}, ["CS101"]]}
+            )
+
+        assert lines[0] == {"index": 0, "error": "No courses selected"}
+        assert lines[1] == {"index": 1, "id": 7, "error": "No courses selected"}
+        assert "timetable" in lines[2]
+
+    def test_batch_parallel_preserves_order(self, client, sample_time_slots):
+        """Test that the thread pool fan-out keeps request order."""
+        codes = ["CS101", "MATH201", "PHY301"]
+        selections = [[codes[i % 3]] for i in range(100)]
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            _, serial = self.post_batch(client, {"selections": selections})
+            _, parallel = self.post_batch(
+                client, {"selections": selections, "parallel": True}
+            )
+
+        assert [line["index"] for line in parallel] == list(range(100))
+        assert parallel == serial
+
+    def test_batch_validation(self, client):
+        """Test rejection of missing, empty and oversized batches."""
+        assert client.post("/api/timetable/batch").status_code == 400
+        response = client.post("/api/timetable/batch", json={"selections": []})
+        assert response.status_code == 400
+
+        with patch("app.BATCH_LIMIT", 2):
+            response = client.post(
+                "/api/timetable/batch", json={"selections": [["A"], ["B"], ["C"]]}
+            )
+        assert response.status_code == 400
+
+
+class TestClashes:
+    """Test cases for the clash detection endpoint."""
+
+    def test_clashes_endpoint(self, client, sample_time_slots):
+        """Test that clashing courses and slots are reported."""
+        courses = sample_timetable_frame()
+        courses.loc[1, "Lecture Time"] = "T1"
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.post(
+                "/api/clashes", json={"courses": ["MATH201", "CS101", "XX999"]}
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["pairs"] == [{"courses": ["CS101", "MATH201"], "slots": ["T1"]}]
+        assert data["clashes"][0]["day"] == "Monday"
+
+    def test_clashes_validation(self, client):
+        """Test rejection of malformed requests."""
+        assert client.post("/api/clashes").status_code == 400
+        response = client.post("/api/clashes", json={"courses": "CS101"})
+        assert response.status_code == 400
+
+
+class TestPlanner:
+    """Test cases for the schedule planner endpoint."""
+
+    def test_planner_endpoint(self, client, sample_time_slots):
+        """Test that candidate electives are planned around required courses."""
+        courses = sample_timetable_frame()
+        courses["HSS/BS elective"] = [None, "BS", "BS"]
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.post(
+                "/api/planner",
+                json={"required": ["CS101"], "groups": ["BS"], "credits": 6},
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["schedules"][0]["courses"] == ["CS101", "PHY301"]
+        assert data["complete"] is True
+
+    def test_planner_required_clash(self, client, sample_time_slots):
+        """Test that clashing required courses are rejected."""
+        courses = sample_timetable_frame()
+        courses.loc[1, "Lecture Time"] = "T1"
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.post(
+                "/api/planner", json={"required": ["CS101", "MATH201"], "credits": 8}
+            )
+
+        assert response.status_code == 409
+        assert json.loads(response.data)["pairs"]
+
+    def test_planner_validation(self, client):
+        """Test rejection of malformed planner requests."""
+        assert client.post("/api/planner").status_code == 400
+        response = client.post("/api/planner", json={"required": ["CS101"]})
+        assert response.status_code == 400
+        response = client.post("/api/planner", json={"groups": "BS", "credits": 4})
+        assert response.status_code == 400
+        for bad in ({"limit": "ten"}, {"limit": None}, {"time_budget": [1]}):
+            response = client.post(
+                "/api/planner", json=dict(bad, required=["CS101"], credits=3)
+            )
+            assert response.status_code == 400
+
+    def test_planner_rejects_non_finite_credits(self, client):
+        """Test that NaN, infinite and boolean credit values are rejected."""
+        for body in (
+            '{"required": ["CS101"], "credits": NaN}',
+            '{"required": ["CS101"], "credits": Infinity}',
+            '{"required": ["CS101"], "credits": true}',
+            '{"required": ["CS101"], "credits": 3, "max_credits": NaN}',
+            '{"required": ["CS101"], "credits": 3, "max_credits": false}',
+        ):
+            response = client.post(
+                "/api/planner", data=body, content_type="application/json"
+            )
+            assert response.status_code == 400
+
+    def test_planner_required_over_cap(self, client, sample_time_slots):
+        """Test that required courses above max_credits are rejected, even at 0."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            for cap in (0, 1):
+                response = client.post(
+                    "/api/planner",
+                    json={"required": ["CS101"], "credits": 3, "max_credits": cap},
+                )
+                assert response.status_code == 409
+                assert json.loads(response.data)["credits"] > cap
+
+    def test_planner_clamps_limits(self, client, sample_time_slots):
+        """Test that non-positive limits and budgets are raised to a minimum."""
+        courses = sample_timetable_frame()
+        courses["HSS/BS elective"] = [None, "BS", "BS"]
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.post(
+                "/api/planner",
+                json={
+                    "required": ["CS101"],
+                    "groups": ["BS"],
+                    "credits": 6,
+                    "limit": -5,
+                    "time_budget": -1,
+                },
+            )
+
+        assert response.status_code == 200
+        assert len(json.loads(response.data)["schedules"]) == 1
+
+
+class TestInstrumentation:
+    """Test cases for the metrics and profiler endpoints."""
+
+    def test_metrics_endpoint(self, client, sample_time_slots):
+        """Test that request, stage, cache and data metrics are exposed."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            client.post("/api/timetable", json={"courses": ["CS101"]})
+            client.post("/api/timetable", json={"courses": ["CS101"]})
+            response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        text = response.get_data(as_text=True)
+        assert (
+            "timetable_request_duration_seconds_count"
+            '{route="/api/timetable",method="POST",status="200"}'
+        ) in text
+        for stage in ("create_timetable", "clean_course_info", "json_encode"):
+            assert f'timetable_stage_duration_seconds_count{{stage="{stage}"}}' in text
+        assert 'timetable_cache_hits_total{cache="timetable"}' in text
+        assert 'timetable_data_info{version="test"} 1' in text
+
+    def test_profiler_disabled_by_default(self, client):
+        """Test that the profiler cannot be driven unless enabled."""
+        assert client.get("/api/debug/profiler").status_code == 404
+        response = client.post("/api/debug/profiler", json={"enabled": True})
+        assert response.status_code == 404
+        assert not app_module.profiler.running
+
+    def test_profiler_toggle(self, client):
+        """Test starting, reading and stopping the profiler at runtime."""
+        with patch("app.PROFILER_CONTROL", True):
+            response = client.post(
+                "/api/debug/profiler",
+                json={"enabled": True, "interval": 0.001, "reset": True},
+            )
+            assert response.status_code == 200
+            assert json.loads(response.data)["running"] is True
+
+            client.get("/api/courses")
+            response = client.post("/api/debug/profiler", json={"enabled": False})
+            assert json.loads(response.data)["running"] is False
+
+            data = json.loads(client.get("/api/debug/profiler?limit=5").data)
+            assert len(data["top"]) <= 5
+            response = client.get("/api/debug/profiler?format=collapsed")
+            assert response.mimetype == "text/plain"
+
+            response = client.post("/api/debug/profiler", json={"interval": 5})
+            assert response.status_code == 400
+
+
+class TestExport:
+    """Test cases for the timetable download endpoint."""
+
+    def test_csv_export_is_cached(self, client, sample_time_slots):
+        """Test a CSV download and that the second one is served from cache."""
+        app_module.export_cache.clear()
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            url = "/api/timetable/export?format=csv&courses=CS101,MATH201"
+            first = client.get(url)
+            # Streamed bodies are cached once fully sent
+            assert first.data.startswith(b"Time,Monday")
+            second = client.get(url)
+
+        assert first.status_code == 200
+        assert first.mimetype == "text/csv"
+        assert "Timetable.csv" in first.headers["Content-Disposition"]
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+        assert second.data == first.data
+
+    def test_post_ics_export(self, client, sample_time_slots):
+        """Test an iCalendar download requested with a JSON body."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            response = client.post(
+                "/api/timetable/export",
+                json={
+                    "format": "ics",
+                    "courses": ["CS101"],
+                    "start": "2026-07-27",
+                    "end": "2026-11-20",
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/calendar"
+        assert b"SUMMARY:CS101 Lecture" in response.data
+
+    def test_export_validation(self, client):
+        """Test rejection of unknown formats, empty selections and bad dates."""
+        responses = [
+            client.get("/api/timetable/export?format=pdf&courses=CS101"),
+            client.get("/api/timetable/export?format=csv"),
+            client.get("/api/timetable/export?format=ics&courses=CS101&start=soon"),
+            client.get(
+                "/api/timetable/export?format=ics&courses=CS101"
+                "&start=2026-12-01&end=2026-07-01"
+            ),
+            client.post(
+                "/api/timetable/export", json={"format": ["ics"], "courses": ["CS101"]}
+            ),
+        ]
+
+        assert [response.status_code for response in responses] == [400] * 5
+
+    def test_ics_export_default_semester(self, client, sample_time_slots):
+        """Test that ICS exports without dates span the current semester."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()), patch(
+            "app.date"
+        ) as fake_date:
+            fake_date.today.return_value = date(2026, 10, 17)
+            fake_date.fromisoformat = date.fromisoformat
+            response = client.get("/api/timetable/export?format=ics&courses=CS101")
+
+        assert response.status_code == 200
+        assert b"DTSTART:20260803T080000" in response.data
+        assert b"UNTIL=20261130T235959" in response.data
+
+    def test_calendar_button_hidden_without_semester(self, client):
+        """Test that the Calendar button is hidden when the dates are invalid."""
+        button = 'id="download-calendar"'
+        assert f"{button}>" in client.get("/").get_data(as_text=True)
+        with patch("app.SEMESTER_START", "2026-08-01"), patch(
+            "app.SEMESTER_END", "later"
+        ):
+            page = client.get("/").get_data(as_text=True)
+        assert f"{button} hidden>" in page
+
+
+class TestPermalink:
+    """Test cases for shareable timetable links."""
+
+    def test_shared_page_is_prefilled(self, client, sample_time_slots):
+        """Test that a created link renders the timetable into the page."""
+        app_module.permalink_cache.clear()
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            created = client.post(
+                "/api/permalink", json={"courses": ["PHY301", "CS101", "NOPE"]}
+            )
+            first = client.get(created.get_json()["url"])
+            second = client.get(created.get_json()["url"])
+
+        assert created.get_json() == {"token": "dYKJBQ", "url": "/t/dYKJBQ"}
+        assert first.status_code == 200
+        page = first.get_data(as_text=True)
+        assert '<span class="course-code">Intro to Computer Science</span>' in page
+        assert '<span class="course-type">Lab 303</span>' in page
+        assert '<span id="total-credits">6</span>' in page
+        assert '"courses": ["CS101", "PHY301"]' in page
+        assert '"name": "Quantum Physics"' in page
+        assert second.data == first.data
+        assert app_module.permalink_cache.stats()["hits"] == 1
+
+    def test_invalid_links(self, client):
+        """Test malformed tokens and empty selections."""
+        assert client.get("/t/not*valid").status_code == 404
+        # A link made before the course list changed is refused, not misread
+        stale = client.get("/t/AAAABQ")
+        assert stale.status_code == 404
+        assert b"different course list" in stale.data
+        assert client.post("/api/permalink", json={"courses": []}).status_code == 400
+        assert client.post("/api/permalink", data="x").status_code == 400
+
+
+class TestTerms:
+    """Test cases for the term-scoped API."""
+
+    @pytest.fixture
+    def registry(self, tmp_path, sample_time_slots):
+        term = tmp_path / "2024-II"
+        term.mkdir()
+        sample_time_slots.to_csv(term / "Time Slots.csv", index=False)
+        sample_timetable_frame().to_csv(
+            term / "Updated_Processed_Timetable.csv", index=False
+        )
+        registry = TermRegistry(str(tmp_path))
+        with patch.object(app_module, "terms", registry):
+            yield registry
+
+    def test_term_routes(self, client, registry):
+        """Test that term routes serve the term's own catalogue."""
+        assert client.get("/api/terms").get_json() == {
+            "terms": ["2024-II"],
+            "loaded": [],
+        }
+
+        courses = client.get("/api/2024-II/courses")
+        timetable = client.post("/api/2024-II/timetable", json={"courses": ["CS101"]})
+
+        assert [c["code"] for c in courses.get_json()["courses"]] == [
+            "CS101",
+            "MATH201",
+            "PHY301",
+        ]
+        assert courses.headers["X-Data-Version"] != app_module.store.snapshot.version
+        assert timetable.get_json()["monday"][0]["time"] == "08:00-09:00"
+        assert registry.loaded() == ["2024-II"]
+
+    def test_unknown_term(self, client, registry):
+        """Test that unknown terms are a JSON 404."""
+        response = client.post("/api/2019-I/timetable", json={"courses": ["CS101"]})
+
+        assert response.status_code == 404
+        assert response.get_json() == {"error": "Unknown term: 2019-I"}
+        assert client.get("/api/../courses").status_code == 404
+
+
+class TestSearch:
+    """Test cases for the course search endpoint."""
+
+    def test_search(self, client, sample_time_slots):
+        """Test ranked, paginated results and their cache."""
+        app_module.search_cache.clear()
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            first = client.get("/api/courses/search?q=Calc&limit=5")
+            second = client.get("/api/courses/search?q=calc")
+            third = client.get("/api/courses/search?q=CALC&limit=5")
+            page = client.get("/api/courses/search?offset=1&limit=1")
+
+        assert first.get_json() == {
+            "query": "calc",
+            "total": 1,
+            "offset": 0,
+            "limit": 5,
+            "courses": [
+                {
+                    "code": "MATH201",
+                    "name": "Calculus II",
+                    "credits": 4.0,
+                    "instructors": [],
+                }
+            ],
+        }
+        assert [first.headers["X-Cache"], second.headers["X-Cache"]] == ["MISS"] * 2
+        assert third.headers["X-Cache"] == "HIT"
+        assert page.get_json()["total"] == 3
+        assert [c["code"] for c in page.get_json()["courses"]] == ["MATH201"]
+
+    def test_invalid_paging(self, client):
+        """Test that bad offsets and limits are rejected."""
+        assert client.get("/api/courses/search?limit=x").status_code == 400
+        assert client.get("/api/courses/search?limit=101").status_code == 400
+        assert client.get("/api/courses/search?offset=-1").status_code == 400
+
+
+class TestRooms:
+    """Test cases for the room endpoints."""
+
+    def test_room_schedule(self, client, sample_time_slots):
+        """Test a room's weekly timetable, looked up by any spelling."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            response = client.get("/api/rooms/room%20101/schedule")
+            missing = client.get("/api/rooms/Room%20999/schedule")
+
+        assert response.get_json() == {
+            "room": "Room 101",
+            "timetable": {
+                "monday": [
+                    {
+                        "time": "08:00-09:00",
+                        "class": "Intro to Computer Science, Lecture, Room 101",
+                    },
+                    {
+                        "time": "09:00-10:00",
+                        "class": "Intro to Computer Science, Lecture, Room 101",
+                    },
+                ]
+            },
+        }
+        assert missing.status_code == 404
+
+    def test_free_rooms(self, client, sample_time_slots):
+        """Test the rooms free in every period of a slot."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            rooms = client.get("/api/rooms").get_json()["rooms"]
+            free = client.get("/api/rooms/free?slot=T1,T4").get_json()
+            unknown = client.get("/api/rooms/free?slot=Z9")
+
+        assert free["periods"][1] == {
+            "slot": "T4",
+            "day": "Tuesday",
+            "time": "08:00-09:00",
+        }
+        assert free["rooms"] == [r for r in rooms if r not in ("Room 101", "Lab 303")]
+        assert unknown.status_code == 404
+        assert client.get("/api/rooms/free").status_code == 400
+
+    def test_double_bookings(self, client, sample_time_slots):
+        """Test that rooms booked by two courses at once are reported."""
+        courses = sample_timetable_frame()
+        courses.loc[1, "Lecture Time"] = "T1"
+        courses.loc[1, "Lecture Location"] = "room 101"
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.get("/api/rooms/double-bookings")
+
+        assert response.get_json() == {
+            "double_bookings": [
+                {
+                    "room": "Room 101",
+                    "slot": "T1",
+                    "day": "Monday",
+                    "time": "08:00-09:00",
+                    "courses": ["CS101", "MATH201"],
+                }
+            ]
+        }
+
+
+class TestInstructors:
+    """Test cases for the instructor endpoints."""
+
+    def test_instructor_timetable(self, client, sample_time_slots):
+        """Test an instructor's courses and the sessions of their roles."""
+        courses = sample_timetable_frame()
+        courses["Instructors"] = ["Ada Lovelace (I)", "ada lovelace (T)", ""]
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.get("/api/instructors/Ada%20Lovelace/timetable")
+            missing = client.get("/api/instructors/Nobody/timetable")
+            names = client.get("/api/instructors").get_json()
+
+        data = response.get_json()
+        assert names == {"instructors": ["Ada Lovelace"]}
+        assert data["courses"] == [
+            {
+                "code": "CS101",
+                "name": "Intro to Computer Science",
+                "roles": ["Lecture"],
+            },
+            {"code": "MATH201", "name": "Calculus II", "roles": ["Tutorial"]},
+        ]
+        assert [entry["class"] for entry in data["timetable"]["tuesday"]] == [
+            "Calculus II, Tutorial, Room 205"
+        ]
+        assert len(data["timetable"]["monday"]) == 2
+        assert missing.status_code == 404
+
+    def test_instructor_clashes(self, client, sample_time_slots):
+        """Test the clash report of the whole faculty."""
+        courses = sample_timetable_frame()
+        courses["Instructors"] = ["Ada Lovelace", "Ada Lovelace (T)", "Ada Lovelace"]
+        courses.loc[1, "Tutorial Time"] = "T2"
+        with patch_snapshot(sample_time_slots, courses):
+            response = client.get("/api/instructors/clashes")
+
+        assert response.get_json() == {
+            "clashes": [
+                {
+                    "instructor": "Ada Lovelace",
+                    "slot": "T2",
+                    "day": "Monday",
+                    "time": "09:00-10:00",
+                    "courses": ["CS101", "MATH201"],
+                }
+            ]
+        }
+
+
+class TestTimetableDelta:
+    """Test cases for the add/remove-one-course delta endpoint."""
+
+    def test_add_and_remove(self, client, sample_time_slots):
+        """Test that only the toggled course's cells and clashes are returned."""
+        courses = sample_timetable_frame()
+        courses.loc[1, "Lecture Time"] = "T1"
+        with patch_snapshot(sample_time_slots, courses):
+            added = client.post(
+                "/api/timetable/delta", json={"courses": ["CS101"], "add": "MATH201"}
+            ).get_json()
+            removed = client.post(
+                "/api/timetable/delta",
+                json={"token": added["token"], "remove": "CS101", "version": "test"},
+            ).get_json()
+
+        assert added["courses"] == ["CS101", "MATH201"]
+        assert added["cells"][0] == {
+            "day": "monday",
+            "time": "08:00-09:00",
+            "class": "CS101/ MATH201",
+        }
+        assert len(added["cells"]) == 3
+        assert added["clashes"] == {
+            "added": [{"courses": ["CS101", "MATH201"], "slots": ["T1"]}],
+            "resolved": [],
+        }
+        assert removed["courses"] == ["MATH201"]
+        assert [cell["class"] for cell in removed["cells"]] == [
+            "Calculus II, Lecture, Room 202",
+            None,
+            None,
+        ]
+        assert removed["clashes"]["resolved"] == added["clashes"]["added"]
+
+    def test_matches_full_timetable(self, client, sample_time_slots):
+        """Test that applying every delta gives the full timetable."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            selection = []
+            cells = {}
+            for code, action in [
+                ("CS101", "add"),
+                ("PHY301", "add"),
+                ("CS101", "remove"),
+                ("MATH201", "add"),
+            ]:
+                delta = client.post(
+                    "/api/timetable/delta", json={"courses": selection, action: code}
+                ).get_json()
+                selection = delta["courses"]
+                for cell in delta["cells"]:
+                    cells[cell["day"], cell["time"]] = cell["class"]
+            full = client.post("/api/timetable", json={"courses": selection})
+
+        expected = {
+            (day, entry["time"]): entry["class"]
+            for day, entries in full.get_json().items()
+            for entry in entries
+        }
+        assert {key: value for key, value in cells.items() if value} == expected
+
+    def test_unchanged_and_invalid(self, client, sample_time_slots):
+        """Test no-op edits, stale versions and malformed requests."""
+        with patch_snapshot(sample_time_slots, sample_timetable_frame()):
+            noop = client.post(
+                "/api/timetable/delta", json={"courses": ["CS101"], "add": "CS101"}
+            )
+            stale = client.post(
+                "/api/timetable/delta",
+                json={"courses": [], "add": "CS101", "version": "old"},
+            )
+            both = client.post(
+                "/api/timetable/delta", json={"add": "CS101", "remove": "PHY301"}
+            )
+            unknown = client.post("/api/timetable/delta", json={"add": "XX999"})
+            bad_token = client.post(
+                "/api/timetable/delta", json={"token": "*", "add": "CS101"}
+            )
+
+        assert noop.get_json()["cells"] == []
+        assert stale.status_code == 409
+        assert stale.get_json()["version"] == "test"
+        assert both.status_code == 400
+        assert unknown.status_code == 400
+        assert bad_token.status_code == 400
+        assert client.post("/api/timetable/delta", data="x").status_code == 400
+
+
+class TestDemand:
+    """Test cases for the slot demand statistics endpoint."""
+
+    def test_demand_stats(self, client, sample_time_slots):
+        """Test that timetable requests are counted per slot and course pair."""
+        courses = sample_timetable_frame()
+        courses.loc[1, "Lecture Time"] = "T1"
+        with patch_snapshot(sample_time_slots, courses):
+            client.post("/api/timetable", json={"courses": ["CS101", "MATH201"]})
+            client.post("/api/timetable", json={"courses": ["CS101", "NOPE"]})
+            client.post("/api/timetable", json={"courses": ["PHY301", "CS101"]})
+            response = client.get("/api/stats/demand?limit=2&pair=MATH201,CS101")
+
+        data = response.get_json()
+        assert data["requests"] == 3
+        assert data["clash_requests"] == 1
+        assert data["slots"][0] == {"slot": "T1", "count": 3}
+        assert data["courses"][0] == {"code": "CS101", "count": 3}
+        assert data["pairs"] == [
+            {"courses": ["CS101", "MATH201"], "count": 1, "error": 0},
+            {"courses": ["CS101", "PHY301"], "count": 1, "error": 0},
+        ]
+        assert data["clash_pairs"] == [
+            {"courses": ["CS101", "MATH201"], "count": 1, "error": 0}
+        ]
+        assert data["pair"] == {"courses": ["CS101", "MATH201"], "estimate": 1}
+
+    def test_demand_stats_rejects_bad_arguments(self, client):
+        """Test that a malformed limit or pair is rejected."""
+        assert client.get("/api/stats/demand?limit=x").status_code == 400
+        assert client.get("/api/stats/demand?pair=CS101").status_code == 400
+        assert client.get("/api/stats/demand").get_json()["requests"] == 0
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import app as app_module
+import asgi
+
+
+def call(method, path, body=b"", query=b"", headers=()):
+    """Run one request through the ASGI app and collect the sent messages."""
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return requests.pop(0) if requests else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"content-type", b"application/json"), *headers],
+    }
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent
+
+
+def response_body(sent):
+    return b"".join(message.get("body", b"") for message in sent[1:])
+
+
+class TestAsgi:
+    """Test cases for serving the Flask app over ASGI."""
+
+    def test_get(self):
+        """Test status, headers and body of a plain GET."""
+        sent = call("GET", "/api/courses", headers=[(b"accept-encoding", b"gzip")])
+        headers = dict(sent[0]["headers"])
+
+        assert sent[0]["status"] == 200
+        assert headers[b"content-encoding"] == b"gzip"
+        assert headers[b"x-data-version"] == app_module.store.snapshot.version.encode()
+        assert sent[-1] == {"type": "http.response.body", "body": b""}
+
+    def test_post_matches_wsgi(self):
+        """Test that a POSTed timetable is identical to the WSGI response."""
+        codes = list(app_module.store.snapshot.courses)[:5]
+        body = json.dumps({"courses": codes}).encode()
+        expected = app_module.app.test_client().post(
+            "/api/timetable", data=body, content_type="application/json"
+        )
+
+        sent = call("POST", "/api/timetable", body=body)
+
+        assert sent[0]["status"] == 200
+        assert response_body(sent) == expected.data
+
+    def test_streamed_response(self):
+        """Test that a streamed NDJSON body arrives chunk by chunk."""
+        codes = list(app_module.store.snapshot.courses)[:3]
+        body = json.dumps({"selections": [codes, ["NOPE"], codes]}).encode()
+
+        sent = call("POST", "/api/timetable/batch", body=body)
+
+        lines = response_body(sent).decode().splitlines()
+        assert [json.loads(line)["index"] for line in lines] == [0, 1, 2]
+        assert len(sent) == 5
+
+    def test_query_string_and_errors(self):
+        """Test query parameters and error statuses pass through."""
+        sent = call("GET", "/api/timetable/export", query=b"format=pdf&courses=X")
+
+        assert sent[0]["status"] == 400
+        assert b"Format must be one of" in response_body(sent)
+
+    def test_lifespan(self):
+        """Test that startup and shutdown are acknowledged."""
+        events = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return events.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(asgi.app({"type": "lifespan"}, receive, send))
+
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,71 @@
+from cache import LRUCache
+
+
+class TestLRUCache:
+    """Test cases for the bounded LRU cache."""
+
+    def test_get_and_put(self):
+        """Test basic lookups and hit/miss counters."""
+        cache = LRUCache()
+        assert cache.get("a") is None
+
+        cache.put("a", b"one")
+        assert cache.get("a") == b"one"
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted first."""
+        cache = LRUCache(max_entries=2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+        assert cache.get("c") == b"3"
+        assert cache.evictions == 1
+
+    def test_byte_limit(self):
+        """Test that the cache stays under its memory cap."""
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.put("c", b"123")
+
+        assert len(cache) == 2
+        assert cache.size_bytes == 8
+        assert cache.get("a") is None
+
+    def test_oversized_value_is_not_cached(self):
+        """Test that a value larger than the cap is skipped."""
+        cache = LRUCache(max_bytes=4)
+        cache.put("a", b"12345")
+
+        assert len(cache) == 0
+        assert cache.evictions == 0
+
+    def test_replace_updates_size(self):
+        """Test that overwriting a key replaces its accounted size."""
+        cache = LRUCache()
+        cache.put("a", b"12345")
+        cache.put("a", b"12")
+
+        assert len(cache) == 1
+        assert cache.size_bytes == 2
+
+    def test_clear_and_stats(self):
+        """Test clearing the cache and the reported statistics."""
+        cache = LRUCache(max_entries=5, max_bytes=100)
+        cache.put("a", b"xyz")
+        cache.get("a")
+        cache.get("b")
+        cache.clear()
+
+        stats = cache.stats()
+        assert stats["entries"] == 0
+        assert stats["bytes"] == 0
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
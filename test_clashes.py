@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from clashes import cells_of, course_clashes, find_clashes, grid_size, iter_bits
+from datastore import build_snapshot, table_from_frame
+
+
+@pytest.fixture
+def snapshot():
+    time_slots = pd.DataFrame(
+        {
+            "Time Slot": ["08:00-09:00", "09:00-10:00"],
+            "Monday": ["A1", "B1"],
+            "Tuesday": ["A2", "B2"],
+        }
+    )
+    courses = pd.DataFrame(
+        {
+            "Course Code": ["CS101", "MA101", "PH101", "EE101", "MA201", "MA202"],
+            "Course Name": [
+                "Programming",
+                "Calculus",
+                "Physics",
+                "Circuits",
+                "Algebra (First half of Semester)",
+                "Geometry (Second half of Semester)",
+            ],
+            "Lecture Time": ["A1,A2", "A1", "A1,B2", "B1", "B2", "B2"],
+            "Tutorial Time": ["", "", "", "B1", "", ""],
+            "Lab Time": ["", "", "", "", "", ""],
+        }
+    )
+    return build_snapshot(
+        table_from_frame(time_slots), table_from_frame(courses), "test", 0
+    )
+
+
+class TestCourseMasks:
+    """Test cases for the precomputed slot bitmasks."""
+
+    def test_masks_cover_course_cells(self, snapshot):
+        """Test that each mask has one bit per occupied grid cell and half."""
+        size = grid_size(snapshot.grid)
+        mask = snapshot.course_masks["CS101"]
+        assert len(list(iter_bits(mask))) == 4
+        assert len(list(iter_bits(cells_of(mask, size)))) == 2
+        assert len(list(iter_bits(snapshot.course_masks["MA201"]))) == 1
+        assert snapshot.course_masks["MA101"] & snapshot.course_masks["CS101"]
+        assert not snapshot.course_masks["MA101"] & snapshot.course_masks["EE101"]
+
+    def test_self_clash(self, snapshot):
+        """Test that a course booking one slot twice is recorded."""
+        assert list(snapshot.self_clashes) == ["EE101"]
+
+
+class TestFindClashes:
+    """Test cases for clash detection."""
+
+    def test_no_clashes(self, snapshot):
+        """Test a clash-free selection."""
+        assert find_clashes(["CS101"], snapshot) == {
+            "clashes": [],
+            "pairs": [],
+        }
+
+    def test_n_way_clash(self, snapshot):
+        """Test that every course in a clashing slot is reported."""
+        result = find_clashes(["CS101", "MA101", "PH101"], snapshot)
+
+        assert result["clashes"] == [
+            {
+                "slot": "A1",
+                "day": "Monday",
+                "time": "08:00-09:00",
+                "courses": ["CS101", "MA101", "PH101"],
+            }
+        ]
+        assert result["pairs"] == [
+            {"courses": ["CS101", "MA101"], "slots": ["A1"]},
+            {"courses": ["CS101", "PH101"], "slots": ["A1"]},
+            {"courses": ["MA101", "PH101"], "slots": ["A1"]},
+        ]
+
+    def test_half_semester_courses(self, snapshot):
+        """Test that courses in different halves share a slot without clashing."""
+        assert find_clashes(["MA201", "MA202"], snapshot)["pairs"] == []
+
+        result = find_clashes(["PH101", "MA201", "MA202"], snapshot)
+        assert result["clashes"] == [
+            {
+                "slot": "B2",
+                "day": "Tuesday",
+                "time": "09:00-10:00",
+                "courses": ["PH101", "MA201", "MA202"],
+            }
+        ]
+        assert [pair["courses"] for pair in result["pairs"]] == [
+            ["PH101", "MA201"],
+            ["PH101", "MA202"],
+        ]
+
+    def test_self_clash_reported(self, snapshot):
+        """Test that a course's own overlapping sessions count as a clash."""
+        result = find_clashes(["EE101"], snapshot)
+
+        assert result["clashes"][0]["slot"] == "B1"
+        assert result["clashes"][0]["courses"] == ["EE101"]
+        assert result["pairs"] == []
+
+    def test_course_clashes(self, snapshot):
+        """Test the clashing pairs of one course with the rest of a selection."""
+        assert course_clashes("PH101", ["CS101", "MA101", "EE101"], snapshot) == [
+            {"courses": ["CS101", "PH101"], "slots": ["A1"]},
+            {"courses": ["MA101", "PH101"], "slots": ["A1"]},
+        ]
+        assert course_clashes("EE101", ["EE101", "CS101"], snapshot) == []
@@ -0,0 +1,87 @@
+import re
+from itertools import combinations
+
+import pandas as pd
+import pytest
+
+from course_info import clash_text, clean_course_info
+from datastore import TIMETABLE_FILE, table_from_frame
+from model import build_courses
+
+
+def reference_clean_course_info(content):
+    """The original uncompiled implementation, kept as the specification."""
+    if (
+        not content
+        or content.strip() in ["", "nan"]
+        or re.match(r"^[A-Z]\d+$", content.strip())
+    ):
+        return None
+
+    if content.strip() in ["T1", "T2", "T3", "O1", "O2"]:
+        return None
+
+    content = re.sub(r"\([^)]*\)", "", content)
+    content = re.sub(r",\s*", " ", content)
+    content = content.replace("\n", ", ")
+    parts = [part.strip() for part in content.split(",") if part.strip()]
+
+    clean_parts = []
+    for part in parts:
+        if not re.match(r"^[A-Z]{1,4}\d+$", part.strip()):
+            clean_parts.append(part)
+
+    return ", ".join(clean_parts) if clean_parts else None
+
+
+@pytest.fixture(scope="module")
+def courses():
+    try:
+        timetable_data = pd.read_csv(TIMETABLE_FILE)
+    except OSError:
+        pytest.skip(f"{TIMETABLE_FILE} not available")
+    return build_courses(table_from_frame(timetable_data))
+
+
+class TestCleanCourseInfoEquivalence:
+    """The compiled and precomputed cleaning must match the original exactly."""
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "",
+            " ",
+            "nan",
+            "A1",
+            "A1\n",
+            "T3",
+            " O2 ",
+            "Lunch",
+            "CS101",
+            "CS101\nProgramming\nLecture\nRoom 101",
+            "CS101 (Section A)\nProgramming\nLecture\nRoom 101",
+            "CS101\nData Analysis\nTutorial\n7104, 7/105",
+            "CS101/ MATH201\n(Clash)",
+            "ES 101\nEngineering Graphics\nLab\n(MSE Lab), 10/203",
+            "MATH2010\n\n,,\nA (b\nc) d",
+        ],
+    )
+    def test_edge_cases(self, content):
+        assert clean_course_info(content) == reference_clean_course_info(content)
+
+    def test_every_session_in_csv(self, courses):
+        """Test every precomputed session of the real catalogue."""
+        for course in courses.values():
+            for session in course.sessions:
+                clean = reference_clean_course_info(session.text)
+                assert session.clean_text == clean, session.text
+                assert clean_course_info(session.text) == clean
+
+    def test_every_clash_pair_in_csv(self, courses):
+        """Test clash texts built from pairs of catalogue sessions."""
+        texts = [
+            session.text for course in courses.values() for session in course.sessions
+        ]
+        for pair in combinations(texts[:150], 2):
+            content = clash_text(pair)
+            assert clean_course_info(content) == reference_clean_course_info(content)
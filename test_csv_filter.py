@@ -0,0 +1,124 @@
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+from datastore import load_snapshot, snapshot_path_for
+from snapshot_file import read_version
+
+spec = importlib.util.spec_from_file_location(
+    "csv_filter", os.path.join(os.path.dirname(__file__), "csv-filter.py")
+)
+csv_filter = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(csv_filter)
+
+HEADER = "Course Code,Course Name,L,T,P,C,Lecture,Tutorial,Lab\n"
+ROWS = [
+    "First Year(2025),,,,,,,,\n",
+    'ES 101,Engineering Graphics,1.5,0,1.5,3,"C2\n (Jasubhai Auditorium)",,"N1,N2\n (MSE Lab)"\n',
+    'MA 103,Calculus,3,1.5,0,4,"E1,E2\n (Jasubhai Auditorium)","A1\n(7/101,7/102)",\n',
+    "ES 112,Computing,1.5,0,1.5,3,F1,,\n",
+]
+
+
+def write_sheet(path, rows):
+    path.write_text(HEADER + "".join(rows))
+    return str(path)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "Timetable.csv", str(tmp_path / "Processed.csv")
+
+
+class TestProcessTimetable:
+    """Test cases for the csv-filter pipeline."""
+
+    def test_split_locations(self, paths):
+        """Test that venues are split from the slot codes."""
+        sheet, output = paths
+        csv_filter.process_timetable(write_sheet(sheet, ROWS), output)
+
+        df = pd.read_csv(output, keep_default_na=False)
+        assert list(df.columns) == csv_filter.OUTPUT_COLUMNS
+        assert list(df["Course Code"]) == ["ES 101", "MA 103", "ES 112"]
+
+        es101 = df.iloc[0]
+        assert es101["Lecture Time"] == "C2"
+        assert es101["Lecture Location"] == "Jasubhai Auditorium"
+        assert es101["Lab Time"] == "N1,N2"
+        assert es101["Lab Location"] == "MSE Lab"
+        assert df.iloc[1]["Tutorial Location"] == "7/101,7/102"
+        assert df.iloc[2]["Lecture Location"] == ""
+
+    def test_long_venues_are_dropped(self, paths):
+        """Test that parenthesised notes of 30+ characters are not venues."""
+        sheet, output = paths
+        row = "CS 101,Intro,3,0,0,4,A1 (Room 5) (to be announced in the first week),,\n"
+        csv_filter.process_timetable(write_sheet(sheet, [row]), output)
+
+        df = pd.read_csv(output)
+        assert df.iloc[0]["Lecture Time"] == "A1"
+        assert df.iloc[0]["Lecture Location"] == "Room 5"
+
+    def test_instructors_column(self, paths):
+        """Test that the sheet's instructor column is kept as "Instructors"."""
+        sheet, output = paths
+        sheet.write_text(
+            "Course Code,Course Name,C,Name of the Instructors and Tutors,Lecture,Tutorial,Lab\n"
+            'CS 101,Intro,4,"Ada Lovelace (I), Alan Turing (T)",A1,,\n'
+        )
+        csv_filter.process_timetable(str(sheet), output)
+
+        df = pd.read_csv(output)
+        assert df.iloc[0]["Instructors"] == "Ada Lovelace (I), Alan Turing (T)"
+
+    def test_incremental_matches_full_run(self, paths, tmp_path):
+        """Test that an incremental run produces the same file as a full run."""
+        sheet, output = paths
+        csv_filter.process_timetable(write_sheet(sheet, ROWS), output)
+
+        rows = ROWS[:2] + [
+            "ES 112,Computing,1.5,0,1.5,3,F2 (7/202),,\n",
+            "HS 191,Writing,1,3,0,2,G1,,\n",
+        ]
+        report = csv_filter.process_timetable(
+            write_sheet(sheet, rows), output, incremental=True
+        )
+        full_output = str(tmp_path / "Full.csv")
+        csv_filter.process_timetable(str(sheet), full_output)
+
+        assert report == {
+            "added": ["HS 191"],
+            "removed": ["MA 103"],
+            "changed": ["ES 112"],
+        }
+        with open(output) as incremental, open(full_output) as full:
+            assert incremental.read() == full.read()
+
+    def test_incremental_without_changes(self, paths, capsys):
+        """Test that an unchanged sheet is detected without rewriting the output."""
+        sheet, output = paths
+        csv_filter.process_timetable(write_sheet(sheet, ROWS), output)
+        mtime = os.stat(output).st_mtime_ns
+
+        report = csv_filter.process_timetable(str(sheet), output, incremental=True)
+
+        assert not any(report.values())
+        assert os.stat(output).st_mtime_ns == mtime
+        assert "No changes" in capsys.readouterr().out
+
+    def test_compiled_snapshot(self, paths, tmp_path):
+        """Test that the compiled snapshot matches the processed CSV."""
+        sheet, output = paths
+        time_slots = tmp_path / "Time Slots.csv"
+        time_slots.write_text("Time Slot,Monday\n08:00-09:00,C2\n")
+        csv_filter.process_timetable(
+            write_sheet(sheet, ROWS), output, time_slots_file=str(time_slots)
+        )
+
+        snapshot = load_snapshot(str(time_slots), output)
+        assert os.path.exists(snapshot_path_for(output))
+        assert read_version(snapshot_path_for(output)) == snapshot.version
+        assert list(snapshot.courses) == ["ES 101", "MA 103", "ES 112"]
@@ -0,0 +1,203 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from datastore import (
+    DataStore,
+    compile_snapshot,
+    load_snapshot,
+    snapshot_path_for,
+)
+
+TIME_SLOTS = "Time Slot,Monday,Tuesday\n08:00-09:00,T1,T2\n09:00-10:00,T3,T4\n"
+COURSES = (
+    "Course Name,Course Code,Lecture Time,Tutorial Time,Lab Time,Credit,"
+    "Lecture Location,Tutorial Location,Lab Location\n"
+    "Programming,CS101,T1,T4,,3.0,Room 101,Room 102,\n"
+)
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    """Write a small pair of timetable CSVs and return their paths."""
+    time_slots = tmp_path / "Time Slots.csv"
+    courses = tmp_path / "Updated_Processed_Timetable.csv"
+    time_slots.write_text(TIME_SLOTS)
+    courses.write_text(COURSES)
+    return str(time_slots), str(courses)
+
+
+def touch_later(path, content):
+    """Rewrite a file and push its mtime forward so the change is detected."""
+    with open(path, "w") as f:
+        f.write(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class TestLoadSnapshot:
+    """Test cases for building snapshots from the CSVs."""
+
+    def test_load_snapshot(self, data_files):
+        """Test that the indexes and labels are built from the files."""
+        snapshot = load_snapshot(*data_files)
+
+        assert snapshot.grid.time_labels == ("08:00-09:00", "09:00-10:00")
+        assert snapshot.grid.columns == ("Time Slot", "Monday", "Tuesday")
+        assert snapshot.grid.cells("T4") == ((1, 2),)
+        assert list(snapshot.courses) == ["CS101"]
+        assert len(snapshot.version) == 12
+
+    def test_version_follows_content(self, data_files):
+        """Test that the version changes only when file content changes."""
+        first = load_snapshot(*data_files)
+        assert load_snapshot(*data_files).version == first.version
+
+        touch_later(data_files[1], COURSES.replace("Room 101", "Room 105"))
+        assert load_snapshot(*data_files).version != first.version
+
+    def test_missing_slots_warned_once(self, data_files, caplog):
+        """Test that reloads listing the same missing slots do not warn again."""
+        touch_later(data_files[1], COURSES.replace(",T4,", ",Z9,"))
+        with caplog.at_level(logging.DEBUG, logger="datastore"):
+            load_snapshot(*data_files)
+            touch_later(
+                data_files[1], COURSES.replace(",T4,", ",Z9,").replace("3.0", "4.0")
+            )
+            load_snapshot(*data_files)
+
+        warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+        assert [r.getMessage() for r in warnings] == [
+            "Slots missing from the slot grid: CS101 Z9"
+        ]
+        assert caplog.records[-1].levelno == logging.DEBUG
+
+
+class TestCompiledSnapshot:
+    """Test cases for loading the compiled snapshot instead of the CSVs."""
+
+    def test_compiled_snapshot_is_used(self, data_files):
+        """Test that a current compiled snapshot is loaded without parsing CSVs."""
+        from_csv = load_snapshot(*data_files)
+        assert compile_snapshot(*data_files) == from_csv.version
+
+        with patch("datastore.read_csv_table", side_effect=AssertionError):
+            compiled = load_snapshot(*data_files)
+
+        assert compiled.version == from_csv.version
+        assert compiled.courses == from_csv.courses
+        assert compiled.courses["CS101"].credits == 3.0
+        assert (
+            compiled.courses_payload["encodings"]
+            == from_csv.courses_payload["encodings"]
+        )
+
+    def test_stale_snapshot_is_ignored(self, data_files):
+        """Test that CSVs edited after compiling are read directly."""
+        compile_snapshot(*data_files)
+        touch_later(data_files[1], COURSES.replace("Room 101", "Room 105"))
+
+        snapshot = load_snapshot(*data_files)
+        assert snapshot.courses["CS101"].sessions[0].location == "Room 105"
+
+    def test_corrupt_snapshot_is_ignored(self, data_files):
+        """Test that an unreadable snapshot falls back to the CSVs."""
+        with open(snapshot_path_for(data_files[1]), "wb") as f:
+            f.write(b"not a snapshot")
+
+        assert list(load_snapshot(*data_files).courses) == ["CS101"]
+
+    def test_truncated_snapshot_is_ignored(self, data_files):
+        """Test that a half-written snapshot of the current version falls back."""
+        compile_snapshot(*data_files)
+        path = snapshot_path_for(data_files[1])
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[: len(data) // 2])
+
+        assert list(load_snapshot(*data_files).courses) == ["CS101"]
+
+    def test_app_does_not_import_pandas(self):
+        """Test that serving from the compiled snapshot never imports pandas."""
+        code = "import sys, app; assert 'pandas' not in sys.modules"
+        compile_snapshot()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+        )
+
+
+class TestDataStore:
+    """Test cases for hot reloading of the timetable data."""
+
+    def test_missing_files_give_empty_snapshot(self, tmp_path):
+        """Test that the store starts with empty data when files are missing."""
+        store = DataStore(str(tmp_path / "a.csv"), str(tmp_path / "b.csv"))
+
+        assert store.snapshot.version == "empty"
+        assert store.snapshot.courses == {}
+
+    def test_maybe_reload_swaps_changed_data(self, data_files):
+        """Test that a changed file is rebuilt in the background and swapped in."""
+        store = DataStore(*data_files, check_interval=0.01)
+        old = store.snapshot
+        swapped = []
+        store.add_listener(swapped.append)
+
+        time.sleep(0.02)
+        assert store.maybe_reload() is False
+
+        touch_later(data_files[1], COURSES.replace("Room 101", "Room 105"))
+        time.sleep(0.02)
+        assert store.maybe_reload() is True
+        wait_for(lambda: store.snapshot is not old)
+
+        assert store.snapshot.version != old.version
+        assert store.snapshot.courses["CS101"].sessions[0].location == "Room 105"
+        assert old.courses["CS101"].sessions[0].location == "Room 101"
+        assert swapped == [store.snapshot]
+
+    def test_maybe_reload_respects_interval(self, data_files):
+        """Test that files are not checked again before the interval elapses."""
+        store = DataStore(*data_files, check_interval=3600)
+        touch_later(data_files[1], COURSES.replace("Room 101", "Room 105"))
+
+        assert store.maybe_reload() is False
+
+    def test_disabled_reload(self, data_files):
+        """Test that a non-positive interval disables polling."""
+        store = DataStore(*data_files, check_interval=0)
+        touch_later(data_files[1], COURSES.replace("Room 101", "Room 105"))
+
+        assert store.maybe_reload() is False
+
+    def test_failed_reload_keeps_snapshot(self, data_files):
+        """Test that a broken file does not replace the served snapshot."""
+        store = DataStore(*data_files, check_interval=0)
+        old = store.snapshot
+        os.remove(data_files[0])
+
+        assert store.reload() is False
+        assert store.snapshot is old
+
+    def test_reload_unchanged_data(self, data_files):
+        """Test that reloading identical content keeps the current snapshot."""
+        store = DataStore(*data_files, check_interval=0)
+        old = store.snapshot
+
+        assert store.reload() is True
+        assert store.snapshot is old
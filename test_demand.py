@@ -0,0 +1,141 @@
+import json
+import threading
+
+import pytest
+
+from datastore import build_snapshot
+from demand import CountMinSketch, DemandRecorder, DemandStats, SpaceSaving, fcntl
+from snapshot_file import Table
+
+
+@pytest.fixture
+def snapshot():
+    time_slots = Table(
+        ["Time Slot", "Monday", "Tuesday"],
+        [("8:30 - 9:50", "A1", "A2"), ("10:00 - 11:20", "B1", "B2")],
+    )
+    courses = Table(
+        ["Course Code", "Course Name", "Lecture Time"],
+        [
+            ("CS101", "Programming", "A1,A2"),
+            ("MA101", "Calculus", "A1"),
+            ("MA205", "Algebra (First half)", "B1"),
+            ("MA206", "Geometry (Second half)", "B1"),
+        ],
+    )
+    return build_snapshot(time_slots, courses, "test", 0)
+
+
+class TestSketches:
+    """Test cases for the count-min sketch and space-saving summary."""
+
+    def test_count_min_never_undercounts(self):
+        """Test that estimates are at least the true counts, and merge adds."""
+        sketch = CountMinSketch(width=16, depth=3)
+        for i in range(100):
+            sketch.add(f"key{i % 10}", i)
+        other = CountMinSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        sketch.merge(other)
+
+        for k in range(10):
+            assert sketch.estimate(f"key{k}") >= 2 * sum(range(k, 100, 10))
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        """Test that frequent keys survive a stream of rare ones."""
+        summary = SpaceSaving(capacity=4)
+        for i in range(200):
+            summary.add("hot" if i % 2 else f"rare{i}")
+
+        key, count, error = summary.top(1)[0]
+        assert key == "hot"
+        assert count - error <= 100 <= count
+        assert len(summary.counts) == 4
+
+    def test_space_saving_merge(self):
+        """Test that merged summaries add counts and keep the largest."""
+        first = SpaceSaving(capacity=2)
+        second = SpaceSaving(capacity=2)
+        first.add("a", 5)
+        first.add("b", 1)
+        second.add("a", 2)
+        second.add("c", 3)
+        first.merge(second)
+
+        assert first.top(5) == [("a", 7, 0), ("c", 3, 0)]
+
+
+class TestDemandStats:
+    """Test cases for the per-selection demand counters."""
+
+    def test_counts_slots_pairs_and_clashes(self, snapshot):
+        """Test slot counts per selection, and pair and clash counts across halves."""
+        stats = DemandStats()
+        stats.add(["CS101", "MA101"], snapshot)
+        stats.add(["MA205", "MA206"], snapshot)
+
+        assert stats.requests == 2
+        assert stats.clash_requests == 1
+        assert stats.slots == {"A1": 1, "A2": 1, "B1": 1}
+        assert stats.pairs.top(5) == [("CS101 + MA101", 1, 0), ("MA205 + MA206", 1, 0)]
+        assert stats.clash_pairs.top(5) == [("CS101 + MA101", 1, 0)]
+        assert stats.pair_sketch.estimate("MA205 + MA206") >= 1
+
+
+class TestDemandRecorder:
+    """Test cases for the background demand recorder."""
+
+    def test_flush_adds_to_shared_file(self, snapshot, tmp_path):
+        """Test that recorders sharing a file add up their counts."""
+        path = str(tmp_path / "demand.json")
+        first = DemandRecorder(path, background=False)
+        second = DemandRecorder(path, background=False)
+        first.record(["CS101", "MA101", "CS101"], snapshot)
+        first.record(["UNKNOWN"], snapshot)
+        second.record(["CS101"], snapshot)
+        first.flush()
+        second.flush()
+        second.record(["MA101"], snapshot)
+
+        report = second.report(limit=1, pair=["MA101", "CS101"])
+        assert report["requests"] == 3
+        assert report["courses"] == [{"code": "CS101", "count": 2}]
+        assert report["clash_rate"] == pytest.approx(1 / 3)
+        assert report["pair"] == {"courses": ["CS101", "MA101"], "estimate": 1}
+        with open(path) as f:
+            assert json.load(f)["requests"] == 2
+
+    @pytest.mark.skipif(fcntl is None, reason="needs file locks")
+    def test_totals_wait_for_writers(self, snapshot, tmp_path):
+        """Test that reading the totals waits while another process rewrites them."""
+        path = str(tmp_path / "demand.json")
+        writer = DemandRecorder(path, background=False)
+        writer.record(["CS101"], snapshot)
+        writer.flush()
+        reader = DemandRecorder(path, background=False)
+        reports = []
+
+        with open(path, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.truncate()
+            thread = threading.Thread(target=lambda: reports.append(reader.report()))
+            thread.start()
+            thread.join(0.2)
+            assert thread.is_alive()
+            stats = DemandStats()
+            stats.add(["CS101", "MA101"], snapshot)
+            json.dump(stats.to_dict(), f)
+        thread.join()
+
+        assert reports[0]["requests"] == 1
+        assert reports[0]["pairs"][0]["courses"] == ["CS101", "MA101"]
+
+    def test_bounded_queue_drops_oldest(self, snapshot):
+        """Test that a full queue drops selections instead of growing."""
+        recorder = DemandRecorder("", max_pending=2, background=False)
+        for code in ("CS101", "MA101", "MA205"):
+            recorder.record([code], snapshot)
+        recorder.flush()
+
+        report = recorder.report()
+        assert report["dropped"] == 1
+        assert [entry["code"] for entry in report["courses"]] == ["MA101", "MA205"]
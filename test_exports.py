@@ -0,0 +1,178 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from xml.etree import ElementTree
+
+import pytest
+
+from exports import (
+    column_name,
+    csv_chunks,
+    default_semester,
+    ics_chunks,
+    ics_line,
+    semester_window,
+    session_times,
+    timetable_rows,
+    xlsx_chunks,
+)
+from model import build_courses, build_slot_grid
+from slots import FIRST_HALF, FULL_SEMESTER, SECOND_HALF, build_occupancy
+from snapshot_file import Table
+
+SHEET = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+@pytest.fixture
+def grid():
+    return build_slot_grid(
+        Table(
+            ["Time Slot", "Monday", "Tuesday"],
+            [("8:30 - 9:50", "A1", "A2"), ("10:00 - 11:20", "B1", "B2")],
+        )
+    )
+
+
+@pytest.fixture
+def courses():
+    return build_courses(
+        Table(
+            [
+                "Course Name",
+                "Course Code",
+                "Lecture Time",
+                "Credit",
+                "Lecture Location",
+            ],
+            [
+                ("Calculus", "MA101", "A1,A2", 4.0, "LH 1, LH 2"),
+                ("Physics", "PH101", "A1", 3.0, None),
+            ],
+        )
+    )
+
+
+def cells_for(codes, courses, grid):
+    occupancy = build_occupancy(courses, grid)
+    cells = {}
+    for code in codes:
+        for cell, session in occupancy.entries(code):
+            cells.setdefault(cell, []).append(session)
+    return cells
+
+
+class TestTableExports:
+    """Test cases for the CSV and XLSX exports."""
+
+    def test_rows(self, grid, courses):
+        """Test that rows hold cleaned cell text and skip empty time slots."""
+        rows = list(timetable_rows(grid, cells_for(["MA101", "PH101"], courses, grid)))
+
+        assert rows == [
+            ["Time", "Monday", "Tuesday"],
+            ["8:30 - 9:50", "MA101/ PH101", "Calculus, Lecture, LH 1 LH 2"],
+        ]
+
+    def test_csv(self, grid, courses):
+        """Test that the CSV is quoted and streamed row by row."""
+        chunks = list(
+            csv_chunks(timetable_rows(grid, cells_for(["MA101"], courses, grid)))
+        )
+
+        assert len(chunks) == 2
+        parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        assert parsed[1] == [
+            "8:30 - 9:50",
+            "Calculus, Lecture, LH 1 LH 2",
+            "Calculus, Lecture, LH 1 LH 2",
+        ]
+
+    def test_xlsx(self):
+        """Test that the workbook is a zip with an inline string sheet."""
+        rows = [["Time", "Monday"], ["8:30", "A & B <C>"]]
+        data = b"".join(xlsx_chunks(rows))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert "[Content_Types].xml" in archive.namelist()
+            sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+
+        cells = {
+            cell.get("r"): cell.find(f"{SHEET}is/{SHEET}t").text
+            for cell in sheet.iter(f"{SHEET}c")
+        }
+        assert cells == {"A1": "Time", "B1": "Monday", "A2": "8:30", "B2": "A & B <C>"}
+        assert b"".join(xlsx_chunks(rows)) == data
+
+    def test_column_name(self):
+        """Test spreadsheet column letters."""
+        assert [column_name(i) for i in (0, 25, 26, 701, 702)] == [
+            "A",
+            "Z",
+            "AA",
+            "ZZ",
+            "AAA",
+        ]
+
+
+class TestCalendarExport:
+    """Test cases for the iCalendar export."""
+
+    def test_first_occurrence(self, grid):
+        """Test that events start on the first matching weekday of the term."""
+        assert session_times(grid, 1, 2, date(2026, 7, 29), date(2026, 11, 20)) == (
+            datetime(2026, 8, 4, 10, 0),
+            datetime(2026, 8, 4, 11, 20),
+        )
+        assert session_times(grid, 0, 1, date(2026, 7, 28), date(2026, 7, 30)) is None
+
+    def test_weekly_events(self, grid, courses):
+        """Test one weekly event per session cell, with escaped text."""
+        feed = b"".join(
+            ics_chunks(
+                [courses["MA101"]],
+                build_occupancy(courses, grid),
+                grid,
+                date(2026, 7, 27),
+                date(2026, 11, 20),
+                "v1",
+                0,
+            )
+        ).decode("utf-8")
+
+        assert feed.startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        assert feed.endswith("END:VCALENDAR\r\n")
+        assert feed.count("BEGIN:VEVENT") == 2
+        assert "DTSTART:20260727T083000\r\n" in feed
+        assert "DTSTART:20260728T083000\r\n" in feed
+        assert "RRULE:FREQ=WEEKLY;UNTIL=20261120T235959\r\n" in feed
+        assert "LOCATION:LH 1\\, LH 2\r\n" in feed
+        assert "DTSTAMP:19700101T000000Z\r\n" in feed
+
+    def test_half_semester_window(self):
+        """Test that half-semester sessions only repeat during their half."""
+        start, end = date(2026, 7, 27), date(2026, 11, 20)
+
+        assert semester_window(FULL_SEMESTER, start, end) == (start, end)
+        assert semester_window(FIRST_HALF, start, end) == (start, date(2026, 9, 23))
+        assert semester_window(SECOND_HALF, start, end) == (date(2026, 9, 24), end)
+
+    def test_default_semester(self):
+        """Test the approximate semester dates around a day."""
+        assert default_semester(date(2027, 2, 10)) == (
+            date(2027, 1, 1),
+            date(2027, 4, 30),
+        )
+        assert default_semester(date(2026, 12, 24)) == (
+            date(2026, 8, 1),
+            date(2026, 11, 30),
+        )
+
+    def test_line_folding(self):
+        """Test that long lines fold at 75 octets without splitting characters."""
+        line = "DESCRIPTION:" + "é" * 60
+        folded = ics_line(line)
+
+        parts = folded.split(b"\r\n")
+        assert all(len(part) <= 75 for part in parts)
+        assert folded.replace(b"\r\n ", b"").decode("utf-8") == line + "\r\n"
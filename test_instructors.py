@@ -0,0 +1,67 @@
+import pytest
+
+from instructors import InstructorIndex
+from model import build_courses, build_slot_grid
+from slots import build_occupancy, name_key
+from snapshot_file import Table
+
+
+@pytest.fixture
+def instructors():
+    grid = build_slot_grid(
+        Table(
+            ["Time Slot", "Monday", "Tuesday"],
+            [("8:30 - 9:50", "A1", "A2"), ("10:00 - 11:20", "B1", "B2")],
+        )
+    )
+    courses = build_courses(
+        Table(
+            [
+                "Course Code",
+                "Course Name",
+                "Lecture Time",
+                "Tutorial Time",
+                "Instructors",
+            ],
+            [
+                (
+                    "CS101",
+                    "Programming",
+                    "A1",
+                    "B1",
+                    "Ada Lovelace (I), Alan Turing(T)",
+                ),
+                ("CS213", "Data Structures", "A2", "B1", "Alan Turing (I+T)"),
+                ("MA205", "Algebra (First half)", "B2", None, "ada  lovelace (I)"),
+                ("MA206", "Geometry (Second half)", "B2", None, "Ada Lovelace (I)"),
+                ("PH101", "Physics", "A1", None, "TBD"),
+                ("PH102", "Optics", "A1", None, "Staff"),
+            ],
+        )
+    )
+    return InstructorIndex(courses, build_occupancy(courses, grid))
+
+
+class TestInstructorIndex:
+    """Test cases for the instructor inverted index."""
+
+    def test_postings(self, instructors):
+        """Test the courses and roles of every instructor, by any spelling."""
+        assert instructors.instructors() == ["Ada Lovelace", "Alan Turing"]
+        assert instructors.courses[name_key("ADA LOVELACE")] == [
+            ("CS101", ("Lecture",)),
+            ("MA205", ("Lecture",)),
+            ("MA206", ("Lecture",)),
+        ]
+        assert instructors.find("Grace Hopper") is None
+
+    def test_roles_select_sessions(self, instructors):
+        """Test that tutors are only booked for the tutorials."""
+        cells = instructors.cells(instructors.find("alan turing"))
+
+        assert sorted(cells) == [(0, 2), (1, 1)]
+        assert [session.kind for session in cells[(1, 1)]] == ["Tutorial"] * 2
+
+    def test_faculty_clashes(self, instructors):
+        """Test clashes per instructor, with halves kept apart and placeholders ignored."""
+        assert instructors.clashes == [("Alan Turing", (1, 1), ["CS101", "CS213"])]
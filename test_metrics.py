@@ -0,0 +1,69 @@
+from metrics import Histogram, Registry, format_sample
+
+
+class TestHistogram:
+    """Test cases for the metrics histogram."""
+
+    def test_cumulative_buckets(self):
+        """Test that bucket counts are cumulative and end with +Inf."""
+        histogram = Histogram("latency", "Latency", ("route",), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.observe(value, "/a")
+
+        lines = histogram.collect()
+        assert lines[:2] == ["# HELP latency Latency", "# TYPE latency histogram"]
+        assert lines[2:] == [
+            'latency_bucket{route="/a",le="0.1"} 1',
+            'latency_bucket{route="/a",le="1"} 3',
+            'latency_bucket{route="/a",le="+Inf"} 4',
+            'latency_sum{route="/a"} 4.05',
+            'latency_count{route="/a"} 4',
+        ]
+
+    def test_bucket_bounds_are_inclusive(self):
+        """Test that a value equal to a bound falls in that bucket."""
+        histogram = Histogram("latency", "Latency", buckets=(1, 2))
+        histogram.observe(1)
+
+        assert 'latency_bucket{le="1"} 1' in histogram.collect()
+
+    def test_time_context_manager(self):
+        """Test timing a block."""
+        histogram = Histogram("latency", "Latency", ("stage",))
+        with histogram.time("encode"):
+            pass
+
+        assert 'latency_count{stage="encode"} 1' in histogram.collect()
+
+
+class TestRegistry:
+    """Test cases for metric rendering."""
+
+    def test_disabled_registry_records_nothing(self):
+        """Test that histograms ignore observations while disabled."""
+        registry = Registry(enabled=False)
+        histogram = registry.histogram("latency", "Latency")
+        histogram.observe(0.1)
+        registry.enabled = True
+        histogram.observe(0.2)
+
+        assert "latency_count 1" in registry.render()
+
+    def test_collectors(self):
+        """Test that collectors are called on every render."""
+        registry = Registry()
+        values = [1]
+        registry.add_collector(
+            lambda: [("items", "gauge", "Items", [({"kind": "a"}, values[0])])]
+        )
+
+        assert 'items{kind="a"} 1' in registry.render()
+        values[0] = 2
+        assert registry.render().endswith('# TYPE items gauge\nitems{kind="a"} 2\n')
+
+    def test_label_escaping(self):
+        """Test escaping of quotes, backslashes and newlines in labels."""
+        assert (
+            format_sample("info", {"version": 'a"b\\c\nd'}, 1.0)
+            == 'info{version="a\\"b\\\\c\\nd"} 1'
+        )
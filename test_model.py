@@ -0,0 +1,142 @@
+import pytest
+
+from model import (
+    Session,
+    build_courses,
+    build_elective_groups,
+    build_slot_grid,
+    parse_instructors,
+)
+from snapshot_file import Table
+
+
+@pytest.fixture
+def grid():
+    return build_slot_grid(
+        Table(
+            ["Time Slot", "Monday", "Tuesday"],
+            [("08:00-09:00", "A1", "A2"), ("09:00-10:00", "B1", None)],
+        )
+    )
+
+
+@pytest.fixture
+def courses():
+    columns = [
+        "Course Name",
+        "Course Code",
+        "Lecture Time",
+        "Lab Time",
+        "Credit",
+        "Lecture Location",
+        "Lab Location",
+        "HSS/BS elective",
+    ]
+    return build_courses(
+        Table(
+            columns,
+            [
+                ("Programming", "CS101", "A1, A2,A1", "B1", 4.0, "LH 1", None, None),
+                (None, "MA101", "A1", None, None, None, None, "BS, Maths"),
+                ("Physics", "PH101", "", None, 3.0, None, None, "BS"),
+            ],
+        )
+    )
+
+
+class TestSlotGrid:
+    """Test cases for the slot grid model."""
+
+    def test_grid(self, grid):
+        """Test cells, labels and day columns of the grid."""
+        assert grid.rows[1] == ("09:00-10:00", "B1", "")
+        assert grid.cells("A2") == ((0, 2),)
+        assert grid.cells("Z9") == ()
+        assert grid.days == [(1, "Monday"), (2, "Tuesday")]
+        assert grid.label(1) == "09:00-10:00"
+        assert grid.label(5) == "Slot 6"
+        assert grid.clean_rows[0][1:] == (None, None)
+
+    def test_empty_grid(self):
+        """Test a grid built from an empty table."""
+        grid = build_slot_grid(Table())
+
+        assert grid.rows == ()
+        assert grid.time_labels == ()
+
+
+class TestCourses:
+    """Test cases for the course and session model."""
+
+    def test_sessions(self, courses):
+        """Test that sessions hold de-duplicated slots and their location."""
+        lecture, lab = courses["CS101"].sessions
+
+        assert lecture.kind == "Lecture"
+        assert lecture.slots == ("A1", "A2")
+        assert lecture.location == "LH 1"
+        assert lecture.text == "CS101\nProgramming\nLecture\nLH 1"
+        assert lecture.clean_text == "Programming, Lecture, LH 1"
+        assert lab.text == "CS101\nProgramming\nLab"
+        assert courses["PH101"].sessions == ()
+
+    def test_missing_values_are_not_stringified(self, courses):
+        """Test that empty cells never show up as "nan"."""
+        course = courses["MA101"]
+
+        assert course.name == ""
+        assert course.credits is None
+        assert course.sessions[0].clean_text == "Lecture"
+
+    def test_elective_groups(self, courses):
+        """Test that comma separated categories are split in catalogue order."""
+        assert courses["MA101"].groups == ("BS", "Maths")
+        assert build_elective_groups(courses) == {
+            "BS": ["MA101", "PH101"],
+            "Maths": ["MA101"],
+        }
+
+    def test_records_are_immutable(self, courses):
+        """Test that model records cannot be changed or extended."""
+        course = courses["CS101"]
+        with pytest.raises(AttributeError):
+            course.credits = 2.0
+        with pytest.raises(AttributeError):
+            course.extra = True
+        assert not hasattr(course, "__dict__")
+
+    def test_repeated_code(self):
+        """Test that a repeated code keeps its position and merges groups."""
+        table = Table(
+            ["Course Name", "Course Code", "Credit", "Minor in"],
+            [("Old", "X1", 2.0, "A"), ("Y", "Y1", 1.0, None), ("New", "X1", 3.0, "B")],
+        )
+        courses = build_courses(table)
+
+        assert list(courses) == ["X1", "Y1"]
+        assert courses["X1"].name == "New"
+        assert courses["X1"].position == 0
+        assert courses["X1"].groups == ("A", "B")
+
+    def test_instructors(self):
+        """Test that instructor cells are split into names and their roles."""
+        value = "Kaustubh Rane(I+L),Sameer Patel (L)\nA. Kumar, Sameer Patel (t)"
+        rane, patel, kumar = parse_instructors(value)
+
+        assert rane == ("Kaustubh Rane", ("Lecture", "Lab"))
+        assert patel == ("Sameer Patel", ("Tutorial", "Lab"))
+        assert kumar == ("A. Kumar", ())
+        assert kumar.teaches(Session("Lab", (), "", "", None, 3))
+        assert not rane.teaches(Session("Tutorial", (), "", "", None, 3))
+        assert parse_instructors(None) == ()
+        assert parse_instructors(float("nan")) == ()
+
+    def test_instructor_placeholders(self):
+        """Test that placeholders are dropped and a trailing "and" is stripped."""
+        value = "Ada Lovelace (I), TBD (T), and Manisha Padala (L)\nN/A"
+
+        assert [staff.name for staff in parse_instructors(value)] == [
+            "Ada Lovelace",
+            "Manisha Padala",
+        ]
+        assert parse_instructors("tba") == ()
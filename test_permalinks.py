@@ -0,0 +1,88 @@
+import pytest
+
+from model import build_courses
+from permalinks import (
+    StaleLinkError,
+    decode_selection,
+    encode_selection,
+    timetable_table,
+)
+from snapshot_file import Table
+
+
+@pytest.fixture
+def courses():
+    return build_courses(
+        Table(
+            ["Course Name", "Course Code", "Credit"],
+            [(f"Course {i}", f"C{i}", 4.0) for i in range(20)],
+        )
+    )
+
+
+class TestTokens:
+    """Test cases for encoding course selections as link tokens."""
+
+    def test_round_trip(self, courses):
+        """Test that a selection decodes back in catalogue order."""
+        token = encode_selection(["C17", "C0", "C9", "XX"], courses)
+
+        assert token == "zUDHAQIC"
+        assert decode_selection(token, courses) == ["C0", "C9", "C17"]
+
+    def test_empty_selection(self, courses):
+        """Test that nothing selected encodes to an empty token."""
+        assert encode_selection([], courses) == ""
+        assert decode_selection("", courses) == []
+
+    def test_other_catalogue(self, courses):
+        """Test that a token only decodes against the catalogue it was made for."""
+        token = encode_selection(["C1", "C19"], courses)
+        updated = build_courses(
+            Table(
+                ["Course Name", "Course Code", "Credit"],
+                [(f"Course {i}", f"C{i}", 4.0) for i in range(1, 21)],
+            )
+        )
+
+        with pytest.raises(StaleLinkError):
+            decode_selection(token, updated)
+        assert decode_selection(encode_selection(["C1"], updated), updated) == ["C1"]
+        assert decode_selection(token, courses) == ["C1", "C19"]
+
+    @pytest.mark.parametrize("token", ["a+b", "a/b", "A===", "A", "zUDH", "A" * 1001])
+    def test_invalid_token(self, courses, token):
+        """Test that malformed tokens are rejected."""
+        with pytest.raises(ValueError):
+            decode_selection(token, courses)
+
+
+class TestTimetableTable:
+    """Test cases for the rows rendered into a shared timetable."""
+
+    def test_rows(self):
+        """Test row order by starting hour and cell parts per weekday."""
+        rows = timetable_table(
+            {
+                "monday": [{"time": "10:00-11:00", "class": "CS101, Intro, Lab,"}],
+                "friday": [{"time": "8:00-9:00", "class": "T1"}],
+            }
+        )
+
+        assert rows == [
+            ("8:00-9:00", [[], [], [], [], [("course-code", "T1")]]),
+            (
+                "10:00-11:00",
+                [
+                    [
+                        ("course-code", "CS101"),
+                        ("course-name", "Intro"),
+                        ("course-type", "Lab"),
+                    ],
+                    [],
+                    [],
+                    [],
+                    [],
+                ],
+            ),
+        ]
@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from datastore import build_snapshot, table_from_frame
+from planner import plan_schedules
+
+
+@pytest.fixture
+def snapshot():
+    time_slots = pd.DataFrame(
+        {
+            "Time Slot": ["08:00-09:00", "09:00-10:00"],
+            "Monday": ["A1", "B1"],
+            "Tuesday": ["A2", "B2"],
+        }
+    )
+    courses = pd.DataFrame(
+        {
+            "Course Code": ["CORE1", "EL1", "EL2", "EL3", "EL4", "NOCREDIT"],
+            "Course Name": ["Core", "One", "Two", "Three", "Four", "None"],
+            "Lecture Time": ["A1", "A1", "B1", "B2", "A2", "B2"],
+            "Tutorial Time": ["", "", "", "", "", ""],
+            "Lab Time": ["", "", "", "", "", ""],
+            "Credit": [4, 4, 4, 2, 2, float("nan")],
+            "HSS/BS elective": [None, None, "BS", "BS", None, None],
+        }
+    )
+    return build_snapshot(
+        table_from_frame(time_slots), table_from_frame(courses), "test", 0
+    )
+
+
+def elective_sets(result):
+    return [set(schedule["electives"]) for schedule in result["schedules"]]
+
+
+class TestPlanSchedules:
+    """Test cases for the schedule planner search."""
+
+    def test_clashing_candidates_are_excluded(self, snapshot):
+        """Test that electives clashing with required courses are never used."""
+        result = plan_schedules(
+            ["CORE1"], ["EL1", "EL2", "EL3", "EL4", "NOCREDIT"], 8, snapshot
+        )
+
+        assert result["candidates"] == 3
+        assert result["complete"] is True
+        assert elective_sets(result) == [{"EL2"}, {"EL3", "EL4"}]
+        assert result["schedules"][0]["courses"] == ["CORE1", "EL2"]
+        assert result["schedules"][0]["credits"] == 8
+
+    def test_ranked_by_closeness_to_target(self, snapshot):
+        """Test that overshooting schedules rank after exact ones."""
+        result = plan_schedules([], ["EL2", "EL3", "EL4"], 6, snapshot)
+
+        credits = [schedule["credits"] for schedule in result["schedules"]]
+        assert credits == sorted(credits)
+        assert credits[0] == 6
+
+    def test_unreachable_target(self, snapshot):
+        """Test that an impossible target yields no schedules."""
+        result = plan_schedules(["CORE1"], ["EL2", "EL3"], 20, snapshot)
+
+        assert result["schedules"] == []
+        assert result["complete"] is True
+
+    def test_max_credits(self, snapshot):
+        """Test that schedules above the credit cap are pruned."""
+        result = plan_schedules([], ["EL2", "EL3", "EL4"], 5, snapshot, max_credits=5)
+
+        assert result["schedules"] == []
+        result = plan_schedules([], ["EL3"], 1, snapshot, max_credits=0)
+        assert result["schedules"] == []
+        result = plan_schedules(["CORE1"], ["EL2"], 4, snapshot, max_credits=2)
+        assert result["schedules"] == []
+
+    def test_result_budget(self, snapshot):
+        """Test that the search stops at the result limit."""
+        result = plan_schedules(
+            [], ["EL1", "EL2", "EL3", "EL4"], 2, snapshot, max_results=1
+        )
+
+        assert len(result["schedules"]) == 1
+        assert result["complete"] is False
+
+    def test_target_met_by_required(self, snapshot):
+        """Test that required courses alone can satisfy the target."""
+        result = plan_schedules(["CORE1"], ["EL2"], 4, snapshot)
+
+        assert result["schedules"] == [
+            {"courses": ["CORE1"], "electives": [], "credits": 4}
+        ]
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from profiler import SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+class TestSamplingProfiler:
+    """Test cases for the sampling profiler."""
+
+    def test_samples_other_threads(self):
+        """Test that stacks of running threads are collected."""
+        profiler = SamplingProfiler(interval=0.001)
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        try:
+            profiler.start()
+            time.sleep(0.1)
+            profiler.stop()
+        finally:
+            stop.set()
+            worker.join()
+
+        assert not profiler.running
+        assert profiler.samples > 0
+        assert any(
+            "busy_loop (test_profiler.py:" in stack for stack, _ in profiler.top()
+        )
+        assert "sampling-profiler" not in profiler.collapsed()
+
+    def test_stopped_profiler_collects_nothing(self):
+        """Test that nothing is sampled until started, and reset clears."""
+        profiler = SamplingProfiler(interval=0.001)
+        time.sleep(0.01)
+        assert profiler.samples == 0
+
+        profiler.start()
+        time.sleep(0.02)
+        profiler.stop()
+        profiler.reset()
+        assert profiler.stats() == {
+            "running": False,
+            "interval": 0.001,
+            "samples": 0,
+            "stacks": 0,
+        }
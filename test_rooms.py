@@ -0,0 +1,60 @@
+import pytest
+
+from model import build_courses, build_slot_grid
+from rooms import RoomIndex, split_rooms
+from slots import build_occupancy, name_key
+from snapshot_file import Table
+
+
+@pytest.fixture
+def rooms():
+    grid = build_slot_grid(
+        Table(
+            ["Time Slot", "Monday", "Tuesday"],
+            [("8:30 - 9:50", "A1", "A2"), ("10:00 - 11:20", "B1", "B2")],
+        )
+    )
+    courses = build_courses(
+        Table(
+            ["Course Code", "Course Name", "Lecture Time", "Lecture Location"],
+            [
+                ("CS101", "Programming", "A1,A2", "LH 1"),
+                ("MA101", "Calculus", "A1", "lh  1, LH 2"),
+                ("MA205", "Algebra (First half)", "B1", "LH 2"),
+                ("MA206", "Geometry (Second half)", "B1", "LH 2"),
+                ("HS101", "Writing", "B2", "Online"),
+            ],
+        )
+    )
+    return RoomIndex(build_occupancy(courses, grid), grid)
+
+
+class TestRoomIndex:
+    """Test cases for the room occupancy index."""
+
+    def test_split_rooms(self):
+        """Test that venues are split into rooms and non-rooms dropped."""
+        assert split_rooms("10/104,10/105\n 10/104") == ("10/104", "10/105")
+        assert split_rooms("Jasubhai  Auditorium") == ("Jasubhai Auditorium",)
+        assert split_rooms("Online") == ()
+        assert name_key(" LH  1 ") == "lh 1"
+
+    def test_schedule(self, rooms):
+        """Test the sessions booking a room per cell, found by any spelling."""
+        assert rooms.rooms() == ["LH 1", "LH 2"]
+        key = rooms.find("lh 1")
+        cells = rooms.cells(key)
+
+        assert sorted(cells) == [(0, 1), (0, 2)]
+        assert [s.text.split("\n")[0] for s in cells[(0, 1)]] == ["CS101", "MA101"]
+        assert rooms.find("LH 9") is None
+
+    def test_free_rooms(self, rooms):
+        """Test that free rooms are those without bookings in the cells."""
+        assert rooms.free([(0, 1)]) == []
+        assert rooms.free([(0, 2)]) == ["LH 2"]
+        assert rooms.free([(1, 2)]) == ["LH 1", "LH 2"]
+
+    def test_double_bookings(self, rooms):
+        """Test that only different courses in the same half double-book."""
+        assert rooms.double_bookings == [("LH 1", (0, 1), ["CS101", "MA101"])]
@@ -0,0 +1,87 @@
+import pytest
+
+from model import build_courses
+from search import SearchIndex, trigrams, words
+from snapshot_file import Table
+
+
+@pytest.fixture
+def index():
+    courses = build_courses(
+        Table(
+            ["Course Code", "Course Name", "Credit", "Instructors"],
+            [
+                ("CS 101", "Computer Programming", 6.0, "Ada Lovelace (I)"),
+                ("CS 213", "Data Structures", 6.0, "Alan Turing (I), Ada Lovelace (T)"),
+                ("MA 105", "Calculus", 8.0, "Leonhard Euler (I)"),
+                ("MA 106", "Linear Algebra", 4.0, "Carl Gauss (I)"),
+                ("PH 107", "Quantum Physics", 6.0, "Max Planck (I+T)"),
+                ("XX 999", "Unlisted Programming", None, None),
+            ],
+        )
+    )
+    return SearchIndex(courses)
+
+
+class TestSearchIndex:
+    """Test cases for the course search index."""
+
+    def test_words(self):
+        """Test that text is split into lower case words."""
+        assert words("CS 101: Data-Structures") == ["cs", "101", "data", "structures"]
+        assert trigrams("ab") == {" ab", "ab "}
+
+    def test_unlisted_courses_are_skipped(self, index):
+        """Test that only courses with credits are indexed."""
+        assert len(index) == 5
+        assert index.search("unlisted") == (0, [])
+
+    def test_prefix_match(self, index):
+        """Test that query words match the start of words."""
+        assert index.search("prog") == (1, ["CS 101"])
+        assert index.search("cs") == (2, ["CS 101", "CS 213"])
+
+    def test_code_without_space(self, index):
+        """Test that a code typed without its space is found."""
+        assert index.search("ma10") == (2, ["MA 105", "MA 106"])
+        assert index.search("CS 213") == (1, ["CS 213"])
+
+    def test_instructor_match(self, index):
+        """Test that instructors are searchable and roles are not."""
+        assert index.search("lovelace") == (2, ["CS 101", "CS 213"])
+        assert index.search("planck") == (1, ["PH 107"])
+
+    def test_every_word_must_match(self, index):
+        """Test that the words of a query are combined with AND."""
+        assert index.search("ada data") == (1, ["CS 213"])
+        assert index.search("ada calculus") == (0, [])
+
+    def test_fuzzy_match(self, index):
+        """Test that misspelt words fall back to trigram similarity."""
+        assert index.search("calculas") == (1, ["MA 105"])
+        assert index.search("quantom") == (1, ["PH 107"])
+        assert index.search("zzzzzz") == (0, [])
+
+    def test_ranking(self, index):
+        """Test that code matches beat name matches, and exact beats prefix."""
+        courses = build_courses(
+            Table(
+                ["Course Code", "Course Name", "Credit"],
+                [
+                    ("HS 101", "Algebra and Society", 3.0),
+                    ("AL 200", "Algorithms", 3.0),
+                    ("AL 100", "Algebra", 3.0),
+                ],
+            )
+        )
+        index = SearchIndex(courses)
+
+        assert index.search("al")[1] == ["AL 200", "AL 100", "HS 101"]
+        assert index.search("algebra")[1] == ["HS 101", "AL 100"]
+
+    def test_pagination(self, index):
+        """Test offset and limit over the ranked matches."""
+        assert index.search("", 0, 2) == (5, ["CS 101", "CS 213"])
+        assert index.search("", 4, 2) == (5, ["PH 107"])
+        assert index.search("a", 1, 1)[0] == index.search("a")[0]
+        assert index.search("a", 1, 1)[1] == index.search("a")[1][1:2]
@@ -0,0 +1,184 @@
+import csv
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "scripts"))
+
+from fake_sheets import FakeSpreadsheet, serve  # noqa: E402
+from sheets_sync import (  # noqa: E402
+    SheetsClient,
+    SyncError,
+    block_ranges,
+    save_state,
+    sync_sheet,
+)
+
+ROWS = [
+    ["Course Code", "Course Name", "C", "Lecture"],
+    ["First Year(2025)"],
+    ["ES 101", "Engineering Graphics", "3", "C2\n (Jasubhai Auditorium)"],
+    [],
+    ["MA 103", "Calculus", "4", ""],
+    ["ES 112", "Computing, Basics", "3", "F1"],
+    ["HS 101", "Economics", "4", "A1"],
+    ["CS 101", "Programming", "", ""],
+]
+
+
+@pytest.fixture
+def spreadsheet():
+    spreadsheet = FakeSpreadsheet("sheet-id", "Sheet 1", ROWS, extra_rows=5)
+    server = serve(spreadsheet)
+    spreadsheet.url = f"http://127.0.0.1:{server.server_port}"
+    yield spreadsheet
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "Timetable.csv"), str(tmp_path / "Timetable.sync.json")
+
+
+def make_client(spreadsheet, sleeps=None, **kwargs):
+    return SheetsClient(
+        "sheet-id",
+        sheets_url=f"{spreadsheet.url}/v4",
+        drive_url=f"{spreadsheet.url}/drive/v3",
+        sleep=(sleeps.append if sleeps is not None else lambda delay: None),
+        **kwargs,
+    )
+
+
+def sync(spreadsheet, paths, save=True, **kwargs):
+    result = sync_sheet(
+        make_client(spreadsheet),
+        "Sheet 1",
+        *paths,
+        block_rows=3,
+        batch_size=2,
+        **kwargs,
+    )
+    if save:
+        save_state(paths[1], result.state)
+    return result
+
+
+def full_export(rows, path):
+    """What downloading the whole sheet with ``values().get`` wrote"""
+    values = [list(row) for row in rows]
+    for row in values:
+        while row and row[-1] == "":
+            row.pop()
+    pd.DataFrame(values[1:], columns=values[0]).to_csv(path, index=False)
+    with open(path) as f:
+        return f.read()
+
+
+class TestSheetSync:
+    """Test cases for syncing the sheet into Timetable.csv."""
+
+    def test_first_sync_matches_full_export(self, spreadsheet, paths, tmp_path):
+        """Test that the block-wise download writes the same CSV as a full one."""
+        result = sync(spreadsheet, paths)
+
+        assert result.changed
+        assert result.rows == len(ROWS)
+        with open(paths[0]) as f:
+            assert f.read() == full_export(ROWS, tmp_path / "expected.csv")
+        # Drive version, row count, then 5 ranges of 3 rows in batches of 2
+        assert (
+            spreadsheet.requests.count("/v4/spreadsheets/sheet-id/values:batchGet") == 3
+        )
+
+    def test_unchanged_revision_fetches_nothing(self, spreadsheet, paths):
+        """Test that an unchanged Drive version costs a single request."""
+        sync(spreadsheet, paths)
+        spreadsheet.requests.clear()
+
+        result = sync(spreadsheet, paths)
+
+        assert not result.changed
+        assert spreadsheet.requests == ["/drive/v3/files/sheet-id"]
+
+    def test_edit_is_detected(self, spreadsheet, paths):
+        """Test that an edited cell rewrites the CSV and reports its block."""
+        sync(spreadsheet, paths)
+        spreadsheet.set_cell(4, 3, "B1")
+
+        result = sync(spreadsheet, paths)
+
+        assert result.changed
+        assert result.changed_rows == 3
+        with open(paths[0], newline="") as f:
+            assert ["MA 103", "Calculus", "4", "B1"] in list(csv.reader(f))
+
+    def test_unsaved_sync_is_repeated(self, spreadsheet, paths):
+        """Test that a sync whose state was not saved is redone next time."""
+        sync(spreadsheet, paths, save=False)
+        spreadsheet.requests.clear()
+
+        result = sync(spreadsheet, paths)
+
+        assert result.changed
+        assert "/v4/spreadsheets/sheet-id/values:batchGet" in spreadsheet.requests
+
+    def test_content_hashes_without_drive(self, spreadsheet, paths):
+        """Test that without Drive access unchanged contents are not rewritten."""
+        spreadsheet.drive_enabled = False
+        sync(spreadsheet, paths)
+        os.utime(paths[0], (0, 0))
+
+        result = sync(spreadsheet, paths)
+
+        assert result.revision is None
+        assert not result.changed
+        assert os.path.getmtime(paths[0]) == 0
+
+    def test_empty_sheet(self, spreadsheet, paths):
+        """Test that an empty sheet is an error rather than an empty CSV."""
+        spreadsheet.update([])
+
+        with pytest.raises(SyncError):
+            sync(spreadsheet, paths)
+        assert not os.path.exists(paths[0])
+
+    def test_block_ranges(self):
+        """Test A1 ranges, including quoting of the sheet name."""
+        assert block_ranges("Bob's", 5, 2) == [
+            "'Bob''s'!1:2",
+            "'Bob''s'!3:4",
+            "'Bob''s'!5:5",
+        ]
+
+
+class TestRetries:
+    """Test cases for retrying failed API requests."""
+
+    def test_transient_errors_are_retried(self, spreadsheet):
+        """Test exponential backoff and that Retry-After is respected."""
+        sleeps = []
+        client = make_client(spreadsheet, sleeps, backoff=1.0)
+        spreadsheet.fail_next(503, 2)
+        spreadsheet.fail_next(429, retry_after=7)
+
+        assert client.row_count("Sheet 1") == len(ROWS) + 5
+        assert client.requests == 4
+        assert 0.5 <= sleeps[0] <= 1.0
+        assert 1.0 <= sleeps[1] <= 2.0
+        assert sleeps[2] == 7
+
+    def test_gives_up(self, spreadsheet):
+        """Test that retries are bounded and client errors are not retried."""
+        client = make_client(spreadsheet, retries=2)
+        spreadsheet.fail_next(500, 3)
+        with pytest.raises(SyncError, match="after 3 attempts"):
+            client.row_count("Sheet 1")
+
+        spreadsheet.fail_next(400)
+        with pytest.raises(SyncError, match="400"):
+            client.row_count("Sheet 1")
+        assert client.requests == 4
@@ -0,0 +1,112 @@
+import pytest
+
+from model import build_courses, build_slot_grid, cell_text
+from slots import (
+    FIRST_HALF,
+    FULL_SEMESTER,
+    SECOND_HALF,
+    build_occupancy,
+    period_minutes,
+    resolve_slot,
+    semester_half,
+    split_slots,
+)
+from snapshot_file import Table
+
+
+@pytest.fixture
+def grid():
+    return build_slot_grid(
+        Table(
+            ["Time Slot", "Monday", "Tuesday"],
+            [
+                ("8:30 - 9:50", "A1", "A2"),
+                ("10:00 - 11:20", "B1", "B2 / X1"),
+                ("Lunch", "", ""),
+                ("14:00 - 15:20", "I1", "J1"),
+                ("15:30 - 16:50", "K1", "L1"),
+            ],
+        )
+    )
+
+
+class TestSlotGrammar:
+    """Test cases for parsing slot cells."""
+
+    def test_split_slots(self):
+        """Test separators, case and duplicates in slot cells."""
+        assert split_slots("A1,A2, A1") == ("A1", "A2")
+        assert split_slots("H1,H2 \nB1,B2\n\nI1") == ("H1", "H2", "B1", "B2", "I1")
+        assert split_slots("i1 - k1; n1x2") == ("I1-K1", "N1X2")
+        assert split_slots(None) == ()
+
+    def test_semester_half(self):
+        """Test half-semester markers in course names."""
+        assert semester_half("Calculus\n(First half of Semester)") == FIRST_HALF
+        assert semester_half("Algebra (2nd Half)") == SECOND_HALF
+        assert semester_half("Halftone Imaging") == FULL_SEMESTER
+        assert semester_half(None) == FULL_SEMESTER
+
+    def test_period_minutes(self, grid):
+        """Test that time labels become the duration of each period."""
+        assert period_minutes("8:30 - 9:50") == (510, 590)
+        assert period_minutes("13.00-14.00") == (780, 840)
+        assert grid.periods[2] is None
+
+
+class TestResolveSlots:
+    """Test cases for resolving slot tokens to grid cells."""
+
+    def test_plain_codes(self, grid):
+        """Test single codes, including cells listing several codes."""
+        assert resolve_slot("A1", grid) == ((0, 1),)
+        assert resolve_slot("X1", grid) == ((1, 2),)
+        assert resolve_slot("B2", grid) == ((1, 2),)
+        assert resolve_slot("SATURDAY", grid) == ()
+
+    def test_spans(self, grid):
+        """Test periods spanned by a range or a duration."""
+        assert resolve_slot("I1-K1", grid) == ((3, 1), (4, 1))
+        assert resolve_slot("I1X2", grid) == ((3, 1), (4, 1))
+        assert resolve_slot("K1X3", grid) == ((4, 1),)
+        assert resolve_slot("I1-L1", grid) == ()
+
+    def test_occupancy(self, grid):
+        """Test the cells of every course session and unknown slots."""
+        courses = build_courses(
+            Table(
+                ["Course Code", "Course Name", "Lecture Time", "Lab Time"],
+                [
+                    ("CS101", "Programming", "A1,A2", "I1-K1"),
+                    ("ME101", "Workshop", "Saturday", "J1\nL1"),
+                ],
+            )
+        )
+        occupancy = build_occupancy(courses, grid)
+
+        assert [cell for cell, _ in occupancy.entries("CS101")] == [
+            (0, 1),
+            (0, 2),
+            (3, 1),
+            (4, 1),
+        ]
+        assert occupancy.entries("ME101")[0][1].kind == "Lab"
+        assert occupancy.unknown == {"ME101": ("SATURDAY",)}
+        assert occupancy.entries("NOPE") == ()
+
+    def test_half_semester_cells(self, grid):
+        """Test that halves sharing a cell are shown without a clash."""
+        courses = build_courses(
+            Table(
+                ["Course Code", "Course Name", "Lecture Time"],
+                [
+                    ("MA205", "Calculus (First half of Semester)", "A1"),
+                    ("MA206", "Algebra (Second half of Semester)", "A1"),
+                    ("MA207", "Geometry", "A1"),
+                ],
+            )
+        )
+        first, second, full = (courses[code].sessions for code in courses)
+
+        assert cell_text(first + second) == "MA205/ MA206\nHalf semester"
+        assert cell_text(first + second + full) == "MA205/ MA206/ MA207\n(Clash)"
@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import pytest
+
+from snapshot_file import Table, read_snapshot_file, read_version, write_snapshot_file
+
+
+@pytest.fixture
+def tables():
+    return {
+        "courses": Table(
+            ["Code", "Name", "Credit", "Seats", "Empty"],
+            [
+                ("CS101", "Programming", 4.0, 60, None),
+                ("MA101", None, None, 120, None),
+                ("CS102", "Programming", 2.5, 30, None),
+            ],
+        ),
+        "slots": Table(["Time Slot", "Monday"], [("08:00-09:00", "A1 ✓")]),
+        "none": Table(),
+    }
+
+
+class TestSnapshotFile:
+    """Test cases for the compiled snapshot format."""
+
+    def test_round_trip(self, tmp_path, tables):
+        """Test that every table, value type and missing cell survives."""
+        path = tmp_path / "data.snapshot"
+        write_snapshot_file(path, tables, "0123456789ab")
+
+        version, loaded = read_snapshot_file(path)
+
+        assert version == "0123456789ab"
+        assert read_version(path) == version
+        assert list(loaded) == ["courses", "slots", "none"]
+        for name, table in tables.items():
+            assert loaded[name].columns == table.columns
+            assert loaded[name].rows == table.rows
+        assert isinstance(loaded["courses"].rows[0][3], int)
+        assert loaded["none"].empty
+
+    def test_strings_are_shared(self, tmp_path, tables):
+        """Test that repeated strings are stored and loaded once."""
+        path = tmp_path / "data.snapshot"
+        write_snapshot_file(path, tables, "0123456789ab")
+
+        with open(path, "rb") as f:
+            assert f.read().count(b"Programming") == 1
+        rows = read_snapshot_file(path)[1]["courses"].rows
+        assert rows[0][1] is rows[2][1]
+
+    def test_float_column_with_gaps(self, tmp_path):
+        """Test that an integer column with missing cells is stored as floats."""
+        path = tmp_path / "data.snapshot"
+        write_snapshot_file(path, {"t": Table(["n"], [(1,), (None,)])}, "v")
+
+        assert read_snapshot_file(path)[1]["t"].rows == [(1.0,), (None,)]
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that files without the snapshot header are refused."""
+        path = tmp_path / "data.snapshot"
+        path.write_bytes(b"Course Code,Course Name\n" * 4)
+
+        with pytest.raises(ValueError):
+            read_version(path)
+        with pytest.raises(ValueError):
+            read_snapshot_file(path)
+
+    def test_rejects_truncated_files(self, tmp_path, tables):
+        """Test that a file cut short anywhere is refused with ValueError."""
+        path = tmp_path / "data.snapshot"
+        write_snapshot_file(path, tables, "v1")
+        data = path.read_bytes()
+
+        for size in range(32, len(data), 7):
+            path.write_bytes(data[:size])
+            with pytest.raises(ValueError):
+                read_snapshot_file(path)
+
+    def test_write_replaces_atomically(self, tmp_path, tables):
+        """Test that the file is only replaced once fully written."""
+        path = tmp_path / "data.snapshot"
+        write_snapshot_file(path, tables, "0" * 12)
+
+        with patch("snapshot_file.os.replace", side_effect=OSError("crash")):
+            with pytest.raises(OSError):
+                write_snapshot_file(path, tables, "1" * 12)
+        assert read_snapshot_file(path)[0] == "0" * 12
+
+        write_snapshot_file(path, tables, "1" * 12)
+        assert read_snapshot_file(path)[0] == "1" * 12
+        assert [p.name for p in tmp_path.iterdir()] == ["data.snapshot"]
@@ -0,0 +1,74 @@
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from datastore import TIME_SLOTS_FILE, TIMETABLE_FILE
+from terms import TermRegistry
+
+
+@pytest.fixture
+def root(tmp_path):
+    for term in ("2024-I", "2024-II", "2025-I"):
+        directory = tmp_path / term
+        directory.mkdir()
+        shutil.copy(TIME_SLOTS_FILE, directory)
+        shutil.copy(TIMETABLE_FILE, directory)
+    (tmp_path / "incomplete").mkdir()
+    return tmp_path
+
+
+class TestTermRegistry:
+    """Test cases for lazily loaded terms."""
+
+    def test_available_terms(self, root):
+        """Test that only directories with both data files are terms."""
+        registry = TermRegistry(str(root))
+
+        assert registry.available() == ["2024-I", "2024-II", "2025-I"]
+        assert registry.loaded() == []
+
+    def test_lazy_load(self, root):
+        """Test that a term is loaded on first use and then reused."""
+        registry = TermRegistry(str(root))
+
+        store = registry.get("2024-II")
+
+        assert store.snapshot.courses
+        assert registry.get("2024-II") is store
+        assert registry.loaded() == ["2024-II"]
+        assert registry.loads == 1
+
+    def test_unknown_terms(self, root):
+        """Test unknown, incomplete and path-like term names."""
+        registry = TermRegistry(str(root))
+
+        for term in ("2030-I", "incomplete", "..", "../2024-I", ""):
+            assert registry.get(term) is None
+        assert registry.loads == 0
+
+    def test_lru_eviction(self, root):
+        """Test that the least recently used term is unloaded first."""
+        registry = TermRegistry(str(root), max_loaded=2)
+
+        registry.get("2024-I")
+        registry.get("2024-II")
+        registry.get("2024-I")
+        registry.get("2025-I")
+
+        assert registry.loaded() == ["2024-I", "2025-I"]
+        assert registry.evictions == 1
+
+    def test_idle_eviction(self, root):
+        """Test that terms idle for too long are unloaded."""
+        registry = TermRegistry(str(root), idle_seconds=60)
+
+        with patch("terms.time.monotonic", return_value=1000.0):
+            registry.get("2024-I")
+            registry.get("2024-II")
+        with patch("terms.time.monotonic", return_value=1030.0):
+            registry.get("2024-II")
+        with patch("terms.time.monotonic", return_value=1070.0):
+            registry.get("2025-I")
+
+        assert registry.loaded() == ["2024-II", "2025-I"]